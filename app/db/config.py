@@ -9,18 +9,44 @@ Configuration script for PosgreSQL database connection.
 
 Used to power query.py in order to pull data from PostgreSQL database into Streamlit app for further manipulation in Python.
 
+Database credentials are loaded once per process (per section and file) and returned as a read-only mapping,
+so opening a connection does no environment or file I/O. Call reload() after changing either source.
+
 Date: Jan 15, 2025
 """
 
 import os
+import threading
 # import os.path
 from configparser import ConfigParser
+from types import MappingProxyType
+
+_db_settings = {}  # (section, filename) -> read-only credentials mapping
+_lock = threading.Lock()
 
 def db_config(section, filename = 'db/credentials.ini'):
     '''
     Params: section string (i.e. 'postgres')
     Returns: database credentials as string values, to be used as inputs to query function in query.py
+    Loaded on first use and cached for the process (see reload()).
+    '''
+    key = (section, filename)
+    settings = _db_settings.get(key)
+    if settings is None:
+        with _lock:
+            settings = _db_settings.get(key)
+            if settings is None:
+                settings = _db_settings[key] = MappingProxyType(_load_db_config(section, filename))
+    return settings
+
+def reload():
     '''
+    Forget cached database credentials; the next db_config() call reads them again.
+    '''
+    with _lock:
+        _db_settings.clear()
+
+def _load_db_config(section, filename):
     # First, try to get configuration from Digitial Ocean environment variables
     db_config = {
         'host': os.getenv('DB_HOST'),
@@ -32,8 +58,6 @@ def db_config(section, filename = 'db/credentials.ini'):
     }
 
     # Check if environment variables are empty
-    # Check if environment variables are empty
-    print(db_config)
     if all(value is None for value in db_config.values()):
         print(f"=== ENV VARS ARE NONE, FALLING BACK TO {filename} ===")
         
@@ -7,7 +7,11 @@ def get_connection():
     """
     Context manager for database connections through PgBouncer.
     Automatically handles connection cleanup.
-    
+
+    One connection per call, so queries are sent as plain SQL: a server-side
+    prepared statement (as the feed service's db/prepared.py uses on its
+    pooled connections) would not outlive the call.
+
     Usage:
         with get_connection() as conn:
             with conn.cursor() as cur:
@@ -16,9 +20,8 @@ def get_connection():
     """
     conn = None
     try:
-        conn = psycopg2.connect(**config('postgres'))
+        conn = psycopg2.connect(**config('postgres'))  # credentials cached by db.config
         yield conn
     finally:
         if conn is not None:
-            conn.close()  # Returns connection to PgBouncer pool
-            print("Database connection closed.")
\ No newline at end of file
+            conn.close()  # Returns connection to PgBouncer pool
\ No newline at end of file
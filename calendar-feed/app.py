@@ -1,9 +1,13 @@
 import logging
 import os
+import threading
 import time
 from flask import Flask, request, g, Response
 from flask_caching import Cache
 from extensions import cache
+from db.connect import configure_pool
+from invalidation import init_app as init_invalidation
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, observe_request, registry
 from routes.chamber import bp as chamber_bp
 from routes.committee import bp as committee_bp
 from routes.org import bp as org_bp
@@ -16,18 +20,52 @@ logging.basicConfig(
 )
 
 
+def _count_bytes(body, on_done):
+    """Wrap a streamed response body, calling on_done(size) when it closes."""
+    size = 0
+    try:
+        for chunk in body:
+            size += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+        on_done(size)
+
+
+# One materialize run per worker at a time (POST /admin/feeds/materialize)
+_materialize_lock = threading.Lock()
+
+
 def create_app() -> Flask:
     global cache
     app = Flask(__name__)
 
-    # Configure cache
-    app.config["CACHE_TYPE"] = "filesystem"
-    app.config["CACHE_DIR"] = "/tmp/flask_cache"
+    # Configure cache: per-worker LRU in front of a shared tier (cache_backend.py)
+    redis_url = os.getenv("CACHE_REDIS_URL")
+    app.config["CACHE_TYPE"] = "cache_backend.TieredCache"
+    app.config["CACHE_SHARED_BACKEND"] = os.getenv(
+        "CACHE_SHARED_BACKEND", "redis" if redis_url else "filesystem"
+    )
+    app.config["CACHE_REDIS_URL"] = redis_url
+    app.config["CACHE_KEY_PREFIX"] = os.getenv("CACHE_KEY_PREFIX", "calfeed:")
+    app.config["CACHE_DIR"] = os.getenv("CACHE_DIR", "/tmp/flask_cache")
+    app.config["CACHE_LOCAL_MAX_ITEMS"] = int(os.getenv("CACHE_LOCAL_MAX_ITEMS", "512"))
+    app.config["CACHE_LOCAL_MAX_BYTES"] = int(os.getenv("CACHE_LOCAL_MAX_MB", "64")) * 1024 * 1024
+    app.config["CACHE_LOCAL_TTL"] = float(os.getenv("CACHE_LOCAL_TTL", "60"))
+    app.config["CACHE_COMPRESS_MIN_BYTES"] = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
     app.config["CACHE_DEFAULT_TIMEOUT"] = 3600  # 1 hr fallback
 
     # Initialize cache with app
     cache.init_app(app)
 
+    # Feed change notifications evict this app's cached payloads
+    init_invalidation(app)
+
+    # Reuse DB connections across requests; sizes come from DB_POOL_* env vars
+    if os.getenv("DB_POOL_ENABLED", "true").lower() == "true":
+        configure_pool()
+
     app.register_blueprint(chamber_bp)
     app.register_blueprint(committee_bp)
     app.register_blueprint(org_bp)
@@ -42,25 +80,40 @@ def create_app() -> Flask:
     @app.after_request
     def log_request_duration(response):
         # Skip logging for health/status endpoints to reduce noise
-        if request.endpoint in ["status", "health"]:
+        if request.endpoint in ["status", "health", "metrics"]:
             return response
 
-        duration = time.time() - g.start_time
-        size = len(response.get_data())
-
+        start_time = g.start_time
+        is_feed = "feed" in request.path
         # Log calendar feed requests specifically
-        if "feed" in request.path:
-            app.logger.info(
-                f"CALENDAR FEED | Path: {request.path} | "
-                f"Duration: {duration:.4f}s | Size: {size/1024:.1f}KB"
-            )
+        if is_feed:
+            prefix = f"CALENDAR FEED | Path: {request.path}"
         else:
-            app.logger.info(
-                f"REQUEST | {request.method} {request.path} | "
-                f"Duration: {duration:.4f}s | Size: {size/1024:.1f}KB"
-            )
+            prefix = f"REQUEST | {request.method} {request.path}"
+
+        # Set by routes._helpers for feed bodies; "raw" grows while a body streams
+        feed_sizes = g.get("feed_sizes")
+        feed_timings = g.get("feed_timings")
+        route = request.endpoint or "unmatched"
+        status = response.status_code
+
+        def log_size(size: int):
+            duration = time.time() - start_time
+            size_note = f"{size/1024:.1f}KB"
+            if feed_sizes and feed_sizes["encoding"]:
+                size_note += f" ({feed_sizes['encoding']}, raw {feed_sizes['raw']/1024:.1f}KB)"
+            app.logger.info(f"{prefix} | Duration: {duration:.4f}s | Size: {size_note}")
+            if is_feed:
+                observe_request(route, status, duration, feed_timings)
+
+        if response.is_streamed:
+            # Count bytes as they are sent; logged once the body is finished
+            response.response = _count_bytes(response.response, log_size)
+        else:
+            log_size(response.calculate_content_length() or response.content_length or 0)
 
         # Add custom response headers for debugging
+        duration = time.time() - start_time
         response.headers["X-Response-Time"] = f"{duration*1000:.2f}ms"
         return response
 
@@ -68,24 +121,102 @@ def create_app() -> Flask:
     def root():
         return {"status": "ok"}, 200
 
-    # NOTE: not currently in use
-    # Cache clear endpoint for background worker
+    # Cache clear endpoint for background worker and manual evictions
     @app.route("/admin/cache/clear", methods=["POST"])
     def clear_cache():
-        """Clear all cached responses. Called by background worker after data updates."""
+        """
+        Clear all cached responses, or only keys matching ?pattern= (a glob,
+        e.g. feed:org:7[@:]* for every window and encoding of one feed).
+        Called by background worker after data updates.
+        """
         api_key = request.headers.get("X-API-Key")
         expected_key = os.environ.get("CACHE_CLEAR_KEY")
 
         if not expected_key or api_key != expected_key:
             return {"error": "Unauthorized"}, 401
 
+        pattern = request.args.get("pattern")
+        if pattern:
+            deleted = cache.cache.delete_pattern(pattern)
+            app.logger.info(f"Cache keys matching {pattern!r} cleared ({deleted})")
+            return {"status": "ok", "deleted": deleted}, 200
+
         cache.clear()
         app.logger.info("Cache cleared by background worker")
         return {"status": "ok"}, 200
 
+    @app.route("/admin/cache/stats")
+    def cache_stats():
+        """Hit/miss/eviction counters of the worker that serves the request."""
+        api_key = request.headers.get("X-API-Key")
+        expected_key = os.environ.get("CACHE_CLEAR_KEY")
+
+        if not expected_key or api_key != expected_key:
+            return {"error": "Unauthorized"}, 401
+
+        return {"pid": os.getpid(), **cache.cache.stats()}, 200
+
+    @app.route("/metrics")
+    def metrics():
+        """
+        Prometheus metrics of the worker that serves the request (metrics.py).
+        If METRICS_KEY is set, scrapes must send it as a bearer token.
+        """
+        expected_key = os.environ.get("METRICS_KEY")
+        if expected_key and request.headers.get("Authorization") != f"Bearer {expected_key}":
+            return {"error": "Unauthorized"}, 401
+
+        return Response(registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+    @app.route("/admin/feeds/materialize", methods=["POST"])
+    def materialize():
+        """
+        Prebuild every feed into the cache. Called after each data refresh.
+        A JSON body {"orgs": [...], "users": [...], "wg": true} builds just
+        those dashboards.
+
+        A full run takes longer than the gunicorn worker timeout, so it runs
+        in a background thread (a greenlet under gevent) and the request
+        returns 202 at once; the summary is logged when the run finishes.
+        A request while a run is in progress on this worker gets a 409.
+        """
+        api_key = request.headers.get("X-API-Key")
+        expected_key = os.environ.get("CACHE_CLEAR_KEY")
+
+        if not expected_key or api_key != expected_key:
+            return {"error": "Unauthorized"}, 401
+
+        from materialize import materialize_dashboards, materialize_feeds
+
+        body = request.get_json(silent=True) or {}
+        if body.get("orgs") or body.get("users") or body.get("wg"):
+            job = lambda: materialize_dashboards(
+                body.get("orgs") or (), body.get("users") or (), bool(body.get("wg"))
+            )
+        else:
+            job = materialize_feeds
+
+        if not _materialize_lock.acquire(blocking=False):
+            return {"error": "Materialize already running"}, 409
+
+        def run():
+            try:
+                with app.app_context():
+                    job()
+            except Exception as e:
+                app.logger.error(f"Materialize failed: {e}")
+            finally:
+                _materialize_lock.release()
+
+        threading.Thread(target=run, name="materialize", daemon=True).start()
+        return {"status": "accepted"}, 202
+
     return app
 
 
 if __name__ == "__main__":
+    from invalidation import start_listener
+
     app = create_app()
+    start_listener()
     app.run(host="0.0.0.0", port=5000, debug=False)
@@ -1,27 +1,176 @@
 import hashlib
 import logging
-from typing import Optional
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
 
+from db import prepared
 from db.connect import get_conn
+from db.calendar_queries import (
+    get_org_feed_by_token,
+    get_org_validators,
+    get_user_feed_by_token,
+    get_user_validators,
+    get_wg_feed_by_token,
+    get_wg_validators,
+)
+from db.tokens import register_rotation_hook
+from invalidation import feed_validators, listener
 
 logger = logging.getLogger(__name__)
 
 
-def _hash(raw_token: str) -> str:
+def hash_token(raw_token: str) -> str:
+    """sha256 hex digest of a raw feed token, as stored in feed_token_hash."""
     return hashlib.sha256(raw_token.encode()).hexdigest()
 
 
+# ── Token resolution cache ─────────────────────────────────────────────────────
+
+
+class TokenCache:
+    """
+    Bounded LRU of token hash -> identity with a TTL per entry.
+
+    Misses (unknown hashes) are kept in a separate, smaller LRU with a shorter
+    TTL, so a burst of bad or stale URLs can neither cost a DB query each nor
+    push valid tokens out of the positive cache.
+
+    A revoked or rotated token keeps resolving until its entry expires or a
+    feed_token_rotated notification evicts it, so identities get the full
+    `ttl` only while `listening()` says the invalidation listener is
+    connected, and `unlistened_ttl` otherwise.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        negative_maxsize: int,
+        negative_ttl: float,
+        unlistened_ttl: float | None = None,
+        listening=lambda: True,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.unlistened_ttl = ttl if unlistened_ttl is None else unlistened_ttl
+        self.listening = listening
+        self.negative_maxsize = negative_maxsize
+        self.negative_ttl = negative_ttl
+        self._hits: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._misses: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash: str) -> tuple[bool, Any]:
+        """Return (found, identity); identity is None for a cached miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._hits.get(token_hash)
+            if entry is not None:
+                if entry[0] > now:
+                    self._hits.move_to_end(token_hash)
+                    return True, entry[1]
+                del self._hits[token_hash]
+            expires = self._misses.get(token_hash)
+            if expires is not None:
+                if expires > now:
+                    return True, None
+                del self._misses[token_hash]
+        return False, None
+
+    def put(self, token_hash: str, identity: Any):
+        now = time.monotonic()
+        with self._lock:
+            if identity is None:
+                self._misses[token_hash] = now + self.negative_ttl
+                self._misses.move_to_end(token_hash)
+                while len(self._misses) > self.negative_maxsize:
+                    self._misses.popitem(last=False)
+            else:
+                ttl = self.ttl if self.listening() else self.unlistened_ttl
+                if ttl <= 0:
+                    return
+                self._misses.pop(token_hash, None)
+                self._hits[token_hash] = (now + ttl, identity)
+                self._hits.move_to_end(token_hash)
+                while len(self._hits) > self.maxsize:
+                    self._hits.popitem(last=False)
+
+    def evict(self, token_hash: str):
+        with self._lock:
+            self._hits.pop(token_hash, None)
+            self._misses.pop(token_hash, None)
+
+    def clear(self):
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+
+def _cache_from_env() -> TokenCache:
+    return TokenCache(
+        maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+        ttl=float(os.getenv("TOKEN_CACHE_TTL", "300")),
+        negative_maxsize=int(os.getenv("TOKEN_CACHE_NEGATIVE_SIZE", "2000")),
+        negative_ttl=float(os.getenv("TOKEN_CACHE_NEGATIVE_TTL", "60")),
+        # Without the listener, rotations in other processes go unseen
+        unlistened_ttl=float(os.getenv("TOKEN_CACHE_TTL_NO_LISTENER", "30")),
+        listening=lambda: listener.connected,
+    )
+
+
+# Org values are {org_id, org_name}; user values are {email, is_wg_member}
+org_tokens = _cache_from_env()
+user_tokens = _cache_from_env()
+
+
+def invalidate_token(token_hash: Optional[str]):
+    """Evict a token hash (positive or negative) from both caches."""
+    if token_hash:
+        org_tokens.evict(token_hash)
+        user_tokens.evict(token_hash)
+
+
+def clear_token_caches():
+    """Forget every cached token (positive and negative)."""
+    org_tokens.clear()
+    user_tokens.clear()
+
+
+@register_rotation_hook
+def _on_token_rotated(old_hash: Optional[str], new_hash: str):
+    # The new hash may have been probed (and cached as a miss) before rotation
+    invalidate_token(old_hash)
+    invalidate_token(new_hash)
+
+
+# ── Resolution ─────────────────────────────────────────────────────────────────
+
+# Run on pooled connections, so prepared like the feed queries (db/prepared.py)
+_ORG_TOKEN = prepared.statement(
+    "token_org",
+    "SELECT id, nickname FROM auth.approved_organizations WHERE feed_token_hash = %(token_hash)s",
+)
+_USER_TOKEN = prepared.statement(
+    "token_user",
+    "SELECT email, ai_working_group FROM auth.approved_users WHERE feed_token_hash = %(token_hash)s",
+)
+
+
 def resolve_org_token(raw_token: str) -> Optional[int]:
     """Return org_id if the token is valid, else None."""
-    hashed = _hash(raw_token)
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT id FROM auth.approved_organizations WHERE feed_token_hash = %s",
-                (hashed,),
-            )
-            row = cur.fetchone()
-    return row[0] if row else None
+    hashed = hash_token(raw_token)
+    found, org = org_tokens.get(hashed)
+    if not found:
+        with get_conn(readonly=True) as conn:
+            with conn.cursor() as cur:
+                prepared.execute(cur, _ORG_TOKEN, {"token_hash": hashed})
+                row = cur.fetchone()
+        org = {"org_id": row[0], "org_name": row[1]} if row else None
+        org_tokens.put(hashed, org)
+    return org["org_id"] if org else None
 
 
 def resolve_user_token(raw_token: str) -> Optional[dict]:
@@ -29,17 +178,85 @@ def resolve_user_token(raw_token: str) -> Optional[dict]:
     Return {email, is_wg_member} if the token is valid, else None.
     is_wg_member is True when the wg column equals 'yes' (case-insensitive).
     """
-    hashed = _hash(raw_token)
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT email, ai_working_group FROM auth.approved_users WHERE feed_token_hash = %s",
-                (hashed,),
-            )
-            row = cur.fetchone()
-    if not row:
-        return None
-    return {
-        "email": row[0],
-        "is_wg_member": (row[1] or "").strip().lower() == "yes",
-    }
+    hashed = hash_token(raw_token)
+    found, user = user_tokens.get(hashed)
+    if not found:
+        with get_conn(readonly=True) as conn:
+            with conn.cursor() as cur:
+                prepared.execute(cur, _USER_TOKEN, {"token_hash": hashed})
+                row = cur.fetchone()
+        user = (
+            {
+                "email": row[0],
+                "is_wg_member": (row[1] or "").strip().lower() == "yes",
+            }
+            if row
+            else None
+        )
+        user_tokens.put(hashed, user)
+    return user
+
+
+# Feed loaders: a cached identity costs only the small validators query (none
+# at all while invalidation.py's listener has them cached) and returns
+# rows=None — routes fetch rows with the identity-keyed get_hearings_for_*
+# query once they know the feed actually changed. An uncached token uses the
+# single-round-trip *_feed_by_token query (identity, validators and rows
+# together) and seeds the cache. A cached bad token costs no query at all.
+# window (routes._helpers.request_window) is passed through to the queries
+# and the validator cache.
+
+
+def load_org_feed(
+    raw_token: str, window: tuple | None = None
+) -> tuple[Optional[dict], Optional[dict], Optional[list[dict]]]:
+    """Return ({org_id, org_name}, validators, rows | None), or (None, None, None)."""
+    hashed = hash_token(raw_token)
+    found, org = org_tokens.get(hashed)
+    if found:
+        if not org:
+            return None, None, None
+        validators = feed_validators(
+            f"org:{org['org_id']}", lambda: get_org_validators(org["org_id"], window), window
+        )
+        return org, validators, None
+    org, validators, rows = get_org_feed_by_token(hashed, grouped=True, window=window)
+    org_tokens.put(hashed, org)
+    return org, validators, rows
+
+
+def load_user_feed(
+    raw_token: str, window: tuple | None = None
+) -> tuple[Optional[dict], Optional[dict], Optional[list[dict]]]:
+    """Return ({email, is_wg_member}, validators, rows | None), or (None, None, None)."""
+    hashed = hash_token(raw_token)
+    found, user = user_tokens.get(hashed)
+    if found:
+        if not user:
+            return None, None, None
+        validators = feed_validators(
+            f"user:{user['email']}", lambda: get_user_validators(user["email"], window), window
+        )
+        return user, validators, None
+    user, validators, rows = get_user_feed_by_token(hashed, grouped=True, window=window)
+    user_tokens.put(hashed, user)
+    return user, validators, rows
+
+
+def load_wg_feed(
+    raw_token: str, window: tuple | None = None
+) -> tuple[Optional[dict], Optional[dict], Optional[list[dict]]]:
+    """
+    Return ({email, is_wg_member}, validators, rows | None) for a user token.
+    Validators and rows are only loaded for WG members; callers decide
+    between 401 and 403.
+    """
+    hashed = hash_token(raw_token)
+    found, user = user_tokens.get(hashed)
+    if found:
+        if not user or not user["is_wg_member"]:
+            return user, None, None
+        return user, feed_validators("wg", lambda: get_wg_validators(window), window), None
+    user, validators, rows = get_wg_feed_by_token(hashed, grouped=True, window=window)
+    user_tokens.put(hashed, user)
+    return user, validators, rows
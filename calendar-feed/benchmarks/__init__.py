@@ -0,0 +1,9 @@
+# The service imports the shared db package from the monorepo root (the image
+# copies it next to the service); make it importable when the benchmarks run
+# from calendar-feed/.
+import sys
+from pathlib import Path
+
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
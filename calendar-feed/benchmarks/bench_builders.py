@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+calendar-feed/benchmarks/bench_builders.py
+
+CPU microbenchmarks for the pure feed builders over fixed-seed synthetic
+org dashboard feeds of about 100, 1k and 10k bill rows, with a stored baseline
+to compare against.
+
+Usage (from calendar-feed/):
+    python -m benchmarks.bench_builders                      # print timings
+    python -m benchmarks.bench_builders --compare            # ...against the baseline
+    python -m benchmarks.bench_builders --save-baseline      # store these timings as the baseline
+    python -m benchmarks.bench_builders --sizes 1000 --only build_ical,build_json
+
+Benchmarks, each timed over a whole feed (best of --repeat, timeit):
+    group_hearings        grouped-mode query rows -> FeedRow groups
+    build_ical            the whole .ics payload (ICS_SERIALIZER's builder), cold fragment cache
+    build_ical_warm       the same with every hearing fragment already cached
+    build_hearing_event   one icalendar Event per hearing, cold fragment cache
+    _build_description    plain + HTML description per hearing
+    build_deadline_event  one icalendar Event per tracked bill with a deadline
+    build_json            the JSON feed body
+
+--compare exits non-zero if any benchmark is slower than the baseline by
+more than --threshold (default 1.25x). Baselines are only comparable on the
+machine and Python that recorded them (both are stored in the file), so
+record a fresh one before judging a change elsewhere.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+import hearing_builder
+from benchmarks.synthetic import make_rows, to_grouped
+from deadline_builder import build_deadline_event
+from hearing_builder import _build_description, build_hearing_event, group_hearings
+from ics_builder import build_ical
+from json_builder import build_json
+
+BASELINE = Path(__file__).resolve().parent / "baseline" / "builders.json"
+NOW = datetime(2026, 4, 15, 8, 30, tzinfo=timezone.utc)
+SIZES = (100, 1_000, 10_000)
+BILLS_PER_HEARING = 10  # make_rows mean; hearings = size // 10
+TITLE, LABEL = "TechEquity, Inc. - Legislation Tracker", "ORG"
+
+
+def _cold(fn):
+    """fn with the hearing fragment cache emptied first, as on a fresh worker."""
+    def run():
+        hearing_builder.fragments.clear()
+        fn()
+    return run
+
+
+def make_cases(size: int) -> dict:
+    """name -> zero-argument callable over one feed of about `size` bill rows."""
+    grouped = to_grouped(make_rows(n_hearings=max(1, size // BILLS_PER_HEARING), org=True, seed=size))
+    groups = group_hearings(grouped)
+    deadline_rows = [
+        row for _, rows in groups for row in rows if row.on_dashboard and row.deadline_date
+    ]
+
+    def hearing_events():
+        for hearing_id, rows in groups:
+            build_hearing_event(NOW, hearing_id, rows, True)
+
+    def descriptions():
+        for _, rows in groups:
+            _build_description(rows[0].hearing, rows, True)
+
+    def deadline_events():
+        for row in deadline_rows:
+            build_deadline_event(NOW, row, LABEL)
+
+    def ical():
+        build_ical(None, TITLE, LABEL, True, NOW, groups=groups)
+
+    return {
+        "group_hearings": lambda: group_hearings(grouped),
+        "build_ical": _cold(ical),
+        "build_ical_warm": ical,
+        "build_hearing_event": _cold(hearing_events),
+        "_build_description": descriptions,
+        "build_deadline_event": deadline_events,
+        "build_json": lambda: build_json(None, groups=groups),
+    }, sum(len(rows) for _, rows in groups)
+
+
+def measure(fn, repeat: int) -> float:
+    """Best seconds per call."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(sizes, only, repeat: int) -> dict:
+    results = {}
+    for size in sizes:
+        cases, n_rows = make_cases(size)
+        print(f"{size} bills ({n_rows} rows), best of {repeat}")
+        for name, fn in cases.items():
+            if only and name not in only:
+                continue
+            fn()  # warm up (imports, fragment cache for *_warm)
+            seconds = measure(fn, repeat)
+            results[f"{name}/{size}"] = seconds
+            print(f"  {name:<22} {seconds * 1000:9.3f}ms  {seconds / n_rows * 1e6:7.2f}us/row")
+    return results
+
+
+def compare(results: dict, threshold: float) -> bool:
+    baseline = json.loads(BASELINE.read_text())
+    print(
+        f"\nvs baseline ({baseline['python']}, {baseline['machine']}, {baseline['recorded']}):"
+    )
+    ok = True
+    for key, seconds in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"  {key:<28} (not in baseline)")
+            continue
+        ratio = seconds / base
+        flag = "SLOWER" if ratio > threshold else ("faster" if ratio < 1 / threshold else "")
+        ok = ok and ratio <= threshold
+        print(f"  {key:<28} {base * 1000:9.3f}ms -> {seconds * 1000:9.3f}ms  {ratio:5.2f}x {flag}")
+    return ok
+
+
+def save_baseline(results: dict):
+    BASELINE.parent.mkdir(exist_ok=True)
+    BASELINE.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor() or ''}".strip(),
+        "recorded": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+        "results": results,
+    }, indent=2) + "\n")
+    print(f"\nwrote {BASELINE.relative_to(BASELINE.parent.parent.parent)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed builder microbenchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="bill rows per feed")
+    parser.add_argument("--only", default="", help="comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", action="store_true", help="compare with the stored baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown that fails --compare")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Keep the per-feed summary lines (and any LOG_SAMPLE_EVERY samples) out of the report
+    logging.disable(logging.INFO)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    only = set(filter(None, args.only.split(",")))
+    results = run(sizes, only, args.repeat)
+
+    if args.save_baseline:
+        save_baseline(results)
+    elif args.compare:
+        sys.exit(0 if compare(results, args.threshold) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+calendar-feed/benchmarks/bench_rows.py
+
+Memory and CPU per 10k feed rows: per-bill dicts (what RealDictCursor and
+the flat queries produce, one 25-key dict per hearing × bill) against the
+FeedRow/HearingRow slot objects the builders now work on (feed_rows.py).
+
+Usage (from calendar-feed/):
+    python -m benchmarks.bench_rows               # 10k rows
+    python -m benchmarks.bench_rows --rows 50000
+
+For each representation it reports, scaled to 10k rows:
+    build   time to turn grouped-mode query rows into per-bill rows
+    memory  bytes allocated for those rows (tracemalloc)
+    access  time to read the fields the builders read per row
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_rows, to_grouped
+from feed_rows import BILL_COLUMNS, HEARING_COLUMNS, rows_from_grouped
+
+_GROUPED_KEYS = ("bills", "deadline_dates", "deadline_types")
+
+# Fields read per row by hearing_builder, deadline_builder and _iter_event_fields
+_ROW_FIELDS = (
+    "bill_number", "bill_name", "bill_author", "file_order", "footnote",
+    "footnote_symbol", "on_dashboard", "org_position", "deadline_date", "deadline_type",
+)
+_HEARING_FIELDS = ("hearing_id", "hearing_name", "chamber_id", "notes", "canceled_at")
+
+
+def dict_rows(hearing: dict) -> list[dict]:
+    """The dict path: one merged dict per deadline × bill."""
+    base = {k: v for k, v in hearing.items() if k not in _GROUPED_KEYS}
+    deadlines = list(
+        zip(hearing["deadline_dates"] or (), hearing["deadline_types"] or ())
+    ) or [(None, None)]
+    return [
+        {**base, "deadline_date": d, "deadline_type": t, **bill}
+        for d, t in deadlines
+        for bill in hearing["bills"] or [{}]
+    ]
+
+
+def _read_dicts(groups):
+    for rows in groups:
+        for row in rows:
+            for f in _ROW_FIELDS:
+                row.get(f)
+            for f in _HEARING_FIELDS:
+                row.get(f)
+
+
+def _read_slots(groups):
+    for rows in groups:
+        for row in rows:
+            # Attribute reads as the builders write them
+            row.bill_number; row.bill_name; row.bill_author; row.file_order
+            row.footnote; row.footnote_symbol; row.on_dashboard; row.org_position
+            row.deadline_date; row.deadline_type
+            h = row.hearing
+            h.hearing_id; h.hearing_name; h.chamber_id; h.notes; h.canceled_at
+
+
+def _measure(expand, hearings, read, repeat):
+    best_build = best_read = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        groups = [expand(h) for h in hearings]
+        best_build = min(best_build, time.perf_counter() - start)
+        start = time.perf_counter()
+        read(groups)
+        best_read = min(best_read, time.perf_counter() - start)
+
+    tracemalloc.start()
+    groups = [expand(h) for h in hearings]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = sum(len(g) for g in groups)
+    return n, best_build, size, best_read
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed row representation benchmark")
+    parser.add_argument("--rows", type=int, default=10_000, help="approximate bill rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # ~10 bills per hearing on average
+    hearings = to_grouped(
+        make_rows(n_hearings=max(1, args.rows // 10), dashboard=True, org=True, seed=1)
+    )
+    print(
+        f"{len(hearings)} hearings; {len(HEARING_COLUMNS)} hearing + "
+        f"{len(BILL_COLUMNS) + 2} bill/deadline columns; best of {args.repeat}, per 10k rows"
+    )
+
+    results = {}
+    for name, expand, read in (
+        ("dict", dict_rows, _read_dicts),
+        ("slots", rows_from_grouped, _read_slots),
+    ):
+        n, build, size, access = _measure(expand, hearings, read, args.repeat)
+        scale = 10_000 / n
+        results[name] = (build * scale, size * scale, access * scale)
+        print(
+            f"  {name:<6} build {build * scale * 1000:7.1f}ms  "
+            f"memory {size * scale / 1024 / 1024:6.2f}MB  "
+            f"access {access * scale * 1000:7.1f}ms"
+        )
+
+    (db, dm, da), (sb, sm, sa) = results["dict"], results["slots"]
+    print(f"  slots vs dict: build {db / sb:.1f}x, memory {dm / sm:.1f}x smaller, access {da / sa:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+calendar-feed/benchmarks/bench_serializer.py
+
+Compares the direct ICS serializer (ics_writer) against the icalendar object
+graph, for correctness and speed.
+
+Usage (from calendar-feed/):
+    python -m benchmarks.bench_serializer                   # events/sec on a large chamber feed
+    python -m benchmarks.bench_serializer --hearings 5000   # bigger feed
+    python -m benchmarks.bench_serializer --check           # every serializer vs golden files
+    python -m benchmarks.bench_serializer --write-golden    # regenerate golden files (icalendar)
+
+--check exits non-zero when any serializer's output (icalendar, fast, the
+streamed iter_ical chunks joined, or fast over grouped-mode rows) differs
+from the stored golden files.
+The golden files pin the icalendar output; regenerate them only when a feed
+format change is intended.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import hearing_builder
+import ics_builder
+from benchmarks.synthetic import make_rows, to_grouped
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+NOW = datetime(2026, 4, 15, 8, 30, tzinfo=timezone.utc)
+
+# name -> (make_rows kwargs, build_ical args)
+GOLDEN_FEEDS = {
+    "chamber": (dict(n_hearings=25, seed=11), ("Chamber 1 - Legislation Tracker", "", False)),
+    "user": (dict(n_hearings=25, dashboard=True, seed=12), ("My Dashboard - Legislation Tracker", "", True)),
+    "org": (dict(n_hearings=25, org=True, seed=13), ("TechEquity, Inc. - Legislation Tracker", "ORG", True)),
+    "empty": (dict(n_hearings=0), ("Empty - Legislation Tracker", "", True)),
+}
+
+def _build_streamed(rows, feed_title, feed_label, dashboard, now_utc) -> bytes:
+    # iter_ical expects rows in hearing_id order, as the streaming queries return them
+    rows = sorted(rows, key=lambda r: r["hearing_id"])
+    return b"".join(ics_builder.iter_ical(rows, feed_title, feed_label, dashboard, now_utc))
+
+
+SERIALIZERS = {
+    "icalendar": ics_builder._build_icalendar,
+    "fast": ics_builder._build_fast,
+    "stream": _build_streamed,
+    "grouped": ics_builder._build_fast,
+}
+# Input shaping done before timing: "grouped" gets one row per hearing, as
+# the grouped=True feed queries return them
+PREPARE = {"grouped": to_grouped}
+
+
+def _golden_output(name: str, serializer: str) -> bytes:
+    kwargs, (title, label, dashboard) = GOLDEN_FEEDS[name]
+    rows = PREPARE.get(serializer, list)(make_rows(**kwargs))
+    return SERIALIZERS[serializer](rows, title, label, dashboard, NOW)
+
+
+def write_golden():
+    GOLDEN_DIR.mkdir(exist_ok=True)
+    for name in GOLDEN_FEEDS:
+        path = GOLDEN_DIR / f"{name}.ics"
+        path.write_bytes(_golden_output(name, "icalendar"))
+        print(f"  wrote {path.relative_to(GOLDEN_DIR.parent.parent)}")
+
+
+def check() -> bool:
+    ok = True
+    for name in GOLDEN_FEEDS:
+        expected = (GOLDEN_DIR / f"{name}.ics").read_bytes()
+        # Synthetic feeds reuse hearing ids, so start each one with an empty
+        # fragment cache; the first serializer renders cold, the rest warm.
+        hearing_builder.fragments.clear()
+        for serializer in SERIALIZERS:
+            actual = _golden_output(name, serializer)
+            if actual == expected:
+                print(f"  [OK]   {name:<8} {serializer}")
+                continue
+            ok = False
+            at = next(
+                (i for i, (a, b) in enumerate(zip(actual, expected)) if a != b),
+                min(len(actual), len(expected)),
+            )
+            print(f"  [FAIL] {name:<8} {serializer}: first difference at byte {at}")
+            print(f"         expected: {expected[max(0, at - 40):at + 40]!r}")
+            print(f"         actual:   {actual[max(0, at - 40):at + 40]!r}")
+    return ok
+
+
+def benchmark(n_hearings: int, bills_per_hearing: int, repeat: int):
+    rows = make_rows(n_hearings=n_hearings, bills_per_hearing=bills_per_hearing, seed=1)
+    title = "Chamber 1 - Legislation Tracker"
+    print(f"Chamber feed: {n_hearings} hearings, {len(rows)} bill rows, best of {repeat}")
+
+    results = {}
+    for serializer, build in SERIALIZERS.items():
+        feed_rows = PREPARE.get(serializer, list)(rows)
+        best = float("inf")
+        for _ in range(repeat):
+            hearing_builder.fragments.clear()
+            start = time.perf_counter()
+            payload = build(feed_rows, title, "", False, NOW)
+            best = min(best, time.perf_counter() - start)
+        events = payload.count(b"BEGIN:VEVENT")
+        results[serializer] = best
+        print(
+            f"  {serializer:<10} {best * 1000:8.1f}ms  "
+            f"{events / best:10,.0f} events/s  {len(payload) / 1024:8.1f}KB"
+        )
+    print(f"  speedup    {results['icalendar'] / results['fast']:.1f}x")
+
+    # A dashboard feed over hearings another feed already rendered only pays
+    # for its tracked-bill lists and serialization.
+    rows = make_rows(n_hearings, bills_per_hearing, dashboard=True, seed=1)
+    for label, warm in (("dash cold", False), ("dash warm", True)):
+        hearing_builder.fragments.clear()
+        best = float("inf")
+        for _ in range(repeat):
+            if warm:
+                ics_builder._build_fast(rows, title, "", True, NOW)
+            else:
+                hearing_builder.fragments.clear()
+            start = time.perf_counter()
+            payload = ics_builder._build_fast(rows, title, "", True, NOW)
+            best = min(best, time.perf_counter() - start)
+        events = payload.count(b"BEGIN:VEVENT")
+        print(
+            f"  {label:<10} {best * 1000:8.1f}ms  "
+            f"{events / best:10,.0f} events/s  (fast, hearing fragment cache)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICS serializer benchmark and golden check")
+    parser.add_argument("--check", action="store_true", help="compare both serializers to golden files")
+    parser.add_argument("--write-golden", action="store_true", help="regenerate golden files with icalendar")
+    parser.add_argument("--hearings", type=int, default=2000)
+    parser.add_argument("--bills", type=int, default=10, help="mean bills per hearing")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Keep the per-feed summary lines (and any LOG_SAMPLE_EVERY samples) out of the report
+    logging.disable(logging.INFO)
+
+    if args.write_golden:
+        write_golden()
+    elif args.check:
+        sys.exit(0 if check() else 1)
+    else:
+        benchmark(args.hearings, args.bills, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+calendar-feed/benchmarks/check_feed_paths.py
+
+Consistency check for the two ways a dashboard feed is loaded (auth.py): an
+uncached token runs the single-round-trip get_*_feed_by_token query, a
+cached one get_*_validators and then get_hearings_for_*. For one org, one
+user and one WG member of a seeded database, both paths must give the same
+validators, the same rows and so the same ETag and byte-identical .ics.
+
+Needs a database with the feed tables and data, e.g. one seeded by the load
+test (python -m benchmarks.load_test --db postgres --seed-db) or a restored
+copy of legtracker_2026. Only reads; connects like db.connect (DB_* /
+credentials.ini).
+
+Usage (from calendar-feed/):
+    python -m benchmarks.check_feed_paths
+    python -m benchmarks.check_feed_paths --since 2026-01-01
+"""
+
+import argparse
+import sys
+from datetime import date, datetime, timezone
+
+from db import calendar_queries as q
+from db.connect import get_conn
+from ics_builder import build_ical
+from routes import org, user, working_group
+from routes._helpers import feed_etag, window_key
+
+NOW = datetime(2026, 4, 15, 8, 30, tzinfo=timezone.utc)
+
+
+def _samples() -> dict:
+    """Feed token hashes of one org, one user and one WG member with a dashboard."""
+    with get_conn(readonly=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT o.feed_token_hash FROM auth.approved_organizations o
+                 WHERE o.feed_token_hash IS NOT NULL
+                   AND EXISTS (SELECT 1 FROM app.org_bill_dashboard d WHERE d.org_id = o.id)
+                 ORDER BY o.id LIMIT 1
+                """
+            )
+            org_row = cur.fetchone()
+            cur.execute(
+                """
+                SELECT u.feed_token_hash FROM auth.approved_users u
+                 WHERE u.feed_token_hash IS NOT NULL
+                   AND EXISTS (SELECT 1 FROM app.user_bill_dashboard d WHERE d.user_email = u.email)
+                 ORDER BY u.email LIMIT 1
+                """
+            )
+            user_row = cur.fetchone()
+            cur.execute(
+                """
+                SELECT feed_token_hash FROM auth.approved_users
+                 WHERE feed_token_hash IS NOT NULL
+                   AND LOWER(BTRIM(COALESCE(ai_working_group, ''))) = 'yes'
+                 ORDER BY email LIMIT 1
+                """
+            )
+            wg_row = cur.fetchone()
+    return {
+        "org": org_row and org_row[0],
+        "user": user_row and user_row[0],
+        "wg": wg_row and wg_row[0],
+    }
+
+
+def _token_path(kind: str, token_hash: str, window) -> tuple[str, dict, list[dict], str, str]:
+    """(feed_key, validators, rows, title, label) from the get_*_feed_by_token query."""
+    if kind == "org":
+        identity, validators, rows = q.get_org_feed_by_token(token_hash, grouped=True, window=window)
+        title = org.FEED_TITLE.format(org_name=identity["org_name"])
+        return f"org:{identity['org_id']}", validators, rows, title, org.FEED_LABEL
+    if kind == "user":
+        identity, validators, rows = q.get_user_feed_by_token(token_hash, grouped=True, window=window)
+        return f"user:{identity['email']}", validators, rows, user.FEED_TITLE, ""
+    _, validators, rows = q.get_wg_feed_by_token(token_hash, grouped=True, window=window)
+    return "wg", validators, rows, working_group.FEED_TITLE, working_group.FEED_LABEL
+
+
+def _identity_path(feed_key: str, window) -> tuple[dict, list[dict]]:
+    """(validators, rows) from the identity-keyed queries of a cached token."""
+    kind, _, ident = feed_key.partition(":")
+    if kind == "org":
+        return (
+            q.get_org_validators(int(ident), window),
+            q.get_hearings_for_org(int(ident), grouped=True, window=window),
+        )
+    if kind == "user":
+        return (
+            q.get_user_validators(ident, window),
+            q.get_hearings_for_user(ident, grouped=True, window=window),
+        )
+    return q.get_wg_validators(window), q.get_hearings_for_wg(grouped=True, window=window)
+
+
+def check(kind: str, token_hash: str, window) -> list[str]:
+    """Differences between the token and identity paths of one feed."""
+    feed_key, validators, rows, title, label = _token_path(kind, token_hash, window)
+    identity_validators, identity_rows = _identity_path(feed_key, window)
+    problems = []
+    if validators != identity_validators:
+        problems.append(f"validators {validators} != {identity_validators}")
+    if rows != identity_rows:
+        problems.append(f"rows differ ({len(rows)} vs {len(identity_rows)} hearings)")
+    key = window_key(feed_key, window)
+    if feed_etag(key, validators) != feed_etag(key, identity_validators):
+        problems.append("ETags differ")
+    ics = build_ical(rows, title, label, True, NOW)
+    if ics != build_ical(identity_rows, title, label, True, NOW):
+        problems.append("ICS differs")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the token and identity feed paths")
+    parser.add_argument("--since", type=date.fromisoformat, help="feed window start (default: feed_window())")
+    args = parser.parse_args()
+
+    window = q.feed_window(since=args.since)
+    print(f"\n-- Token vs identity feed paths (window {window[0]} .. {window[1]}) ---")
+    failures = 0
+    for kind, token_hash in _samples().items():
+        if token_hash is None:
+            print(f"  [SKIP] {kind}: no sample token")
+            continue
+        problems = check(kind, token_hash, window)
+        if problems:
+            failures += 1
+            print(f"  [DIFF] {kind}: {'; '.join(problems)}")
+        else:
+            print(f"  [OK] {kind}")
+
+    print(f"\n{failures} feed(s) differ.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+calendar-feed/benchmarks/load_test.py
+
+Throughput, latency and memory of the feed service under concurrent load,
+as JSON for regression tracking.
+
+Usage (from calendar-feed/):
+    python -m benchmarks.load_test                                # stub DB, 50 clients, 30s
+    python -m benchmarks.load_test --cache off --concurrency 200
+    python -m benchmarks.load_test --latency-ms 5                 # stub queries take 5ms
+    python -m benchmarks.load_test --db postgres --seed-db        # seed an empty database first
+    python -m benchmarks.load_test --db postgres                  # reuse a seeded database
+    python -m benchmarks.load_test --out results/cache-on.json
+
+The service runs as it does in production: gunicorn with gevent workers and
+the gunicorn.conf.py hooks, on a local port. The feeds come from a synthetic
+session (benchmarks/session.py) served either by an in-memory stub of the
+query layer (--db stub) or by PostgreSQL (--db postgres, connecting with the
+usual DB_* variables or db/credentials.ini). --seed-db creates and fills the
+tables in that database and refuses to touch one that already has them.
+
+Clients are gevent greenlets in this process, each with its own keep-alive
+connection, requesting a random mix of chamber, committee, org, user and
+working group feeds (.ics, or JSON for --json-share of requests) until
+--duration runs out. Requests made during --warmup aren't counted.
+
+--cache off disables the payload cache, the feed row sets and the hearing
+fragment cache in the service; --conditional makes clients send the ETag
+they last saw for a URL, as calendar apps do.
+
+The JSON report has req/s, p50/p95/p99/max latency overall and per feed
+kind, status counts, bytes received, and peak RSS (VmHWM) of each
+gunicorn worker and of the client process.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import json
+import os
+import random
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import gevent
+import requests
+
+from benchmarks.session import make_session, seed_postgres
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = SERVICE_DIR.parent
+
+FEED_KINDS = ("chamber", "committee", "org", "user", "wg")
+DEFAULT_MIX = "chamber=2,committee=3,org=2,user=4,wg=1"
+
+
+# ── Service ────────────────────────────────────────────────────────────────────
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _service_env(args, cache_dir: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SERVICE_DIR), str(REPO_ROOT), env.get("PYTHONPATH")) if p
+    )
+    env["CACHE_DIR"] = cache_dir
+    env.setdefault("FEED_LISTENER_ENABLED", "false")
+    # No tokens are revoked during a run: cache them as long as with a listener
+    env.setdefault("TOKEN_CACHE_TTL_NO_LISTENER", env.get("TOKEN_CACHE_TTL", "300"))
+    if args.cache == "off":
+        env.update(
+            CACHE_SHARED_BACKEND="none",
+            CACHE_LOCAL_MAX_ITEMS="0",
+            FEED_ROW_SET_CACHE_SIZE="0",
+            HEARING_FRAGMENT_CACHE_SIZE="0",
+        )
+    if args.db == "stub":
+        env["DB_POOL_ENABLED"] = "false"
+        env["BENCH_SESSION"] = json.dumps(_session_kwargs(args))
+        env["BENCH_LATENCY_MS"] = str(args.latency_ms)
+    return env
+
+
+def start_service(args, port: int, cache_dir: str, log_file) -> subprocess.Popen:
+    app = "benchmarks.session:create_stub_app()" if args.db == "stub" else "app:create_app()"
+    cmd = [
+        sys.executable, "-m", "gunicorn", app,
+        "-c", str(SERVICE_DIR / "gunicorn.conf.py"),
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(args.workers),
+        "--worker-class", "gevent",
+        "--access-logfile", "/dev/null",
+        "--log-level", "warning",
+    ]
+    service = subprocess.Popen(
+        cmd,
+        cwd=SERVICE_DIR,
+        env=_service_env(args, cache_dir),
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if service.poll() is not None:
+            raise RuntimeError(f"Service exited with {service.returncode}; see {log_file.name}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/", timeout=1).ok:
+                return service
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    service.terminate()
+    raise RuntimeError(f"Service didn't start in {args.startup_timeout}s; see {log_file.name}")
+
+
+def _children(pid: int) -> list[int]:
+    try:
+        return [int(p) for p in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()]
+    except OSError:
+        return []
+
+
+def _peak_rss_mb(pid: int) -> float | None:
+    """VmHWM of a process, in MB (Linux only)."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+# ── Load ───────────────────────────────────────────────────────────────────────
+
+
+def _session_kwargs(args) -> dict:
+    return {
+        "n_hearings": args.hearings,
+        "n_bills": args.bills,
+        "n_orgs": args.orgs,
+        "n_users": args.users,
+        "seed": args.seed,
+    }
+
+
+def _parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in FEED_KINDS:
+            raise SystemExit(f"Unknown feed kind in --mix: {kind!r}")
+        weights[kind] = float(weight or 1)
+    return weights
+
+
+def build_targets(session, base_url: str) -> dict[str, list[str]]:
+    """Feed paths per kind for every chamber, committee, org, user and WG member."""
+    tokens = session.feed_tokens()
+    return {
+        "chamber": [f"{base_url}/feed/chamber/{c}" for c in sorted(session.by_chamber)],
+        "committee": [f"{base_url}/feed/committee/{c}" for c in sorted(session.by_committee)],
+        "org": [f"{base_url}/feed/org/{t}" for t in tokens["org"]],
+        "user": [f"{base_url}/feed/user/{t}" for t in tokens["user"]],
+        "wg": [f"{base_url}/feed/working-group/{t}" for t in tokens["wg"]],
+    }
+
+
+def client(targets, weights, args, until: float, warm_until: float, etags: dict, results: list, rng):
+    """One simulated client: request random feeds until `until`."""
+    http = requests.Session()
+    headers = {"Accept-Encoding": args.accept_encoding}
+    kinds = list(weights)
+    kind_weights = [weights[k] for k in kinds]
+    while time.monotonic() < until:
+        kind = rng.choices(kinds, kind_weights)[0]
+        url = rng.choice(targets[kind])
+        if rng.random() < args.json_share:
+            url += "/json"
+        request_headers = dict(headers)
+        if args.conditional and url in etags:
+            request_headers["If-None-Match"] = etags[url]
+
+        start = time.perf_counter()
+        status, size = None, 0
+        try:
+            # Read the body as sent (no client-side decompression)
+            resp = http.get(url, headers=request_headers, timeout=args.timeout, stream=True)
+            size = len(resp.raw.read(decode_content=False))
+            status = resp.status_code
+            if "ETag" in resp.headers:
+                etags[url] = resp.headers["ETag"]
+        except requests.RequestException:
+            pass
+        latency_ms = (time.perf_counter() - start) * 1000
+        if time.monotonic() > warm_until:
+            results.append((kind, status, latency_ms, size))
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))], 2)
+
+
+def _latency_stats(latencies: list[float], elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+    }
+
+
+def summarize(results: list[tuple], elapsed: float) -> dict:
+    statuses = {}
+    for _, status, _, _ in results:
+        key = str(status) if status is not None else "error"
+        statuses[key] = statuses.get(key, 0) + 1
+    ok = [r for r in results if r[1] in (200, 304)]
+    return {
+        **_latency_stats([r[2] for r in ok], elapsed),
+        "errors": len(results) - len(ok),
+        "statuses": dict(sorted(statuses.items())),
+        "bytes_received": sum(r[3] for r in results),
+        "by_kind": {
+            kind: _latency_stats([r[2] for r in ok if r[0] == kind], elapsed)
+            for kind in FEED_KINDS
+            if any(r[0] == kind for r in ok)
+        },
+    }
+
+
+def run(args) -> dict:
+    session = make_session(**_session_kwargs(args))
+    if args.db == "postgres" and args.seed_db:
+        import psycopg2
+        from db.config import config
+
+        conn = psycopg2.connect(**config("postgres"))
+        try:
+            seed_postgres(session, conn)
+        finally:
+            conn.close()
+
+    port = args.port or _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    targets = build_targets(session, base_url)
+    weights = {k: w for k, w in _parse_mix(args.mix).items() if w > 0 and targets[k]}
+
+    with tempfile.TemporaryDirectory(prefix="feed-load-") as tmp:
+        log_path = Path(tmp) / "service.log"
+        with open(log_path, "w") as log_file:
+            service = start_service(args, port, str(Path(tmp) / "cache"), log_file)
+            try:
+                rng = random.Random(args.seed)
+                etags, results = {}, []
+                start = time.monotonic()
+                warm_until = start + args.warmup
+                until = warm_until + args.duration
+                greenlets = [
+                    gevent.spawn(
+                        client, targets, weights, args, until, warm_until, etags, results,
+                        random.Random(rng.random()),
+                    )
+                    for _ in range(args.concurrency)
+                ]
+                gevent.joinall(greenlets)
+                elapsed = time.monotonic() - warm_until
+
+                workers = _children(service.pid)
+                worker_rss = [_peak_rss_mb(pid) for pid in workers]
+            finally:
+                service.send_signal(signal.SIGTERM)
+                try:
+                    service.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    service.kill()
+            if any(status is None or status >= 500 for _, status, _, _ in results):
+                print(log_path.read_text()[-4000:], file=sys.stderr)
+
+    return {
+        "config": {
+            "db": args.db,
+            "cache": args.cache,
+            "conditional": args.conditional,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "duration_s": args.duration,
+            "mix": weights,
+            "json_share": args.json_share,
+            "accept_encoding": args.accept_encoding,
+            "latency_ms": args.latency_ms if args.db == "stub" else None,
+            "session": _session_kwargs(args),
+        },
+        **summarize(results, elapsed),
+        "peak_rss_mb": {
+            "workers": worker_rss,
+            "workers_total": round(sum(r for r in worker_rss if r), 1),
+            # ru_maxrss is in KB on Linux
+            "client": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed service load test")
+    parser.add_argument("--db", choices=("stub", "postgres"), default="stub")
+    parser.add_argument("--seed-db", action="store_true",
+                        help="with --db postgres: create and fill the tables first")
+    parser.add_argument("--cache", choices=("on", "off"), default="on")
+    parser.add_argument("--conditional", action="store_true", help="send If-None-Match")
+    parser.add_argument("--concurrency", type=int, default=50, help="simultaneous clients")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="feed kind weights")
+    parser.add_argument("--json-share", type=float, default=0.1, help="share of JSON requests")
+    parser.add_argument("--accept-encoding", default="gzip", help="'identity' for uncompressed")
+    parser.add_argument("--latency-ms", type=float, default=0, help="stub query latency")
+    parser.add_argument("--hearings", type=int, default=3000)
+    parser.add_argument("--bills", type=int, default=6000)
+    parser.add_argument("--orgs", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--random-seed", dest="seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30, help="per request")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
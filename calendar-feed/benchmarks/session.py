@@ -0,0 +1,592 @@
+# calendar-feed/benchmarks/session.py
+"""
+A seeded synthetic legislative session for load tests (benchmarks/load_test.py).
+
+make_session() generates hearings with agendas drawn from a shared pool of
+bills (so a bill is heard more than once, as in a real session), deadlines,
+and orgs and users with dashboards, org positions and feed tokens. The same
+session can then back the feed service in one of two ways:
+
+- install_stub(session): replaces the db/calendar_queries functions the
+  routes and auth.py call with in-memory equivalents returning the same row
+  shapes (grouped mode), optionally sleeping to mimic query latency. They
+  ignore the feed window and always return the whole session
+- seed_postgres(session, conn): creates the snapshot/app/auth tables the
+  feed queries read, in an empty database, and loads the session into them
+
+Raw feed tokens are derived from ids ("bench-org-<id>", "bench-user-<n>"),
+so a database seeded once can be reused by later runs with the same sizes
+and seed.
+"""
+
+import hashlib
+import random
+import time as _time
+from datetime import datetime, time, timedelta, timezone
+
+from benchmarks.synthetic import _COMMITTEES, _FOOTNOTES, _NOTES, _POSITIONS, SESSION_START
+
+_HEARING_COLUMNS = (
+    "hearing_id", "hearing_name", "hearing_date", "hearing_time_verbatim", "hearing_time",
+    "is_allday", "hearing_location", "hearing_room", "notes", "chamber_id", "committee_id",
+    "updated_at", "canceled_at", "committee_webpage",
+)
+
+
+def _token_hash(raw_token: str) -> str:
+    # Same digest as auth.hash_token
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+class Session:
+    """Hearings, bills, dashboards and tokens of one synthetic session."""
+
+    def __init__(self):
+        self.hearings: list[dict] = []  # hearing columns + "deadlines" + "agenda", by hearing_id
+        self.bills: dict[str, dict] = {}  # openstates_bill_id -> bill_number, bill_name, author
+        self.committees: dict[int, str | None] = {}  # committee_id -> webpage_link
+        self.orgs: list[dict] = []  # org_id, nickname, token, dashboard, positions
+        self.users: list[dict] = []  # email, token, ai_working_group, dashboard
+        self.wg_dashboard: frozenset[str] = frozenset()
+        self.latency = 0.0  # seconds slept per stub query
+
+    def index(self):
+        """Build the lookups the stub queries use."""
+        self.by_chamber: dict[int, list[dict]] = {}
+        self.by_committee: dict[int, list[dict]] = {}
+        self.by_bill: dict[str, list[dict]] = {}
+        for h in self.hearings:
+            self.by_chamber.setdefault(h["chamber_id"], []).append(h)
+            self.by_committee.setdefault(h["committee_id"], []).append(h)
+            for bill_id, *_ in h["agenda"]:
+                self.by_bill.setdefault(bill_id, []).append(h)
+        self.orgs_by_hash = {_token_hash(o["token"]): o for o in self.orgs}
+        self.orgs_by_id = {o["org_id"]: o for o in self.orgs}
+        self.users_by_hash = {_token_hash(u["token"]): u for u in self.users}
+        self.users_by_email = {u["email"]: u for u in self.users}
+
+    # ── Feed shapes ───────────────────────────────────────────────────────────
+
+    def feed_tokens(self) -> dict[str, list[str]]:
+        """Raw tokens per feed kind, as load_test builds URLs from them."""
+        return {
+            "org": [o["token"] for o in self.orgs],
+            "user": [u["token"] for u in self.users],
+            "wg": [u["token"] for u in self.users if u["ai_working_group"] == "yes"],
+        }
+
+    def _dashboard_hearings(self, dashboard) -> list[dict]:
+        ids = {h["hearing_id"] for bill_id in dashboard for h in self.by_bill.get(bill_id, ())}
+        return [h for h in self.hearings if h["hearing_id"] in ids]
+
+    def _grouped_rows(self, hearings, dashboard=None, positions=None) -> list[dict]:
+        """Grouped-mode rows (see db/calendar_queries._GROUPED_SELECT), in hearing_id order."""
+        rows = []
+        for h in hearings:
+            row = {k: h[k] for k in _HEARING_COLUMNS}
+            deadlines = h["deadlines"]
+            row["deadline_dates"] = [d for d, _ in deadlines] or None
+            row["deadline_types"] = [t for _, t in deadlines] or None
+            bills = []
+            for bill_id, file_order, footnote, footnote_symbol in h["agenda"]:
+                bill = self.bills[bill_id]
+                obj = {
+                    "openstates_bill_id": bill_id,
+                    "bill_number": bill["bill_number"],
+                    "bill_name": bill["bill_name"],
+                    "bill_author": bill["author"],
+                    "file_order": file_order,
+                    "footnote": footnote,
+                    "footnote_symbol": footnote_symbol,
+                }
+                if dashboard is not None:
+                    obj["on_dashboard"] = bill_id in dashboard
+                if positions is not None:
+                    obj["org_position"] = positions.get(bill_id)
+                bills.append(obj)
+            row["bills"] = bills
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def _validators(hearings, membership) -> dict:
+        return {
+            "updated_at": max((h["updated_at"] for h in hearings), default=None),
+            "canceled_at": max((h["canceled_at"] for h in hearings if h["canceled_at"]), default=None),
+            "hearing_count": len(hearings),
+            "membership": membership,
+            "bills_changed_at": None,
+        }
+
+    @staticmethod
+    def _membership(dashboard) -> str:
+        return hashlib.md5(",".join(sorted(dashboard)).encode()).hexdigest()
+
+    def _query(self):
+        if self.latency:
+            _time.sleep(self.latency)
+
+    # ── Stub query functions (same names and results as db/calendar_queries) ──
+
+    def stub_functions(self) -> dict:
+        s = self
+
+        def org_identity(org):
+            return {"org_id": org["org_id"], "org_name": org["nickname"]}
+
+        def org_validators(org):
+            hearings = s._dashboard_hearings(org["dashboard"])
+            return s._validators(hearings, f"{s._membership(org['dashboard'])}:")
+
+        def org_rows(org):
+            hearings = s._dashboard_hearings(org["dashboard"])
+            return s._grouped_rows(hearings, org["dashboard"], org["positions"])
+
+        def dashboard_validators(dashboard):
+            return s._validators(s._dashboard_hearings(dashboard), s._membership(dashboard))
+
+        def dashboard_rows(dashboard):
+            return s._grouped_rows(s._dashboard_hearings(dashboard), dashboard)
+
+        def user_identity(user):
+            return {"email": user["email"], "is_wg_member": user["ai_working_group"] == "yes"}
+
+        def get_chamber_validators(chamber_id, window=None):
+            s._query()
+            return s._validators(s.by_chamber.get(chamber_id, []), None)
+
+        def get_committee_validators(committee_id, window=None):
+            s._query()
+            return s._validators(s.by_committee.get(committee_id, []), None)
+
+        def get_hearings_for_chamber(chamber_id, grouped=False, window=None):
+            s._query()
+            return s._grouped_rows(s.by_chamber.get(chamber_id, []))
+
+        def get_hearings_for_committee(committee_id, grouped=False, window=None):
+            s._query()
+            return s._grouped_rows(s.by_committee.get(committee_id, []))
+
+        def stream_hearings_for_chamber(chamber_id, itersize=None, grouped=False, window=None):
+            return iter(get_hearings_for_chamber(chamber_id))
+
+        def stream_hearings_for_committee(committee_id, itersize=None, grouped=False, window=None):
+            return iter(get_hearings_for_committee(committee_id))
+
+        def get_org_validators(org_id, window=None):
+            s._query()
+            return org_validators(s.orgs_by_id[org_id])
+
+        def get_user_validators(user_email, window=None):
+            s._query()
+            return dashboard_validators(s.users_by_email[user_email]["dashboard"])
+
+        def get_wg_validators(window=None):
+            s._query()
+            return dashboard_validators(s.wg_dashboard)
+
+        def get_hearings_for_org(org_id, grouped=False, window=None):
+            s._query()
+            return org_rows(s.orgs_by_id[org_id])
+
+        def get_hearings_for_user(user_email, grouped=False, window=None):
+            s._query()
+            return dashboard_rows(s.users_by_email[user_email]["dashboard"])
+
+        def get_hearings_for_wg(grouped=False, window=None):
+            s._query()
+            return dashboard_rows(s.wg_dashboard)
+
+        def get_org_feed_by_token(token_hash, grouped=False, window=None):
+            s._query()
+            org = s.orgs_by_hash.get(token_hash)
+            if org is None:
+                return None, None, []
+            return org_identity(org), org_validators(org), org_rows(org)
+
+        def get_user_feed_by_token(token_hash, grouped=False, window=None):
+            s._query()
+            user = s.users_by_hash.get(token_hash)
+            if user is None:
+                return None, None, []
+            dashboard = user["dashboard"]
+            return user_identity(user), dashboard_validators(dashboard), dashboard_rows(dashboard)
+
+        def get_wg_feed_by_token(token_hash, grouped=False, window=None):
+            s._query()
+            user = s.users_by_hash.get(token_hash)
+            if user is None:
+                return None, None, []
+            identity = user_identity(user)
+            if not identity["is_wg_member"]:
+                return identity, dict.fromkeys(
+                    ("updated_at", "canceled_at", "hearing_count", "membership", "bills_changed_at")
+                ), []
+            return identity, dashboard_validators(s.wg_dashboard), dashboard_rows(s.wg_dashboard)
+
+        def get_hearings_for_dashboards(org_ids, user_emails, include_wg=False, window=None):
+            s._query()
+            validators, dashboards, positions, org_names = {}, {}, {}, {}
+            for org_id in org_ids:
+                org = s.orgs_by_id.get(org_id)
+                if org is None:
+                    continue
+                key = f"org:{org_id}"
+                validators[key] = org_validators(org)
+                dashboards[key] = set(org["dashboard"])
+                positions[key] = dict(org["positions"])
+                org_names[key] = org["nickname"]
+            for email in user_emails:
+                user = s.users_by_email.get(email)
+                dashboard = user["dashboard"] if user else frozenset()
+                validators[f"user:{email}"] = dashboard_validators(dashboard)
+                dashboards[f"user:{email}"] = set(dashboard)
+            if include_wg:
+                validators["wg"] = dashboard_validators(s.wg_dashboard)
+                dashboards["wg"] = set(s.wg_dashboard)
+            tracked = set().union(*dashboards.values())
+            agenda = {
+                bill_id: [h["hearing_id"] for h in s.by_bill[bill_id]]
+                for bill_id in tracked
+                if bill_id in s.by_bill
+            }
+            return {
+                "rows": s._grouped_rows(s._dashboard_hearings(tracked)),
+                "agenda": agenda,
+                "dashboards": dashboards,
+                "positions": positions,
+                "validators": validators,
+                "org_names": org_names,
+            }
+
+        return {name: fn for name, fn in locals().items() if name.startswith(("get_", "stream_"))}
+
+
+def make_session(
+    n_hearings: int = 3000,
+    n_bills: int = 6000,
+    n_orgs: int = 200,
+    n_users: int = 500,
+    bills_per_hearing: int = 10,
+    dashboard_size: int = 40,
+    seed: int = 1,
+) -> Session:
+    """
+    Generate a session: n_hearings hearings of 1..2*bills_per_hearing bills
+    from a pool of n_bills, one or two deadlines per hearing, n_orgs orgs and
+    n_users users with dashboard_size bills each (about a fifth of users are
+    working group members), and a working group dashboard.
+    """
+    rng = random.Random(seed)
+    session = Session()
+    updated_at = datetime(2026, 4, 1, 12, 0, tzinfo=timezone.utc)
+
+    for committee_id in range(1, 60):
+        session.committees[committee_id] = rng.choice(
+            [None, f"https://example.legislature.ca.gov/c/{committee_id}"]
+        )
+
+    bill_ids = [f"ocd-bill/{i:08x}" for i in range(1, n_bills + 1)]
+    for i, bill_id in enumerate(bill_ids, 1):
+        session.bills[bill_id] = {
+            "bill_number": f"{rng.choice(['AB', 'SB'])} {i}",
+            "bill_name": f"Bill {i}: consumer protection, data privacy; and automated decisions",
+            "author": rng.choice(["Smith", "Nguyễn", None, "O'Brien"]),
+        }
+
+    for hearing_id in range(1, n_hearings + 1):
+        hearing_date = SESSION_START + timedelta(days=rng.randrange(0, 150))
+        is_allday = rng.random() < 0.05
+        hour = rng.choice([9, 10, 13, 14])
+        committee_id = rng.randrange(1, 60)
+        deadlines = [(hearing_date - timedelta(days=rng.randrange(5, 14)), "letter")]
+        if rng.random() < 0.2:
+            deadlines.append((hearing_date - timedelta(days=2), "amendment"))
+        agenda = []
+        for file_order, bill_id in enumerate(
+            rng.sample(bill_ids, min(n_bills, rng.randrange(1, 2 * bills_per_hearing))), 1
+        ):
+            footnote_symbol, footnote = (
+                rng.choice(_FOOTNOTES) if rng.random() < 0.1 else (None, None)
+            )
+            agenda.append((bill_id, file_order, footnote, footnote_symbol))
+        session.hearings.append({
+            "hearing_id": hearing_id,
+            "hearing_name": f"{rng.choice(_COMMITTEES)} {hearing_id}",
+            "hearing_date": hearing_date,
+            "hearing_time_verbatim": "Upon call of the Chair" if is_allday else f"{hour % 12 or 12} {'a.m.' if hour < 12 else 'p.m.'}",
+            "hearing_time": None if is_allday else time(hour, 0),
+            "is_allday": is_allday,
+            "hearing_location": "1021 O Street",
+            "hearing_room": f"Room {rng.randrange(1100, 2200)}",
+            "notes": rng.choice(_NOTES),
+            "chamber_id": rng.choice([1, 2, 3, 4, 5]),
+            "committee_id": committee_id,
+            "updated_at": updated_at + timedelta(minutes=rng.randrange(0, 100000)),
+            "canceled_at": updated_at if rng.random() < 0.03 else None,
+            "committee_webpage": session.committees[committee_id],
+            "deadlines": sorted(deadlines),
+            "agenda": agenda,
+        })
+
+    def dashboard():
+        return frozenset(rng.sample(bill_ids, min(n_bills, dashboard_size)))
+
+    for org_id in range(1, n_orgs + 1):
+        bills = dashboard()
+        session.orgs.append({
+            "org_id": org_id,
+            "nickname": f"Bench Org {org_id}",
+            "token": f"bench-org-{org_id}",
+            "dashboard": bills,
+            "positions": {b: rng.choice(_POSITIONS) for b in bills},
+        })
+    for n in range(1, n_users + 1):
+        session.users.append({
+            "email": f"user{n}@bench.example",
+            "token": f"bench-user-{n}",
+            "ai_working_group": "yes" if rng.random() < 0.2 else None,
+            "dashboard": dashboard(),
+        })
+    session.wg_dashboard = frozenset(rng.sample(bill_ids, min(n_bills, dashboard_size * 2)))
+    session.index()
+    return session
+
+
+# ── Backends ───────────────────────────────────────────────────────────────────
+
+# Modules that import query functions by name (from db.calendar_queries import ...)
+_STUBBED_MODULES = (
+    "db.calendar_queries",
+    "materialize",
+    "auth",
+    "routes.chamber",
+    "routes.committee",
+    "routes.org",
+    "routes.user",
+    "routes.working_group",
+)
+
+
+def install_stub(session: Session, latency_ms: float = 0.0):
+    """Serve every feed query from `session` instead of PostgreSQL."""
+    import importlib
+
+    session.latency = latency_ms / 1000
+    functions = session.stub_functions()
+    for module_name in _STUBBED_MODULES:
+        module = importlib.import_module(module_name)
+        for name, fn in functions.items():
+            if hasattr(module, name):
+                setattr(module, name, fn)
+
+
+_SCHEMA = """
+    CREATE SCHEMA IF NOT EXISTS snapshot;
+    CREATE SCHEMA IF NOT EXISTS app;
+    CREATE SCHEMA IF NOT EXISTS auth;
+
+    CREATE TABLE snapshot.committee (
+        committee_id integer PRIMARY KEY,
+        webpage_link text
+    );
+    CREATE TABLE snapshot.hearings (
+        hearing_id      integer PRIMARY KEY,
+        name            text,
+        date            date,
+        time_verbatim   text,
+        time_normalized time,
+        is_allday       boolean,
+        location        text,
+        room            text,
+        notes           text,
+        chamber_id      integer,
+        committee_id    integer,
+        updated_at      timestamptz,
+        canceled_at     timestamptz
+    );
+    CREATE TABLE snapshot.hearing_deadlines (
+        hearing_id    integer,
+        deadline_date date,
+        deadline_type text
+    );
+    CREATE TABLE snapshot.hearing_bills (
+        hearing_id         integer,
+        openstates_bill_id text,
+        file_order         integer,
+        footnote           text,
+        footnote_symbol    text
+    );
+    CREATE TABLE app.bills_mv (
+        openstates_bill_id text PRIMARY KEY,
+        bill_number        text,
+        bill_name          text,
+        author             text
+    );
+    CREATE TABLE app.feed_source_versions (
+        source     text PRIMARY KEY,
+        digest     text NOT NULL,
+        changed_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE app.org_bill_dashboard (org_id integer, openstates_bill_id text);
+    CREATE TABLE app.user_bill_dashboard (user_email text, openstates_bill_id text);
+    CREATE TABLE app.working_group_dashboard (openstates_bill_id text);
+    CREATE TABLE app.bill_custom_details (
+        openstates_bill_id  text,
+        last_updated_org_id integer,
+        org_position        text,
+        last_updated_at     timestamptz
+    );
+    CREATE TABLE auth.approved_organizations (
+        id              integer PRIMARY KEY,
+        name            text,
+        nickname        text,
+        feed_token      text,
+        feed_token_hash text
+    );
+    CREATE TABLE auth.approved_users (
+        email            text PRIMARY KEY,
+        ai_working_group text,
+        feed_token       text,
+        feed_token_hash  text
+    );
+
+    CREATE INDEX ON snapshot.hearings (chamber_id);
+    CREATE INDEX ON snapshot.hearings (committee_id);
+    CREATE INDEX ON snapshot.hearing_deadlines (hearing_id);
+    CREATE INDEX ON snapshot.hearing_bills (hearing_id);
+    CREATE INDEX ON snapshot.hearing_bills (openstates_bill_id);
+    CREATE INDEX ON app.org_bill_dashboard (org_id);
+    CREATE INDEX ON app.user_bill_dashboard (user_email);
+    CREATE INDEX ON app.bill_custom_details (last_updated_org_id);
+    CREATE INDEX ON app.bill_custom_details (openstates_bill_id, last_updated_org_id);
+    CREATE UNIQUE INDEX ON auth.approved_organizations (feed_token_hash);
+    CREATE UNIQUE INDEX ON auth.approved_users (feed_token_hash);
+
+    -- db/migrations/010_feed_query_indexes.sql, under the same names
+    CREATE INDEX idx_hearings_chamber_date
+        ON snapshot.hearings (chamber_id, date) INCLUDE (updated_at, canceled_at);
+    CREATE INDEX idx_hearings_committee_date
+        ON snapshot.hearings (committee_id, date) INCLUDE (updated_at, canceled_at);
+    CREATE INDEX idx_hearings_date_cover
+        ON snapshot.hearings (date) INCLUDE (chamber_id, committee_id, updated_at, canceled_at);
+    CREATE INDEX idx_hearing_bills_bill_hearing
+        ON snapshot.hearing_bills (openstates_bill_id, hearing_id);
+    CREATE INDEX idx_hearing_bills_hearing_order
+        ON snapshot.hearing_bills (hearing_id, file_order)
+        INCLUDE (openstates_bill_id, footnote, footnote_symbol);
+    CREATE INDEX idx_hearing_deadlines_hearing_date
+        ON snapshot.hearing_deadlines (hearing_id, deadline_date, deadline_type);
+    CREATE INDEX idx_org_bill_dashboard_org_bill
+        ON app.org_bill_dashboard (org_id, openstates_bill_id);
+    CREATE INDEX idx_user_bill_dashboard_user_bill
+        ON app.user_bill_dashboard (user_email, openstates_bill_id);
+    CREATE INDEX idx_working_group_dashboard_bill
+        ON app.working_group_dashboard (openstates_bill_id);
+    CREATE INDEX idx_bill_custom_details_org_updated
+        ON app.bill_custom_details (last_updated_org_id, last_updated_at);
+"""
+
+
+def seed_postgres(session: Session, conn):
+    """
+    Create the feed tables and load `session` into them. Meant for an empty,
+    throwaway database: CREATE TABLE fails if any table already exists, so
+    existing data is never touched.
+    """
+    from psycopg2.extras import execute_values
+
+    h = session.hearings
+    with conn.cursor() as cur:
+        cur.execute(_SCHEMA)
+        execute_values(cur, "INSERT INTO snapshot.committee VALUES %s", list(session.committees.items()))
+        execute_values(
+            cur,
+            "INSERT INTO snapshot.hearings VALUES %s",
+            [
+                (
+                    r["hearing_id"], r["hearing_name"], r["hearing_date"], r["hearing_time_verbatim"],
+                    r["hearing_time"], r["is_allday"], r["hearing_location"], r["hearing_room"],
+                    r["notes"], r["chamber_id"], r["committee_id"], r["updated_at"], r["canceled_at"],
+                )
+                for r in h
+            ],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO snapshot.hearing_deadlines VALUES %s",
+            [(r["hearing_id"], d, t) for r in h for d, t in r["deadlines"]],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO snapshot.hearing_bills VALUES %s",
+            [(r["hearing_id"], *item) for r in h for item in r["agenda"]],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO app.bills_mv VALUES %s",
+            [(bill_id, b["bill_number"], b["bill_name"], b["author"]) for bill_id, b in session.bills.items()],
+        )
+        cur.execute(
+            "INSERT INTO app.feed_source_versions VALUES ('bills_mv', 'seed', %s)",
+            (datetime(2026, 4, 1, tzinfo=timezone.utc),),
+        )
+        execute_values(
+            cur,
+            "INSERT INTO app.org_bill_dashboard VALUES %s",
+            [(o["org_id"], b) for o in session.orgs for b in sorted(o["dashboard"])],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO app.bill_custom_details VALUES %s",
+            [
+                (b, o["org_id"], position, datetime(2026, 4, 1, tzinfo=timezone.utc))
+                for o in session.orgs
+                for b, position in sorted(o["positions"].items())
+                if position is not None
+            ],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO app.user_bill_dashboard VALUES %s",
+            [(u["email"], b) for u in session.users for b in sorted(u["dashboard"])],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO app.working_group_dashboard VALUES %s",
+            [(b,) for b in sorted(session.wg_dashboard)],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO auth.approved_organizations VALUES %s",
+            [
+                (o["org_id"], o["nickname"], o["nickname"], None, _token_hash(o["token"]))
+                for o in session.orgs
+            ],
+        )
+        execute_values(
+            cur,
+            "INSERT INTO auth.approved_users VALUES %s",
+            [
+                (u["email"], u["ai_working_group"], None, _token_hash(u["token"]))
+                for u in session.users
+            ],
+        )
+        cur.execute("ANALYZE")
+    conn.commit()
+
+
+def create_stub_app():
+    """
+    gunicorn app factory for stub-DB load tests ("benchmarks.session:create_stub_app()").
+    The session comes from make_session(**BENCH_SESSION) (a JSON object of
+    keyword arguments); BENCH_LATENCY_MS is slept per query.
+    """
+    import json
+    import os
+
+    from app import create_app
+
+    session = make_session(**json.loads(os.getenv("BENCH_SESSION", "{}")))
+    install_stub(session, float(os.getenv("BENCH_LATENCY_MS", "0")))
+    return create_app()
@@ -0,0 +1,133 @@
+# calendar-feed/benchmarks/synthetic.py
+"""
+Seeded synthetic feed rows shaped like the db/calendar_queries results.
+
+Rows mimic a legislative session: several bills per hearing, a letter
+deadline per hearing, occasional footnotes, all-day and canceled hearings,
+and free text with the characters that exercise iCalendar escaping and
+folding (commas, semicolons, backslashes, non-ASCII).
+"""
+
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+SESSION_START = date(2026, 4, 1)
+
+_COMMITTEES = [
+    "Judiciary",
+    "Appropriations",
+    "Privacy and Consumer Protection",
+    "Labor, Public Employment and Retirement",
+    "Housing; Community Development",
+    "Banking & Finance",
+    "Educación y Cultura",
+]
+_NOTES = [
+    None,
+    "Hearing will be held in the Swing Space.",
+    "Bills heard in file order; testimony limited to 2 min, per witness",
+    "Room change: see C:\\Capitol\\Annex — updated agenda to follow",
+    "Joint informational hearing;\nno action will be taken.",
+]
+_FOOTNOTES = [
+    ("*", "Hearing postponed by committee."),
+    ("**", "Do pass as amended, and re-refer."),
+    ("†", "Testimony by invitation only; see agenda"),
+]
+_POSITIONS = ["Support", "Oppose", "Neutral/No Position", None, "Support if Amended"]
+
+
+def make_rows(
+    n_hearings: int = 100,
+    bills_per_hearing: int = 10,
+    dashboard: bool = False,
+    org: bool = False,
+    seed: int = 1,
+) -> list[dict]:
+    """
+    Return feed rows for n_hearings hearings of 1..2*bills_per_hearing bills.
+
+    dashboard=True adds on_dashboard (roughly a third of bills tracked), as
+    get_hearings_for_user/wg return; org=True also adds org_position, as
+    get_hearings_for_org returns.
+    """
+    rng = random.Random(seed)
+    updated_at = datetime(2026, 4, 1, 12, 0, tzinfo=timezone.utc)
+    rows = []
+    bill_seq = 0
+    for hearing_id in range(1, n_hearings + 1):
+        hearing_date = SESSION_START + timedelta(days=rng.randrange(0, 150))
+        is_allday = rng.random() < 0.05
+        hour = rng.choice([9, 10, 13, 14])
+        chamber_id = rng.choice([1, 2, 3, 4, 5, None])
+        committee = rng.choice(_COMMITTEES)
+        hearing = {
+            "hearing_id": hearing_id,
+            "hearing_name": f"{committee} {hearing_id}",
+            "hearing_date": hearing_date,
+            "hearing_time_verbatim": "Upon call of the Chair" if is_allday else f"{hour % 12 or 12} {'a.m.' if hour < 12 else 'p.m.'}",
+            "hearing_time": None if is_allday else time(hour, 0),
+            "is_allday": is_allday,
+            "hearing_location": "1021 O Street",
+            "hearing_room": f"Room {rng.randrange(1100, 2200)}",
+            "notes": rng.choice(_NOTES),
+            "chamber_id": chamber_id,
+            "committee_id": rng.randrange(1, 60),
+            "updated_at": updated_at + timedelta(minutes=rng.randrange(0, 100000)),
+            "canceled_at": updated_at if rng.random() < 0.03 else None,
+            "committee_webpage": rng.choice([None, f"https://example.legislature.ca.gov/c/{hearing_id}"]),
+            "deadline_date": hearing_date - timedelta(days=rng.randrange(5, 14)),
+            "deadline_type": "letter",
+        }
+        n_bills = rng.randrange(1, 2 * bills_per_hearing)
+        for file_order in range(1, n_bills + 1):
+            bill_seq += 1
+            footnote_symbol, footnote = (
+                rng.choice(_FOOTNOTES) if rng.random() < 0.1 else (None, None)
+            )
+            row = {
+                **hearing,
+                "openstates_bill_id": f"ocd-bill/{bill_seq:08x}",
+                "bill_number": f"{rng.choice(['AB', 'SB'])} {rng.randrange(1, 2500)}",
+                "bill_name": f"Bill {bill_seq}: consumer protection, data privacy; and automated decisions",
+                "bill_author": rng.choice(["Smith", "Nguyễn", None, "O'Brien"]),
+                "file_order": file_order,
+                "footnote": footnote,
+                "footnote_symbol": footnote_symbol,
+            }
+            if dashboard or org:
+                row["on_dashboard"] = rng.random() < 0.35
+            if org:
+                row["org_position"] = rng.choice(_POSITIONS)
+            rows.append(row)
+
+    rows.sort(key=lambda r: (r["hearing_date"], r["hearing_time"] is None, r["hearing_time"] or time()))
+    return rows
+
+
+_BILL_COLUMNS = (
+    "openstates_bill_id", "bill_number", "bill_name", "bill_author", "file_order",
+    "footnote", "footnote_symbol", "on_dashboard", "org_position",
+)
+
+
+def to_grouped(rows: list[dict]) -> list[dict]:
+    """
+    The same feed as grouped-mode query rows (grouped=True in
+    db/calendar_queries): one row per hearing in hearing_id order, with a
+    `bills` list in file_order and parallel deadline arrays.
+    """
+    hearings = {}
+    for row in sorted(rows, key=lambda r: (r["hearing_id"], r["file_order"])):
+        hearing = hearings.get(row["hearing_id"])
+        if hearing is None:
+            hearing = {
+                k: v for k, v in row.items()
+                if k not in _BILL_COLUMNS and k not in ("deadline_date", "deadline_type")
+            }
+            hearing["deadline_dates"] = [row["deadline_date"]]
+            hearing["deadline_types"] = [row["deadline_type"]]
+            hearing["bills"] = []
+            hearings[row["hearing_id"]] = hearing
+        hearing["bills"].append({k: row[k] for k in _BILL_COLUMNS if k in row})
+    return list(hearings.values())
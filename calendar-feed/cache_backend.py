@@ -0,0 +1,354 @@
+# calendar-feed/cache_backend.py
+"""
+Two-tier cache backend for flask-caching (CACHE_TYPE="cache_backend.TieredCache").
+
+- local:  a bounded in-process LRU per worker (entry count and bytes), with a
+          short TTL so values changed through another worker are picked up
+- shared: one store for every worker and container, so a deploy or a second
+          instance doesn't start cold:
+            redis       CACHE_REDIS_URL (the production setting)
+            filesystem  CACHE_DIR on local disk (shared by workers on one host)
+            memory      in-process stand-in with the same semantics, for tests
+            none        local tier only
+
+Values of CACHE_COMPRESS_MIN_BYTES or more (the .ics payloads) are
+zlib-compressed in the shared tier and kept uncompressed in the local one.
+delete_pattern() removes keys by glob pattern from the local tier and, with
+redis, the shared one (delete_patterns() several at once, in one pass); the
+other shared backends can't list their keys and keep them until they expire.
+stats() returns hit/miss/eviction counters for the worker.
+
+Shared-tier errors are logged and treated as misses, so a Redis outage
+degrades to per-worker caching instead of failing requests.
+"""
+
+import fnmatch
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.filesystemcache import FileSystemCache
+from flask_caching.backends.simplecache import SimpleCache
+
+logger = logging.getLogger(__name__)
+
+_NOT_SIZED = 256  # nominal size of non-bytes values in the local tier budget
+
+
+def _matches(key: str, patterns: list[str]) -> bool:
+    return any(fnmatch.fnmatchcase(key, pattern) for pattern in patterns)
+
+
+def _literal_prefix(patterns: list[str]) -> str:
+    """The longest prefix every key matching any of the glob patterns shares."""
+    literal = [re.split(r"[*?\[]", pattern, maxsplit=1)[0] for pattern in patterns]
+    return os.path.commonprefix(literal)
+
+
+class Compressed(bytes):
+    """Marker for zlib-compressed values in the shared tier."""
+
+
+class LocalLRU:
+    """
+    Bounded LRU of key -> (expires, value), by entry count and (unless
+    max_bytes is None) total bytes.
+    """
+
+    def __init__(self, max_items: int, max_bytes: int | None, ttl: float):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(value) -> int:
+        if isinstance(value, (bytes, str)):
+            return len(value)
+        if isinstance(value, tuple):  # e.g. (raw size, encoded body) feed variants
+            return sum(len(v) if isinstance(v, (bytes, str)) else _NOT_SIZED for v in value)
+        return _NOT_SIZED
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry[0] <= time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key: str, value, timeout: float | None):
+        size = self._size(value)
+        max_bytes = self.max_bytes if self.max_bytes is not None else float("inf")
+        if self.max_items <= 0 or size > max_bytes:
+            self.delete(key)
+            return
+        ttl = self.ttl if not timeout else min(self.ttl, timeout)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_items or self._bytes > max_bytes:
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def _pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._pop(key)
+
+    def delete_pattern(self, pattern: str) -> int:
+        return self.delete_patterns([pattern])
+
+    def delete_patterns(self, patterns: list[str]) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if _matches(k, patterns)]
+            for key in keys:
+                self._pop(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"items": len(self._entries), "bytes": self._bytes}
+
+
+class TieredCache(BaseCache):
+    """Local LRU in front of an optional shared cache (see module docstring)."""
+
+    def __init__(
+        self,
+        shared: BaseCache | None = None,
+        shared_name: str = "none",
+        local_max_items: int = 512,
+        local_max_bytes: int = 64 * 1024 * 1024,
+        local_ttl: float = 60,
+        compress_min_bytes: int = 1024,
+        default_timeout: int = 300,
+        redis_client=None,
+        redis_prefix: str = "",
+    ):
+        super().__init__(default_timeout=default_timeout)
+        self.shared = shared
+        self.shared_name = shared_name
+        self.redis_client = redis_client  # the shared RedisCache's client, for SCAN
+        self.redis_prefix = redis_prefix
+        self.local = LocalLRU(local_max_items, local_max_bytes, local_ttl)
+        self.compress_min_bytes = compress_min_bytes
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "deletes": 0,
+            "pattern_deletes": 0,
+            "shared_errors": 0,
+            "bytes_raw": 0,  # size of compressible values written
+            "bytes_stored": 0,  # ...and what they took in the shared tier
+        }
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        backend = config.get("CACHE_SHARED_BACKEND", "filesystem")
+        timeout = kwargs.get("default_timeout", 300)
+        redis_client, redis_prefix = None, ""
+        if backend == "redis":
+            from flask_caching.backends.rediscache import RedisCache
+            from redis import Redis, from_url
+
+            if config.get("CACHE_REDIS_URL"):
+                redis_client = from_url(
+                    config["CACHE_REDIS_URL"], **(config.get("CACHE_OPTIONS") or {})
+                )
+            else:
+                redis_client = Redis(
+                    host=config.get("CACHE_REDIS_HOST", "localhost"),
+                    port=config.get("CACHE_REDIS_PORT", 6379),
+                    db=config.get("CACHE_REDIS_DB", 0),
+                    password=config.get("CACHE_REDIS_PASSWORD"),
+                )
+            redis_prefix = config.get("CACHE_KEY_PREFIX") or ""
+            shared = RedisCache(
+                host=redis_client, key_prefix=redis_prefix, default_timeout=timeout
+            )
+        elif backend == "filesystem":
+            shared = FileSystemCache(
+                config["CACHE_DIR"],
+                threshold=config.get("CACHE_THRESHOLD", 500),
+                default_timeout=timeout,
+            )
+        elif backend == "memory":
+            shared = SimpleCache(threshold=config.get("CACHE_THRESHOLD", 500), default_timeout=timeout)
+        elif backend == "none":
+            shared = None
+        else:
+            raise ValueError(f"Unknown CACHE_SHARED_BACKEND: {backend}")
+        return cls(
+            shared=shared,
+            shared_name=backend,
+            local_max_items=config.get("CACHE_LOCAL_MAX_ITEMS", 512),
+            local_max_bytes=config.get("CACHE_LOCAL_MAX_BYTES", 64 * 1024 * 1024),
+            local_ttl=config.get("CACHE_LOCAL_TTL", 60),
+            compress_min_bytes=config.get("CACHE_COMPRESS_MIN_BYTES", 1024),
+            default_timeout=timeout,
+            redis_client=redis_client,
+            redis_prefix=redis_prefix,
+        )
+
+    def _count(self, name: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def _shared_call(self, op: str, *args, default=None):
+        if self.shared is None:
+            return default
+        try:
+            return getattr(self.shared, op)(*args)
+        except Exception as e:
+            self._count("shared_errors")
+            logger.warning(f"Shared cache {op} failed ({self.shared_name}): {e}")
+            return default
+
+    # ── Value encoding ────────────────────────────────────────────────────────
+
+    def _encode(self, value):
+        if not isinstance(value, bytes) or len(value) < self.compress_min_bytes:
+            return value
+        packed = zlib.compress(value, 6)
+        self._count("bytes_raw", len(value))
+        if len(packed) >= len(value):  # already compressed (e.g. gzip variants)
+            self._count("bytes_stored", len(value))
+            return value
+        self._count("bytes_stored", len(packed))
+        return Compressed(packed)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, Compressed):
+            return zlib.decompress(value)
+        return value
+
+    # ── BaseCache API ─────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Any:
+        found, value = self.local.get(key)
+        if found:
+            self._count("local_hits")
+            return value
+        value = self._shared_call("get", key)
+        if value is None:
+            self._count("misses")
+            return None
+        self._count("shared_hits")
+        value = self._decode(value)
+        self.local.put(key, value, None)
+        return value
+
+    def set(self, key: str, value: Any, timeout: int | None = None) -> bool:
+        timeout = self._normalize_timeout(timeout)
+        self._count("sets")
+        self.local.put(key, value, timeout)
+        if self.shared is None:
+            return True
+        return bool(self._shared_call("set", key, self._encode(value), timeout, default=False))
+
+    def add(self, key: str, value: Any, timeout: int | None = None) -> bool:
+        if self.shared is None:
+            if self.local.get(key)[0]:
+                return False
+            return self.set(key, value, timeout)
+        timeout = self._normalize_timeout(timeout)
+        added = self._shared_call("add", key, self._encode(value), timeout, default=False)
+        if added:
+            self.local.put(key, value, timeout)
+        return bool(added)
+
+    def has(self, key: str) -> bool:
+        return self.local.get(key)[0] or bool(self._shared_call("has", key, default=False))
+
+    def delete(self, key: str) -> bool:
+        self._count("deletes")
+        self.local.delete(key)
+        return bool(self._shared_call("delete", key, default=self.shared is None))
+
+    def delete_pattern(self, pattern: str) -> int:
+        """
+        Delete keys matching a glob pattern (e.g. "feed:org:7[@:]*") from the
+        local tier and a redis shared tier; returns the number of shared keys
+        deleted (local ones without redis). Other workers' local tiers drop
+        them within CACHE_LOCAL_TTL. The filesystem and memory backends can't
+        list their keys, so their entries stay until they expire: feed payload
+        keys carry their ETag, and new validators move a feed to new keys.
+        """
+        return self.delete_patterns([pattern])
+
+    def delete_patterns(self, patterns: list[str]) -> int:
+        """delete_pattern for several patterns, with one pass (one SCAN) per tier."""
+        patterns = list(patterns)
+        if not patterns:
+            return 0
+        deleted = self.local.delete_patterns(patterns)
+        if self.redis_client is not None:
+            prefix = self.redis_prefix
+            try:
+                keys = [
+                    k
+                    for k in self.redis_client.scan_iter(
+                        match=f"{prefix}{_literal_prefix(patterns)}*"
+                    )
+                    if _matches(
+                        (k.decode() if isinstance(k, bytes) else k)[len(prefix):], patterns
+                    )
+                ]
+                if keys:
+                    self.redis_client.delete(*keys)
+                deleted = len(keys)
+            except Exception as e:
+                self._count("shared_errors")
+                logger.warning(f"Shared cache pattern delete failed (redis): {e}")
+        self._count("pattern_deletes")
+        return deleted
+
+    def clear(self) -> bool:
+        self.local.clear()
+        return bool(self._shared_call("clear", default=True))
+
+    def stats(self) -> dict:
+        """Per-worker counters plus current local tier size."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_ratio"] = (
+            round((stats["local_hits"] + stats["shared_hits"]) / lookups, 3) if lookups else None
+        )
+        stats["local_evictions"] = self.local.evictions
+        stats["local"] = self.local.snapshot()
+        stats["shared_backend"] = self.shared_name
+        return stats
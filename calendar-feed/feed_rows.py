@@ -0,0 +1,104 @@
+# calendar-feed/feed_rows.py
+"""
+Compact row types the feed builders work on.
+
+Feed queries return dicts: one per hearing (grouped mode) or one per
+hearing × bill (flat mode). hearing_builder.group_hearings turns them into
+FeedRow objects, one per hearing × deadline × bill, before any event is
+built:
+
+- HearingRow holds the hearing-level columns once per hearing, shared by
+  every FeedRow of that hearing instead of copied into each bill row
+- FeedRow holds the deadline and bill columns in __slots__, plus `hearing`
+
+A 10k-row feed is then 10k small slot objects rather than 10k 25-key dicts,
+and the builders read fields as attributes instead of calling dict.get.
+Columns a query doesn't select (on_dashboard, org_position on chamber and
+committee feeds) are None. benchmarks/bench_rows.py compares both paths.
+"""
+
+from typing import Any
+
+HEARING_COLUMNS = (
+    "hearing_id",
+    "hearing_name",
+    "hearing_date",
+    "hearing_time_verbatim",
+    "hearing_time",
+    "is_allday",
+    "hearing_location",
+    "hearing_room",
+    "notes",
+    "chamber_id",
+    "committee_id",
+    "updated_at",
+    "canceled_at",
+    "committee_webpage",
+)
+
+BILL_COLUMNS = (
+    "openstates_bill_id",
+    "bill_number",
+    "bill_name",
+    "bill_author",
+    "file_order",
+    "footnote",
+    "footnote_symbol",
+    "on_dashboard",
+    "org_position",
+)
+
+
+class HearingRow:
+    """Hearing-level columns of one hearing."""
+
+    __slots__ = HEARING_COLUMNS
+
+    def __init__(self, row: dict[str, Any]):
+        get = row.get
+        for column in HEARING_COLUMNS:
+            setattr(self, column, get(column))
+
+
+class FeedRow:
+    """One hearing × deadline × bill row; bill columns are None for a hearing without bills."""
+
+    __slots__ = ("hearing", "deadline_date", "deadline_type") + BILL_COLUMNS
+
+    def __init__(self, hearing: HearingRow, deadline_date, deadline_type, bill: dict[str, Any]):
+        get = bill.get
+        self.hearing = hearing
+        self.deadline_date = deadline_date
+        self.deadline_type = deadline_type
+        self.openstates_bill_id = get("openstates_bill_id")
+        self.bill_number = get("bill_number")
+        self.bill_name = get("bill_name")
+        self.bill_author = get("bill_author")
+        self.file_order = get("file_order")
+        self.footnote = get("footnote")
+        self.footnote_symbol = get("footnote_symbol")
+        self.on_dashboard = get("on_dashboard")
+        self.org_position = get("org_position")
+
+
+def rows_from_grouped(hearing: dict[str, Any]) -> list[FeedRow]:
+    """Rows of one grouped-mode hearing: deadlines × bills, bills in file_order."""
+    h = HearingRow(hearing)
+    deadlines = list(
+        zip(hearing["deadline_dates"] or (), hearing["deadline_types"] or ())
+    ) or [(None, None)]
+    bills = hearing["bills"] or [{}]
+    return [
+        FeedRow(h, deadline_date, deadline_type, bill)
+        for deadline_date, deadline_type in deadlines
+        for bill in bills
+    ]
+
+
+def rows_from_flat(group: list[dict[str, Any]]) -> list[FeedRow]:
+    """Rows of one hearing from flat-mode dicts, in the same order."""
+    h = HearingRow(group[0])
+    return [
+        FeedRow(h, row.get("deadline_date"), row.get("deadline_type"), row)
+        for row in group
+    ]
@@ -7,3 +7,23 @@ timeout = 30
 accesslog = "-"
 errorlog = "-"
 loglevel = "info"
+
+
+def post_fork(server, worker):
+    # psycopg2 blocks the whole gevent hub unless it is given a wait callback
+    if "gevent" in server.cfg.worker_class_str:
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+    # Never reuse pooled connections opened in the master (preload_app)
+    from db.connect import reset_pool
+
+    reset_pool()
+
+
+def post_worker_init(worker):
+    # After gevent has patched the worker, so the listener runs as a greenlet
+    from invalidation import start_listener
+
+    start_listener()
@@ -1,18 +1,28 @@
 # calendar-feed/hearing_builder.py
 """
-Builds iCalendar hearing events from grouped query rows.
+Builds iCalendar hearing events from grouped query rows (FeedRow lists,
+see feed_rows.py).
 """
 
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from itertools import groupby
-from typing import Any, List, Tuple, Dict
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 import logging
+import os
+import threading
 
 import pytz
-from icalendar import Event, vText
+from icalendar import Event
+
+from db.hotlog import SampledLogger
+from feed_rows import FeedRow, HearingRow, rows_from_flat, rows_from_grouped
+from ics_writer import to_event
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Per-hearing lines: DEBUG or sampled only; ics_builder logs one summary per feed
+events = SampledLogger(logger)
 
 LOCAL_TZ = pytz.timezone("America/Los_Angeles")
 UTC = pytz.utc
@@ -39,34 +49,34 @@ def _chamber_prefix(chamber_id: int | None) -> str:
     return f"[{abbrev}]" if abbrev else ""
 
 
-def _build_core_description(h: dict, rows: list[dict]) -> tuple[list, list]:
+def _build_core_description(h: HearingRow, rows: list[FeedRow]) -> tuple[list, list]:
     parts = []
     html_parts = []
 
     # -- Step 1: get core details
-    if h.get("hearing_time_verbatim"):
-        hearing_time = h["hearing_time_verbatim"].replace("m.", "m. PT")
+    if h.hearing_time_verbatim:
+        hearing_time = h.hearing_time_verbatim.replace("m.", "m. PT")
         parts.append(f"Time: {hearing_time}")
         html_parts.append(f"<b>Time:</b> {hearing_time}")
 
     # Committee webpage link when available (null for subcommittees/joint hearings)
-    if h.get("committee_webpage"):
-        parts.append(f"Committee info: {h['committee_webpage']}")
+    if h.committee_webpage:
+        parts.append(f"Committee info: {h.committee_webpage}")
         html_parts.append(
-            f"<br><b>Committee info:</b> <a href=\"{h['committee_webpage']}\">{h['committee_webpage']}</a>"
+            f"<br><b>Committee info:</b> <a href=\"{h.committee_webpage}\">{h.committee_webpage}</a>"
         )
 
     # -- Step 2: collect unique deadlines across rows (future-proof for multiple types)
     seen_deadlines = set()
     for row in rows:
-        if row.get("deadline_date") and row.get("deadline_type"):
-            key = (row["deadline_date"], row["deadline_type"])
+        if row.deadline_date and row.deadline_type:
+            key = (row.deadline_date, row.deadline_type)
             if key not in seen_deadlines:
                 parts.append(
-                    f"{row['deadline_type'].title()} deadline: {row['deadline_date']}"
+                    f"{row.deadline_type.title()} deadline: {row.deadline_date}"
                 )
                 html_parts.append(
-                    f"<br><b>{row['deadline_type'].title()} deadline:</b> {row['deadline_date']}"
+                    f"<br><b>{row.deadline_type.title()} deadline:</b> {row.deadline_date}"
                 )
                 seen_deadlines.add(key)
 
@@ -74,9 +84,9 @@ def _build_core_description(h: dict, rows: list[dict]) -> tuple[list, list]:
     NOTES_NA = "\nNotes: N/A"
     NOTES_NA_HTML = "<br><b>Notes:</b> N/A"
 
-    if h.get("notes"):
-        parts.append(f"\nNotes: {h['notes']}")
-        html_parts.append(f"<br><b>Notes:</b> {h['notes']}")
+    if h.notes:
+        parts.append(f"\nNotes: {h.notes}")
+        html_parts.append(f"<br><b>Notes:</b> {h.notes}")
     else:
         parts.append(NOTES_NA)
         html_parts.append(NOTES_NA_HTML)
@@ -84,14 +94,14 @@ def _build_core_description(h: dict, rows: list[dict]) -> tuple[list, list]:
 
 
 def _build_footnote_description(
-    bills: list[dict], parts: list[str], html_parts: list[str]
+    bills: list[FeedRow], parts: list[str], html_parts: list[str]
 ) -> tuple[list, list]:
 
     # Consolidate non-empty footnote content
     footnote_content = dict()
     for bill_detail in bills:
-        symbol = bill_detail.get("footnote_symbol") or ""
-        footnote = bill_detail.get("footnote") or ""
+        symbol = bill_detail.footnote_symbol or ""
+        footnote = bill_detail.footnote or ""
 
         # Skip if both are empty
         if not symbol and not footnote:
@@ -102,7 +112,7 @@ def _build_footnote_description(
 
     # Join footnote description to the bottom if exists
     if footnote_content:
-        logger.info("build footnotes")
+        events.event("Building %d footnotes", len(footnote_content))
         footnote_description = "\n\n----------\n"
         footnote_description_html = "<br><br>----------<br>"
 
@@ -117,11 +127,11 @@ def _build_footnote_description(
 
 
 def _build_bill_description(
-    bills: list[dict], parts: list[str], html_parts: list[str], dashboard: bool
+    bills: list[FeedRow], parts: list[str], html_parts: list[str], dashboard: bool
 ) -> tuple[list, list]:
     # Filter if this is for a dashboard feed
     if dashboard:
-        display_bills = [b for b in bills if b.get("on_dashboard", False)]
+        display_bills = [b for b in bills if b.on_dashboard]
         header = "Tracked bills on the agenda"
         list_tag = "ul"
     else:
@@ -133,17 +143,17 @@ def _build_bill_description(
         return parts, html_parts
 
     full_agenda_length = len(bills)
-    display_bills.sort(key=lambda b: b["file_order"])
+    display_bills.sort(key=lambda b: b.file_order)
     # Add headers
     parts.append(f"\n**{header}**")
     html_parts.append(f"<br><b>{header}</b><{list_tag}>")
 
     for bill in display_bills:
-        symbol = bill.get("footnote_symbol") or ""
-        file_order = bill["file_order"]
+        symbol = bill.footnote_symbol or ""
+        file_order = bill.file_order
 
         # Ex: AB 123 | Lorem ipsum
-        desc = f" {bill['bill_number']}{symbol} | {bill['bill_name']}"
+        desc = f" {bill.bill_number}{symbol} | {bill.bill_name}"
 
         if dashboard:  # Ex: - AB 123 | Lorem ipsum | File order: 4/5
             # Add file order to description, prefix is always '-'
@@ -160,19 +170,14 @@ def _build_bill_description(
     return parts, html_parts
 
 
-def _build_description(h: dict, rows: list[dict], dashboard: bool) -> tuple[str, str]:
-    """
-    Compose the event description from hearing-level fields and bill rows.
-
-    Returns a tuple of (plain_text, html) so callers can attach both:
-    - DESCRIPTION (plain) — used by Apple Calendar and Google Calendar
-    - X-ALT-DESC (html)   — used by Outlook
-    """
-    # -- Step 1: Build universal description parts
-    parts, html_parts = _build_core_description(h, rows)
+def _finish_description(
+    core: tuple[list, list], rows: list[FeedRow], dashboard: bool
+) -> tuple[str, str]:
+    """Append the bill list and footnotes to core description parts and join."""
+    parts, html_parts = list(core[0]), list(core[1])
 
     # -- Step 2: extract bills — skip rows if bill number was not found
-    bills = [r for r in rows if r.get("bill_number")]
+    bills = [r for r in rows if r.bill_number]
 
     # -- Step 3: Generate bill descriptions if there are bills associated
     if bills:
@@ -194,93 +199,243 @@ def _build_description(h: dict, rows: list[dict], dashboard: bool) -> tuple[str,
     return plain, html
 
 
+def _build_description(h: HearingRow, rows: list[FeedRow], dashboard: bool) -> tuple[str, str]:
+    """
+    Compose the event description from hearing-level fields and bill rows.
+
+    Returns a tuple of (plain_text, html) so callers can attach both:
+    - DESCRIPTION (plain) — used by Apple Calendar and Google Calendar
+    - X-ALT-DESC (html)   — used by Outlook
+    """
+    # -- Step 1: Build universal description parts
+    return _finish_description(_build_core_description(h, rows), rows, dashboard)
+
+
+# ── Hearing fragment cache ─────────────────────────────────────────────────────
+#
+# A hearing renders the same in every feed it appears in except for the bill
+# list: chamber/committee feeds show the full agenda, dashboard feeds only the
+# tracked bills (with the footnotes in their row order). Everything else —
+# summary, location, times, the core description — is rendered once per
+# (hearing_id, updated_at) and shared by all feeds built in this worker.
+# The full-agenda description is dashboard-independent too, so it is cached
+# on the fragment the first time a chamber/committee feed needs it, keyed by
+# the bills' number, name and author: those come from app.bills_mv, whose
+# refreshes don't touch hearings.updated_at.
+
+
+class FragmentCache:
+    """Bounded, thread-safe LRU of (hearing_id, updated_at) -> hearing fragment."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: tuple) -> dict | None:
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return fragment
+
+    def put(self, key: tuple, fragment: dict):
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def evict_hearings(self, hearing_ids):
+        """Drop every version of the given hearings (e.g. a deadline changed
+        without touching updated_at)."""
+        hearing_ids = set(hearing_ids)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in hearing_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+fragments = FragmentCache(int(os.getenv("HEARING_FRAGMENT_CACHE_SIZE", "5000")))
+
+
+def _render_fragment(hearing_id: int, group_rows: List[FeedRow]) -> dict:
+    """Dashboard-independent parts of a hearing event."""
+    h = group_rows[0].hearing  # shared by all rows of the hearing
+
+    # Build event summary (title) from hearing-level fields
+    prefix = _chamber_prefix(h.chamber_id)
+    hearing_name = h.hearing_name or f"Hearing {hearing_id}"
+    summary = f"{prefix} {hearing_name}"
+    fragment = {"summary": summary}
+    events.event("Building %s", summary)
+
+    # Core description (time, committee link, deadlines, notes)
+    parts, html_parts = _build_core_description(h, group_rows)
+    fragment["core"] = (tuple(parts), tuple(html_parts))
+    fragment["agenda"] = None  # (_agenda_key, (plain, html)), filled on first use
+
+    # Build event location from hearing location + room
+    location_parts = [p for p in [h.hearing_location, h.hearing_room] if p]
+    fragment["location"] = ", ".join(location_parts)
+
+    # Build event time from relevant columns
+    if h.is_allday or not h.hearing_time:
+        fragment["dtstart"] = h.hearing_date
+        fragment["dtend"] = h.hearing_date + timedelta(days=1)
+    else:
+        dt_local = LOCAL_TZ.localize(
+            datetime.combine(h.hearing_date, h.hearing_time)
+        )
+        dt_utc = dt_local.astimezone(UTC)
+        fragment["dtstart"] = dt_utc
+        fragment["dtend"] = dt_utc + timedelta(hours=2)
+
+    # Hearing-level, so the same for every bill in the group
+    fragment["last-modified"] = h.updated_at or None
+
+    return fragment
+
+
+def hearing_fragment(hearing_id: int, group_rows: List[FeedRow]) -> dict:
+    """Cached dashboard-independent fragment for a non-empty hearing group."""
+    key = (hearing_id, group_rows[0].hearing.updated_at)
+    fragment = fragments.get(key)
+    if fragment is None:
+        fragment = _render_fragment(hearing_id, group_rows)
+        fragments.put(key, fragment)
+    return fragment
+
+
+def _agenda_key(group_rows: List[FeedRow]) -> tuple:
+    """The bills_mv columns of a hearing's bills, which the full agenda shows."""
+    return tuple((r.bill_number, r.bill_name, r.bill_author) for r in group_rows)
+
+
+def _is_grouped(row: Dict[str, Any]) -> bool:
+    """True for a grouped-mode query row (one per hearing, see db/calendar_queries)."""
+    return "bills" in row
+
+
 def group_hearings(
     rows: List[Dict[str, Any]],
-) -> List[Tuple[int, List[Dict[str, Any]]]]:
+) -> List[Tuple[int, List[FeedRow]]]:
     """
-    Group rows by hearing_id.
+    Group query rows by hearing_id into FeedRow lists (see feed_rows.py).
 
     Returns a list of (hearing_id, group_rows) tuples.
-    Each group contains all rows for a single hearing.
+    Each group contains all rows for a single hearing. Grouped-mode rows
+    arrive one per hearing in hearing_id order and are expanded without
+    sorting.
     """
+    if rows and _is_grouped(rows[0]):
+        return [(row["hearing_id"], rows_from_grouped(row)) for row in rows]
     sorted_rows = sorted(rows, key=lambda r: r["hearing_id"])
     return [
-        (hearing_id, list(group))
+        (hearing_id, rows_from_flat(list(group)))
         for hearing_id, group in groupby(sorted_rows, key=lambda r: r["hearing_id"])
     ]
 
 
-def build_hearing_event(
+def iter_hearing_groups(
+    rows: Iterable[Dict[str, Any]],
+) -> Iterator[Tuple[int, List[FeedRow]]]:
+    """
+    Lazily group rows that already arrive ordered by hearing_id.
+
+    Streaming counterpart of group_hearings: holds one hearing's rows at a
+    time instead of sorting the whole result. Accepts grouped-mode rows too.
+    """
+    for hearing_id, group in groupby(rows, key=lambda r: r["hearing_id"]):
+        group = list(group)
+        if _is_grouped(group[0]):
+            yield hearing_id, rows_from_grouped(group[0])
+        else:
+            yield hearing_id, rows_from_flat(group)
+
+
+def hearing_event_fields(
     now_utc: datetime,
     hearing_id: int,
-    group_rows: List[Dict[str, Any]],
+    group_rows: List[FeedRow],
     dashboard: bool,
-) -> Event:
+) -> Dict[str, Any]:
     """
-    Build a single iCalendar Event from a grouped hearing.
+    Compute the iCalendar properties of a single hearing event.
 
+    Returns a dict of lower-case property name -> value (str, date or
+    datetime) that either serializer in ics_writer can render. Only the bill
+    list and DTSTAMP are computed per call; the rest comes from the shared
+    fragment cache.
     Summary format: "[ASM] Budget Hearing"
     Chamber prefix is omitted when chamber_id is unknown.
 
     Args:
         hearing_id: The hearing ID.
-        group_rows: All rows belonging to this hearing.
-
-    Returns:
-        An icalendar Event object.
+        group_rows: All rows belonging to this hearing (group_hearings output).
     """
     if hearing_id is None:
         raise ValueError("hearing_id is required")
 
     # Handle empty group_rows
     if not group_rows:
-        ev = Event()
-        ev.add("uid", f"hearing-{hearing_id}@legtracker")
-        ev.add("summary", f"Hearing {hearing_id} (no data)")
-        ev.add("dtstamp", now_utc)
-        return ev
+        return {
+            "uid": f"hearing-{hearing_id}@legtracker",
+            "summary": f"Hearing {hearing_id} (no data)",
+            "dtstamp": now_utc,
+        }
 
-    h = group_rows[0]  # hearing-level fields are identical across all rows
+    fragment = hearing_fragment(hearing_id, group_rows)
 
-    ev = Event()
-    ev.add("uid", f"hearing-{hearing_id}@legtracker")
+    fields = {"uid": f"hearing-{hearing_id}@legtracker"}
+    fields["summary"] = fragment["summary"]
 
-    # Build event summary (title) from hearing-level fields
-    prefix = _chamber_prefix(h.get("chamber_id"))
-    hearing_name = h.get("hearing_name") or f"Hearing {hearing_id}"
-    summary = f"{prefix} {hearing_name}"
-    ev.add("summary", summary)
-    logger.info(f"Building {summary}")
-    # Build description from all rows in the group
-    plain, html = _build_description(h, group_rows, dashboard)
-    ev.add("description", plain)
-    alt = vText(html)
-    alt.params["fmttype"] = "text/html"
-    ev.add("x-alt-desc", alt)
-
-    # Build event location from hearing location + room
-    location_parts = [
-        p for p in [h.get("hearing_location"), h.get("hearing_room")] if p
-    ]
-    ev.add("location", ", ".join(location_parts))
-
-    # Build event time from relevant columns
-    if h.get("is_allday") or not h.get("hearing_time"):
-        ev.add("dtstart", h["hearing_date"])
-        ev.add("dtend", h["hearing_date"] + timedelta(days=1))
+    # Per-feed overlay: the bill list (tracked bills only on dashboard feeds)
+    if dashboard:
+        plain, html = _finish_description(fragment["core"], group_rows, True)
     else:
-        dt_local = LOCAL_TZ.localize(
-            datetime.combine(h["hearing_date"], h["hearing_time"])
-        )
-        dt_utc = dt_local.astimezone(UTC)
-        ev.add("dtstart", dt_utc)
-        ev.add("dtend", dt_utc + timedelta(hours=2))
+        agenda_key = _agenda_key(group_rows)
+        agenda = fragment["agenda"]
+        if agenda is None or agenda[0] != agenda_key:
+            agenda = fragment["agenda"] = (
+                agenda_key,
+                _finish_description(fragment["core"], group_rows, False),
+            )
+        plain, html = agenda[1]
+    fields["description"] = plain
+    fields["x-alt-desc"] = html
+
+    fields["location"] = fragment["location"]
+    fields["dtstart"] = fragment["dtstart"]
+    fields["dtend"] = fragment["dtend"]
+    fields["dtstamp"] = now_utc
+    if fragment["last-modified"] is not None:
+        fields["last-modified"] = fragment["last-modified"]
+
+    return fields
 
-    ev.add("dtstamp", now_utc)
 
-    # Add last modified value which may differ for each bill in the group
-    updated_at_values = [r["updated_at"] for r in group_rows if r.get("updated_at")]
-    if updated_at_values:
-        ev.add("last-modified", max(updated_at_values))
+def build_hearing_event(
+    now_utc: datetime,
+    hearing_id: int,
+    group_rows: List[FeedRow],
+    dashboard: bool,
+) -> Event:
+    """
+    Build a single iCalendar Event from a grouped hearing.
 
-    return ev
+    Returns:
+        An icalendar Event object.
+    """
+    return to_event(hearing_event_fields(now_utc, hearing_id, group_rows, dashboard))
@@ -4,27 +4,198 @@ Assembles a complete iCalendar feed from query rows.
 
 Orchestrates hearing_builder and deadline_builder — owns the Calendar
 envelope and iteration logic, not the event construction details.
+
+Two serializers produce identical bytes, selected with ICS_SERIALIZER:
+- "fast" (default): ics_writer writes RFC 5545 text directly
+- "icalendar":      builds an icalendar.Calendar object graph and calls to_ical()
+
+iter_ical() is the streaming form of the fast serializer, for feeds too large
+to hold in memory at once.
 """
 
-from typing import Any, Dict
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator
 import logging
+import os
 import time
 from datetime import datetime
 
 import pytz
 from icalendar import Calendar
 
-from hearing_builder import build_hearing_event, group_hearings
-from deadline_builder import build_deadline_event
+from feed_rows import FeedRow
+from hearing_builder import hearing_event_fields, group_hearings, iter_hearing_groups
+from deadline_builder import deadline_event_fields
+from ics_writer import (
+    CALDESC,
+    CALENDAR_FOOTER,
+    PRODID,
+    calendar_header,
+    event_bytes,
+    to_event,
+)
 
 UTC = pytz.utc
 
+SERIALIZER = os.getenv("ICS_SERIALIZER", "fast").lower()
+STREAM_CHUNK_BYTES = 64 * 1024  # events are batched into chunks of about this size
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _iter_event_fields(
+    groups: Iterable[tuple[int, list[FeedRow]]],
+    now_utc: datetime,
+    feed_label: str,
+    dashboard: bool,
+    counts: Dict[str, int],
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield event fields for every hearing and tracked-bill deadline, in feed
+    order. Per-event build errors are logged, counted and skipped; anything
+    else propagates to the caller as a critical error.
+    """
+    for hearing_id, group in groups:
+        try:
+            if group[0].hearing.canceled_at:
+                continue
+            hearing_fields = hearing_event_fields(now_utc, hearing_id, group, dashboard)
+        except (KeyError, AttributeError, ValueError) as e:
+            counts["errors"] += 1
+            logger.error(f"Failed to build hearing event for ID {hearing_id}: {e}")
+            continue  # Skip, but continue to build partial calendar
+        yield hearing_fields
+        counts["hearings"] += 1
+
+        # Deadline events - dashboard feeds only, one per tracked bill
+        for row in group:
+            # Check for missing data; continue to next bill if invalid
+            if (
+                not row.on_dashboard
+                or not row.deadline_date
+                and not row.hearing.canceled_at
+            ):
+                continue
+
+            # Check if org position warrants building a deadline; continue to next bill if invalid
+            if feed_label == "ORG":
+                org_pos = row.org_position
+                if not org_pos or org_pos == "Neutral/No Position":
+                    continue
+
+            try:
+                deadline_fields = deadline_event_fields(now_utc, row, feed_label)
+            except (KeyError, AttributeError, ValueError) as e:
+                counts["errors"] += 1
+                logger.error(
+                    f"Failed to build deadline event for bill {row.bill_number}: {e}"
+                )
+                continue
+            yield deadline_fields
+            counts["deadlines"] += 1
+
+
+def _log_counts(feed_title: str, counts: Dict[str, int]):
+    """The per-feed summary; per-event detail is logged at DEBUG (db/hotlog.py)."""
+    if counts["errors"] > 0:
+        logger.warning(
+            "Built calendar %r with errors: %d hearings, %d deadlines, %d errors",
+            feed_title,
+            counts["hearings"],
+            counts["deadlines"],
+            counts["errors"],
+        )
+    else:
+        logger.info(
+            "Built calendar %r: %d hearings, %d deadlines",
+            feed_title,
+            counts["hearings"],
+            counts["deadlines"],
+        )
+
+
+def _build_icalendar(
+    rows: list[dict[str, Any]],
+    feed_title: str,
+    feed_label: str,
+    dashboard: bool,
+    now_utc: datetime,
+    groups: list[tuple[int, list[FeedRow]]] | None = None,
+) -> bytes:
+    """Reference serializer: icalendar object graph + to_ical()."""
+    if groups is None:
+        groups = group_hearings(rows)
+    if not groups:
+        # Return minimal valid calendar instead of empty bytes
+        cal = Calendar()
+        cal.add("prodid", PRODID)
+        cal.add("version", "2.0")
+        return cal.to_ical()
+
+    cal = Calendar()
+    cal.add("prodid", PRODID)
+    cal.add("version", "2.0")
+    cal.add("calscale", "GREGORIAN")
+    cal.add("method", "PUBLISH")
+    cal.add("x-wr-calname", feed_title)
+    cal.add("x-wr-caldesc", CALDESC)
+
+    counts = {"hearings": 0, "deadlines": 0, "errors": 0}
+    try:
+        for fields in _iter_event_fields(groups, now_utc, feed_label, dashboard, counts):
+            cal.add_component(to_event(fields))
+    except Exception as e:
+        counts["errors"] += 1
+        logger.error(f"Critical error building calendar: {e}")
+        # Return minimal calendar instead of failing completely
+        minimal_cal = Calendar()
+        minimal_cal.add("prodid", PRODID)
+        cal.add("version", "2.0")
+        cal.add("x-wr-calname", feed_title)
+        cal.add("x-wr-caldesc", f"Partial calendar - errors occurred: {str(e)}")
+
+    _log_counts(feed_title, counts)
+    return cal.to_ical()
+
+
+def _build_fast(
+    rows: list[dict[str, Any]],
+    feed_title: str,
+    feed_label: str,
+    dashboard: bool,
+    now_utc: datetime,
+    groups: list[tuple[int, list[FeedRow]]] | None = None,
+) -> bytes:
+    """Direct serializer: event fields written straight into one bytearray."""
+    if groups is None:
+        groups = group_hearings(rows)
+    if not groups:
+        return calendar_header(None) + CALENDAR_FOOTER
+
+    out = bytearray(calendar_header(feed_title))
+    counts = {"hearings": 0, "deadlines": 0, "errors": 0}
+    try:
+        for fields in _iter_event_fields(groups, now_utc, feed_label, dashboard, counts):
+            out += event_bytes(fields)
+    except Exception as e:
+        # The partial-calendar envelope is owned by the reference serializer;
+        # rebuild there so both paths degrade identically.
+        logger.error(f"Critical error in fast serializer, falling back to icalendar: {e}")
+        return _build_icalendar(rows, feed_title, feed_label, dashboard, now_utc, groups)
+
+    _log_counts(feed_title, counts)
+    out += CALENDAR_FOOTER
+    return bytes(out)
+
+
 def build_ical(
-    rows: list[dict[str, Any]], feed_title: str, feed_label: str = "", dashboard=True
+    rows: list[dict[str, Any]],
+    feed_title: str,
+    feed_label: str = "",
+    dashboard=True,
+    now_utc: datetime | None = None,
+    groups: list[tuple[int, list[FeedRow]]] | None = None,
 ) -> bytes:
     """
     Build an iCal calendar from calendar_queries feed result rows.
@@ -46,102 +217,72 @@ def build_ical(
                      chamber/committee feeds. Personal feeds emit events but do
                      not need a feed label. Chamber/committee feeds do not emit
                      deadline events.
+        now_utc:     DTSTAMP for every event; defaults to the current time.
+        groups:      group_hearings(rows), if the caller already has it (the
+                     routes' feed row sets); rows is then ignored.
 
     Returns:
         Raw iCal bytes (text/calendar).
     """
+    if groups is None:
+        groups = group_hearings(rows)
+
     # Input validation
-    if not rows:
+    if not groups:
         logger.warning(f"Feed has no data: {feed_title}")
 
-        # Return minimal valid calendar instead of empty bytes
-        cal = Calendar()
-        cal.add("prodid", "-//LegTracker//iCal Feed//EN")
-        cal.add("version", "2.0")
-        return cal.to_ical()
+    # Get current time once for all events to reduce syscalls
+    if now_utc is None:
+        now_utc = datetime.now(UTC)
 
-    cal = Calendar()
-    cal.add("prodid", "-//LegTracker//iCal Feed//EN")
-    cal.add("version", "2.0")
-    cal.add("calscale", "GREGORIAN")
-    cal.add("method", "PUBLISH")
-    cal.add("x-wr-calname", feed_title)
-    cal.add("x-wr-caldesc", "Legislative hearing schedule from LegTracker")
+    if SERIALIZER == "icalendar":
+        return _build_icalendar(rows, feed_title, feed_label, dashboard, now_utc, groups)
+    return _build_fast(rows, feed_title, feed_label, dashboard, now_utc, groups)
 
-    # Log errors
-    hearing_count = 0
-    deadline_count = 0
-    error_count = 0
 
-    # Get current time once for all events to reduce syscalls
-    now_utc = datetime.now(UTC)
+def iter_ical(
+    rows: Iterable[dict[str, Any]],
+    feed_title: str,
+    feed_label: str = "",
+    dashboard=True,
+    now_utc: datetime | None = None,
+) -> Iterator[bytes]:
+    """
+    Stream an iCal calendar as chunks of bytes: header, batches of events,
+    footer. Concatenated, the chunks equal build_ical() for the same rows.
 
+    rows may be any iterable (e.g. a server-side cursor) but must be ordered
+    by hearing_id; only one hearing's rows are held at a time.
+
+    A critical error mid-stream is logged and re-raised rather than closing
+    the calendar early — the response is then cut short and calendar clients
+    keep their previous copy instead of replacing it with a partial feed.
+    """
+    if now_utc is None:
+        now_utc = datetime.now(UTC)
+
+    groups = iter_hearing_groups(rows)
+    first = next(groups, None)
+    if first is None:
+        logger.warning(f"Feed has no data: {feed_title}")
+        yield calendar_header(None) + CALENDAR_FOOTER
+        return
+
+    yield calendar_header(feed_title)
+    counts = {"hearings": 0, "deadlines": 0, "errors": 0}
+    chunk = bytearray()
     try:
-        for hearing_id, group in group_hearings(rows):
-            try:
-                if group[0].get("canceled_at"):
-                    continue
-                hearing_event = build_hearing_event(
-                    now_utc, hearing_id, group, dashboard
-                )
-                cal.add_component(hearing_event)
-                hearing_count += 1
-                # Deadline events - dashboard feeds only, one per tracked bill
-                if group:  # Only try to build deadlines if group has data
-                    for row in group:
-                        # Check for missing data; continue to next bill if invalid
-                        if (
-                            not row.get("on_dashboard")
-                            or not row.get("deadline_date")
-                            and not row.get("canceled_at")
-                        ):
-                            continue
-
-                        # Check if org position warrants building a deadline; continue to next bill if invalid
-                        if feed_label == "ORG":
-                            org_pos = row.get("org_position")
-                            if not org_pos or org_pos == "Neutral/No Position":
-                                continue
-
-                        try:
-                            cal.add_component(
-                                build_deadline_event(now_utc, row, feed_label)
-                            )
-                            deadline_count += 1
-                        except (KeyError, AttributeError, ValueError) as e:
-                            error_count += 1
-                            logger.error(
-                                f"Failed to build deadline event for bill {row.get("bill_number")}: {e}"
-                            )
-            except (KeyError, AttributeError, ValueError) as e:
-                error_count += 1
-                logger.error(f"Failed to build hearing event for ID {hearing_id}: {e}")
-                continue  # Skip, but continue to build partial calendar
+        for fields in _iter_event_fields(
+            chain([first], groups), now_utc, feed_label, dashboard, counts
+        ):
+            chunk += event_bytes(fields)
+            if len(chunk) >= STREAM_CHUNK_BYTES:
+                yield bytes(chunk)
+                chunk.clear()
     except Exception as e:
-        error_count += 1
-        logger.error(f"Critical error building calendar: {e}")
-        # Return minimal calendar instead of failing completely
-        minimal_cal = Calendar()
-        minimal_cal.add("prodid", "-//LegTracker//iCal Feed//EN")
-        cal.add("version", "2.0")
-        cal.add("x-wr-calname", feed_title)
-        cal.add("x-wr-caldesc", f"Partial calendar - errors occurred: {str(e)}")
+        logger.error(f"Critical error streaming calendar {feed_title}: {e}")
+        raise
 
-    if error_count > 0:
-        logger.warning(
-            (
-                "Building calendar with errors:"
-                f"{hearing_count} hearings, "
-                f"{deadline_count} deadlines, "
-                f"{error_count} errors"
-            )
-        )
-    else:
-        logger.info(
-            (
-                "Building calendar:"
-                f"{hearing_count} hearings, "
-                f"{deadline_count} deadlines"
-            )
-        )
-    return cal.to_ical()
+    _log_counts(feed_title, counts)
+    chunk += CALENDAR_FOOTER
+    yield bytes(chunk)
@@ -0,0 +1,175 @@
+# calendar-feed/ics_writer.py
+"""
+Serializes event fields to iCalendar (RFC 5545) text.
+
+hearing_builder and deadline_builder describe each event as a plain dict of
+lower-case property name -> value (str, date or datetime). This module turns
+those dicts into output two ways:
+
+- to_event():     an icalendar.Event, for the reference serializer
+- event_bytes():  RFC 5545 bytes written directly, skipping the icalendar
+                  object graph (one property object per value, re-escaping
+                  and re-folding on to_ical())
+
+The direct writer reproduces icalendar's (7.x) output byte for byte: the same
+canonical property order, TEXT escaping, VALUE=DATE parameters, UTC "Z"
+timestamps and 75-octet line folding. benchmarks/bench_serializer.py --check
+compares both against golden files.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any
+
+from icalendar import Event, vText
+
+PRODID = "-//LegTracker//iCal Feed//EN"
+CALDESC = "Legislative hearing schedule from LegTracker"
+
+# Fixed parameters per property — the only parameterised property we emit
+PROPERTY_PARAMS: dict[str, dict[str, str]] = {
+    "x-alt-desc": {"FMTTYPE": "text/html"},
+}
+
+# Properties icalendar types as vUnknown when added as plain strings (the
+# calendar-level X-WR-* names): written without TEXT escaping. Newlines, which
+# icalendar rejects outright, are still escaped to keep the line valid.
+_UNESCAPED = {"x-wr-calname", "x-wr-caldesc"}
+
+# icalendar writes these properties first, in this order, then the rest sorted
+# by name (Component.canonical_order).
+_EVENT_ORDER = (
+    "SUMMARY",
+    "DTSTART",
+    "DTEND",
+    "DURATION",
+    "DTSTAMP",
+    "UID",
+    "RECURRENCE-ID",
+    "SEQUENCE",
+    "RRULE",
+    "RDATE",
+    "EXDATE",
+)
+
+_CRLF = b"\r\n"
+_FOLD = b"\r\n "
+_LINE_OCTETS = 74  # icalendar folds before a line would reach 75 octets
+_ESCAPE_LEADERS = b"\\^"  # never end a folded line on a TEXT/RFC 6868 escape
+
+CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
+
+
+def to_event(fields: dict[str, Any]) -> Event:
+    """Build an icalendar Event from an event fields dict."""
+    ev = Event()
+    for name, value in fields.items():
+        params = PROPERTY_PARAMS.get(name)
+        if params:
+            value = vText(value)
+            for key, param in params.items():
+                value.params[key.lower()] = param
+        ev.add(name, value)
+    return ev
+
+
+# ── Direct writer ──────────────────────────────────────────────────────────────
+
+
+def escape_text(text: str) -> str:
+    """TEXT value escaping, in the same replacement order as icalendar."""
+    return (
+        text.replace(r"\N", "\n")
+        .replace("\\", "\\\\")
+        .replace(";", r"\;")
+        .replace(",", r"\,")
+        .replace("\r\n", r"\n")
+        .replace("\n", r"\n")
+        .replace("\r", r"\n")
+    )
+
+
+def fold(line: bytes) -> bytes:
+    """
+    Fold one content line into chunks of at most 74 octets.
+
+    Chunks never split a UTF-8 sequence, and a chunk never ends on a
+    backslash or caret so escape sequences stay on one physical line.
+    """
+    if len(line) <= _LINE_OCTETS:
+        return line
+    chunks = []
+    pos = 0
+    end_of_line = len(line)
+    while end_of_line - pos > _LINE_OCTETS:
+        end = pos + _LINE_OCTETS
+        while line[end] & 0xC0 == 0x80:  # UTF-8 continuation byte
+            end -= 1
+        if end - pos > 1 and line[end - 1] in _ESCAPE_LEADERS:
+            end -= 1
+        chunks.append(line[pos:end])
+        pos = end
+    chunks.append(line[pos:])
+    return _FOLD.join(chunks)
+
+
+def _format_value(name: str, value: Any) -> tuple[str, str]:
+    """Return (extra parameters, serialized value) for a field value."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return "", value.strftime("%Y%m%dT%H%M%S")
+        if value.utcoffset():
+            value = value.astimezone(timezone.utc)
+        return "", value.strftime("%Y%m%dT%H%M%SZ")
+    if isinstance(value, date):
+        return ";VALUE=DATE", value.strftime("%Y%m%d")
+    if name in _UNESCAPED:
+        return "", str(value).replace("\r\n", r"\n").replace("\n", r"\n")
+    return "", escape_text(str(value))
+
+
+def content_line(name: str, value: Any) -> bytes:
+    """One folded content line, CRLF-terminated."""
+    extra, text = _format_value(name, value)
+    params = PROPERTY_PARAMS.get(name)
+    if params:
+        extra += "".join(f";{k}={v}" for k, v in params.items())
+    return fold(f"{name.upper()}{extra}:{text}".encode()) + _CRLF
+
+
+_order_cache: dict[frozenset, tuple[str, ...]] = {}
+
+
+def _event_order(names) -> tuple[str, ...]:
+    key = frozenset(names)
+    order = _order_cache.get(key)
+    if order is None:
+        upper = {n.upper(): n for n in names}
+        canonical = [upper[n] for n in _EVENT_ORDER if n in upper]
+        rest = [upper[n] for n in sorted(upper) if n not in _EVENT_ORDER]
+        order = _order_cache[key] = tuple(canonical + rest)
+    return order
+
+
+def event_bytes(fields: dict[str, Any]) -> bytes:
+    """Serialize one VEVENT from an event fields dict."""
+    out = bytearray(b"BEGIN:VEVENT\r\n")
+    for name in _event_order(fields):
+        out += content_line(name, fields[name])
+    out += b"END:VEVENT\r\n"
+    return bytes(out)
+
+
+def calendar_header(feed_title: str | None) -> bytes:
+    """
+    VCALENDAR opening lines. feed_title=None gives the minimal calendar
+    (VERSION and PRODID only) used for feeds with no rows.
+    """
+    out = bytearray(b"BEGIN:VCALENDAR\r\n")
+    out += content_line("version", "2.0")
+    out += content_line("prodid", PRODID)
+    if feed_title is not None:
+        out += content_line("calscale", "GREGORIAN")
+        out += content_line("method", "PUBLISH")
+        out += content_line("x-wr-caldesc", CALDESC)
+        out += content_line("x-wr-calname", feed_title)
+    return bytes(out)
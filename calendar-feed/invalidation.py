@@ -0,0 +1,325 @@
+# calendar-feed/invalidation.py
+"""
+Event-driven invalidation of per-feed state via PostgreSQL LISTEN/NOTIFY.
+
+Every feed request starts with a validators query (db/calendar_queries
+get_*_validators) so that a changed feed gets a new ETag at once. With the
+listener running, validators are cached per feed key in each worker and
+evicted when a NOTIFY says that feed's data changed, so a poll of an
+unchanged feed costs no query at all, and a changed feed refreshes within
+seconds instead of waiting out a TTL.
+
+Channels:
+- feed_changed (db/migrations/009): routing columns of every changed hearing,
+  agenda, deadline, dashboard or org-position row. Mapped to feed keys
+  (chamber:<id>, committee:<id>, org:<id>, user:<email>, wg) directly from
+  the payload, or with one lookup query per batch for hearing/bill changes.
+  Affected hearings are also dropped from the hearing fragment cache. A
+  TRUNCATE, or a bills_mv refresh that changed bill data (migration 011),
+  sends {"table": ..., "all": true}, which flushes everything.
+- feed_token_rotated (db/tokens.py): an old token hash, or "*" for all,
+  evicted from the token caches in auth.py. Only while the listener is
+  connected do cached tokens get the full TOKEN_CACHE_TTL; otherwise a
+  revoked token resolves for up to TOKEN_CACHE_TTL_NO_LISTENER.
+
+Each invalidation also evicts the changed feeds' row sets and cached
+payloads (routes._helpers.evict_feeds, through the app registered with
+init_app), so a change the validators don't reflect is not served from cache.
+
+Validators are only cached while the listener is connected. On disconnect
+the cache is flushed and bypassed until the listener is back, since
+notifications sent in between are lost.
+
+Enable with FEED_LISTENER_ENABLED=true once migration 009 is applied; the
+gunicorn post_worker_init hook starts one listener per worker.
+"""
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+from typing import Callable
+
+import psycopg2
+import psycopg2.extensions
+
+from db.calendar_queries import FEED_CHANGED_CHANNEL, get_feed_keys_for_changes
+from db.config import config
+from db.tokens import TOKEN_ROTATED_CHANNEL
+from hearing_builder import fragments
+
+logger = logging.getLogger(__name__)
+
+LISTENER_ENABLED = os.getenv("FEED_LISTENER_ENABLED", "false").lower() == "true"
+# Safety net: cached validators are re-queried after this long even if no
+# notification arrives
+VALIDATOR_CACHE_TTL = float(os.getenv("VALIDATOR_CACHE_TTL", "300"))
+_POLL_SECONDS = 5.0  # select() timeout; also how quickly stop() is noticed
+_BATCH_SECONDS = 0.25  # gather a burst of notifications into one batch
+_RECONNECT_MAX_SECONDS = 60.0
+
+
+# ── Validator cache ────────────────────────────────────────────────────────────
+
+
+class ValidatorCache:
+    """
+    feed key -> {feed window: (expires, validators)}, valid only while
+    `active`. Invalidating a feed key drops every window of it.
+
+    A generation counter guards against a notification arriving between a
+    validators query and storing its result: put() is dropped if any
+    invalidation happened since the matching generation() call.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.active = False
+        self._entries: dict[str, dict[tuple | None, tuple[float, dict]]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, feed_key: str, window: tuple | None = None) -> dict | None:
+        if not self.active:
+            return None
+        with self._lock:
+            entry = self._entries.get(feed_key, {}).get(window)
+            if entry is not None and entry[0] > time.monotonic():
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, feed_key: str, validators: dict, generation: int, window: tuple | None = None):
+        with self._lock:
+            if self.active and generation == self._generation:
+                now = time.monotonic()
+                windows = self._entries.setdefault(feed_key, {})
+                # Drop expired windows (e.g. yesterday's default) as new ones arrive
+                for stale in [w for w, (expires, _) in windows.items() if expires <= now]:
+                    del windows[stale]
+                windows[window] = (now + self.ttl, validators)
+
+    def invalidate(self, feed_keys):
+        with self._lock:
+            self._generation += 1
+            for feed_key in feed_keys:
+                self.stats["invalidations"] += len(self._entries.pop(feed_key, ()))
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+validators_cache = ValidatorCache(VALIDATOR_CACHE_TTL)
+
+_app = None  # Flask app whose cache holds the feed payloads (init_app)
+
+
+def init_app(app):
+    """Register the app whose cached feed payloads invalidations evict."""
+    global _app
+    _app = app
+
+
+def _evict_payloads(feed_keys: set[str] | None):
+    """Evict cached row sets and payloads of feed_keys (None = all feeds)."""
+    if _app is None:
+        return
+    from routes._helpers import evict_feeds
+
+    try:
+        with _app.app_context():
+            evict_feeds(feed_keys)
+    except Exception as e:
+        # New validators still move most changed feeds to new cache keys
+        logger.error(f"Evicting cached feed payloads failed: {e}")
+
+
+def feed_validators(
+    feed_key: str, load: Callable[[], dict], window: tuple | None = None
+) -> dict:
+    """Cached validators for a feed key and window; load() runs on a miss."""
+    validators = validators_cache.get(feed_key, window)
+    if validators is None:
+        generation = validators_cache.generation()
+        validators = load()
+        validators_cache.put(feed_key, validators, generation, window)
+    return validators
+
+
+# ── Notification handling ──────────────────────────────────────────────────────
+
+# Tables whose payload names its feed directly
+_DIRECT_KEYS = {
+    "org_bill_dashboard": lambda p: [f"org:{p['org_id']}"] if "org_id" in p else [],
+    "bill_custom_details": lambda p: (
+        [f"org:{p['last_updated_org_id']}"] if "last_updated_org_id" in p else []
+    ),
+    "user_bill_dashboard": lambda p: [f"user:{p['user_email']}"] if "user_email" in p else [],
+    "working_group_dashboard": lambda p: ["wg"],
+}
+
+
+def handle_feed_changes(payloads: list[str]):
+    """Invalidate the feeds behind a batch of feed_changed payloads."""
+    feed_keys = set()
+    hearing_ids = set()
+    bill_ids = set()
+    for raw in payloads:
+        try:
+            change = json.loads(raw)
+        except ValueError:
+            logger.warning(f"Ignoring malformed {FEED_CHANGED_CHANNEL} payload: {raw[:200]}")
+            continue
+        if change.get("all"):
+            logger.info(f"{change.get('table')} changed wholesale; flushing all cached feeds")
+            validators_cache.clear()
+            fragments.clear()
+            _evict_payloads(None)
+            return
+
+        table = change.get("table")
+        if table in _DIRECT_KEYS:
+            feed_keys.update(_DIRECT_KEYS[table](change))
+            continue
+        # hearings / hearing_bills / hearing_deadlines
+        if "chamber_id" in change:
+            feed_keys.add(f"chamber:{change['chamber_id']}")
+        if "committee_id" in change:
+            feed_keys.add(f"committee:{change['committee_id']}")
+        if "hearing_id" in change:
+            hearing_ids.add(change["hearing_id"])
+        if "openstates_bill_id" in change:
+            bill_ids.add(change["openstates_bill_id"])
+
+    if hearing_ids or bill_ids:
+        try:
+            feed_keys |= get_feed_keys_for_changes(sorted(hearing_ids), sorted(bill_ids))
+        except Exception as e:
+            # Can't tell which dashboards are affected; drop everything
+            logger.error(f"Feed change lookup failed, flushing all cached feeds: {e}")
+            validators_cache.clear()
+            fragments.clear()
+            _evict_payloads(None)
+            return
+        fragments.evict_hearings(hearing_ids)
+
+    validators_cache.invalidate(feed_keys)
+    if feed_keys:
+        _evict_payloads(feed_keys)
+    logger.info(
+        f"Invalidated {len(feed_keys)} feeds from {len(payloads)} changes "
+        f"({len(hearing_ids)} hearings, {len(bill_ids)} bills)"
+    )
+
+
+def handle_token_rotations(payloads: list[str]):
+    """Evict rotated token hashes ("*" = every token) from the token caches."""
+    from auth import clear_token_caches, invalidate_token
+
+    if "*" in payloads:
+        clear_token_caches()
+        logger.info("All feed tokens rotated; token caches cleared")
+        return
+    for token_hash in payloads:
+        invalidate_token(token_hash)
+
+
+# ── Listener ───────────────────────────────────────────────────────────────────
+
+
+class FeedListener:
+    """
+    Background LISTEN loop on a dedicated autocommit connection (outside the
+    pool), reconnecting with exponential backoff.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feed-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _set_connected(self, connected: bool):
+        # Anything cached before (or while) we were disconnected may have
+        # missed a notification; token entries cached while connected carry
+        # the long TOKEN_CACHE_TTL, which is only safe with the listener up
+        from auth import clear_token_caches
+
+        validators_cache.clear()
+        validators_cache.active = connected
+        self.connected = connected
+        clear_token_caches()
+
+    def _run(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**config("postgres"))
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {FEED_CHANGED_CHANNEL}")
+                    cur.execute(f"LISTEN {TOKEN_ROTATED_CHANNEL}")
+                self._set_connected(True)
+                logger.info(
+                    f"Listening on {FEED_CHANGED_CHANNEL}, {TOKEN_ROTATED_CHANNEL} (pid={os.getpid()})"
+                )
+                delay = 1.0
+                self._listen(conn)
+            except Exception as e:
+                logger.error(f"Feed listener disconnected, retrying in {delay:.0f}s: {e}")
+                self._set_connected(False)
+                self._stop.wait(delay)
+                delay = min(delay * 2, _RECONNECT_MAX_SECONDS)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
+        self._set_connected(False)
+
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            if select.select([conn], [], [], _POLL_SECONDS) == ([], [], []):
+                continue
+            conn.poll()
+            time.sleep(_BATCH_SECONDS)
+            conn.poll()
+            notifies = list(conn.notifies)
+            conn.notifies.clear()
+
+            by_channel = {}
+            for n in notifies:
+                by_channel.setdefault(n.channel, []).append(n.payload)
+            if FEED_CHANGED_CHANNEL in by_channel:
+                handle_feed_changes(by_channel[FEED_CHANGED_CHANNEL])
+            if TOKEN_ROTATED_CHANNEL in by_channel:
+                handle_token_rotations(by_channel[TOKEN_ROTATED_CHANNEL])
+
+
+listener = FeedListener()
+
+
+def start_listener():
+    """Start this process's listener if FEED_LISTENER_ENABLED; call after fork."""
+    if LISTENER_ENABLED:
+        listener.start()
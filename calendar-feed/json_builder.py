@@ -1,45 +1,48 @@
 from typing import Any, List, Dict
+from feed_rows import FeedRow
 from hearing_builder import group_hearings
 
 
-def build_json(rows: list[dict[str, Any]]) -> dict[str, Any]:
+def build_json(
+    rows: list[dict[str, Any]],
+    groups: list[tuple[int, list[FeedRow]]] | None = None,
+) -> dict[str, Any]:
     """
     Build JSON structure from hearing rows.
 
     Returns a dictionary with hearings grouped by date, suitable for
-    calendar views in a web app.
+    calendar views in a web app. Pass groups (group_hearings(rows)) when
+    already computed; rows is then ignored.
     """
-    hearing_groups = group_hearings(rows)
+    hearing_groups = group_hearings(rows) if groups is None else groups
 
     hearings = []
     for hearing_id, group_rows in hearing_groups:
-        h = group_rows[0]  # hearing-level fields
+        h = group_rows[0].hearing  # hearing-level fields
 
         # Build bills list
         bills = []
         for row in group_rows:
-            if row.get("bill_number"):
+            if row.bill_number:
                 bill = {
-                    "number": row["bill_number"],
-                    "name": row.get("bill_name"),
-                    "deadline_date": row.get("deadline_date"),
-                    "deadline_type": row.get("deadline_type"),
+                    "number": row.bill_number,
+                    "name": row.bill_name,
+                    "deadline_date": row.deadline_date,
+                    "deadline_type": row.deadline_type,
                 }
                 bills.append(bill)
 
         # Build hearing object
         hearing = {
             "id": hearing_id,
-            "name": h.get("hearing_name"),
-            "date": h["hearing_date"].isoformat() if h.get("hearing_date") else None,
-            "time": (
-                h.get("hearing_time").isoformat() if h.get("hearing_time") else None
-            ),
-            "time_verbatim": h.get("hearing_time_verbatim"),
-            "is_allday": h.get("is_allday", False),
-            "location": h.get("hearing_location"),
-            "room": h.get("hearing_room"),
-            "notes": h.get("notes"),
+            "name": h.hearing_name,
+            "date": h.hearing_date.isoformat() if h.hearing_date else None,
+            "time": h.hearing_time.isoformat() if h.hearing_time else None,
+            "time_verbatim": h.hearing_time_verbatim,
+            "is_allday": h.is_allday,
+            "location": h.hearing_location,
+            "room": h.hearing_room,
+            "notes": h.notes,
             "bills": sorted(bills, key=lambda b: b["number"]),
         }
         hearings.append(hearing)
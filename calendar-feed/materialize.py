@@ -0,0 +1,203 @@
+# calendar-feed/materialize.py
+"""
+Prebuilds every .ics feed straight into the feed cache.
+
+Meant to run right after each data refresh (twice daily), either as
+
+    python materialize.py                  # every feed
+    python materialize.py --only org,user  # some feed kinds
+    python materialize.py --org 7 --user a@b.c --wg  # some dashboards
+
+or through POST /admin/feeds/materialize (X-API-Key) on a running service,
+which writes into the service's own cache from a background thread.
+
+All hearings are loaded once (db.calendar_queries.load_feed_snapshot).
+Each dashboard feed's hearings and on_dashboard flags are derived in memory
+from the agenda and dashboard memberships (dashboard_feed_rows), so there is
+no per-feed query and no HTTP round trip. Hearing events are rendered once and shared across feeds
+(hearing_builder's fragment cache). Each payload is stored under the ETag the
+routes compute for the same validators (routes._helpers.store_ical), so the
+next poll of an unchanged feed is a cache hit or a 304. Only the default
+feed window is prebuilt; requests with ?since=/?days_back=/?days_ahead= build
+on demand.
+
+Selected dashboards (materialize_dashboards) load only their own hearings,
+once for all of them (db.calendar_queries.get_hearings_for_dashboards).
+"""
+
+import argparse
+import json
+import logging
+import time
+from collections import defaultdict
+
+from db.calendar_queries import (
+    dashboard_feed_rows,
+    feed_window,
+    get_hearings_for_dashboards,
+    load_feed_snapshot,
+)
+from ics_builder import build_ical
+from routes import chamber, committee, org, user, working_group
+from routes._helpers import store_ical
+
+logger = logging.getLogger(__name__)
+
+FEED_KINDS = ("chamber", "committee", "org", "user", "wg")
+
+
+def materialize_feeds(kinds=FEED_KINDS) -> dict:
+    """
+    Build and cache every feed of the given kinds. Must run inside a Flask
+    app context (the feed cache is the app's). Returns a summary of feeds
+    built per kind, errors, payload bytes and seconds spent.
+    """
+    start = time.time()
+    window = feed_window()
+    snapshot = load_feed_snapshot(window)
+    load_seconds = time.time() - start
+
+    rows = snapshot["rows"]  # one per hearing, hearing_id order
+
+    # (kind, feed_key, validators, rows builder, feed_title, feed_label, dashboard)
+    feeds = []
+    if "chamber" in kinds:
+        by_chamber = defaultdict(list)
+        for row in rows:
+            by_chamber[row["chamber_id"]].append(row)
+        for chamber_id, validators in snapshot["chambers"].items():
+            feeds.append((
+                "chamber", f"chamber:{chamber_id}", validators,
+                lambda c=chamber_id: by_chamber[c],
+                chamber.FEED_TITLE.format(chamber_id=chamber_id), "", False,
+            ))
+    if "committee" in kinds:
+        by_committee = defaultdict(list)
+        for row in rows:
+            by_committee[row["committee_id"]].append(row)
+        for committee_id, validators in snapshot["committees"].items():
+            feeds.append((
+                "committee", f"committee:{committee_id}", validators,
+                lambda c=committee_id: by_committee[c],
+                committee.FEED_TITLE.format(committee_id=committee_id), "", False,
+            ))
+    if "org" in kinds:
+        for org_id, o in snapshot["orgs"].items():
+            feeds.append((
+                "org", f"org:{org_id}", o["validators"],
+                lambda k=f"org:{org_id}": dashboard_feed_rows(snapshot, k),
+                org.FEED_TITLE.format(org_name=o["org_name"]), org.FEED_LABEL, True,
+            ))
+    if "user" in kinds:
+        for email, u in snapshot["users"].items():
+            feeds.append((
+                "user", f"user:{email}", u["validators"],
+                lambda k=f"user:{email}": dashboard_feed_rows(snapshot, k),
+                user.FEED_TITLE, "", True,
+            ))
+    if "wg" in kinds and any(u["is_wg_member"] for u in snapshot["users"].values()):
+        feeds.append((
+            "wg", "wg", snapshot["wg"]["validators"],
+            lambda: dashboard_feed_rows(snapshot, "wg"),
+            working_group.FEED_TITLE, working_group.FEED_LABEL, True,
+        ))
+
+    summary = _build_feeds(feeds, kinds, window)
+    summary.update(
+        hearing_rows=len(rows),
+        load_seconds=round(load_seconds, 2),
+        seconds=round(time.time() - start, 2),
+    )
+    logger.info(f"Materialized feeds: {summary}")
+    return summary
+
+
+def materialize_dashboards(org_ids=(), user_emails=(), include_wg: bool = False) -> dict:
+    """
+    Build and cache the given org, user and (optionally) WG dashboard feeds
+    from one batch load. Must run inside a Flask app context. Returns the
+    same summary as materialize_feeds.
+    """
+    start = time.time()
+    window = feed_window()
+    batch = get_hearings_for_dashboards(org_ids, user_emails, include_wg, window)
+    load_seconds = time.time() - start
+
+    feeds = []
+    for feed_key, validators in batch["validators"].items():
+        rows = lambda k=feed_key: dashboard_feed_rows(batch, k)
+        if feed_key in batch["org_names"]:
+            feed_title = org.FEED_TITLE.format(org_name=batch["org_names"][feed_key])
+            feeds.append(("org", feed_key, validators, rows, feed_title, org.FEED_LABEL, True))
+        elif feed_key == "wg":
+            feeds.append((
+                "wg", feed_key, validators, rows,
+                working_group.FEED_TITLE, working_group.FEED_LABEL, True,
+            ))
+        else:
+            feeds.append(("user", feed_key, validators, rows, user.FEED_TITLE, "", True))
+
+    summary = _build_feeds(feeds, ("org", "user", "wg"), window)
+    summary.update(
+        hearing_rows=len(batch["rows"]),
+        load_seconds=round(load_seconds, 2),
+        seconds=round(time.time() - start, 2),
+    )
+    logger.info(f"Materialized dashboards: {summary}")
+    return summary
+
+
+def _build_feeds(feeds: list[tuple], kinds, window) -> dict:
+    """Build and store each (kind, feed_key, validators, rows, title, label, dashboard) feed."""
+    built = dict.fromkeys(kinds, 0)
+    errors = 0
+    total_bytes = 0
+    for kind, feed_key, validators, feed_rows, feed_title, feed_label, dashboard in feeds:
+        try:
+            payload = build_ical(feed_rows(), feed_title, feed_label, dashboard)
+            store_ical(
+                feed_key, validators, payload, feed_title, feed_label, dashboard, window
+            )
+        except Exception as e:
+            errors += 1
+            logger.error(f"Failed to materialize feed {feed_key}: {e}")
+            continue
+        built[kind] += 1
+        total_bytes += len(payload)
+        time.sleep(0)  # under gevent, let requests and the worker heartbeat run
+    return {"built": built, "errors": errors, "bytes": total_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild all calendar feeds into the feed cache")
+    parser.add_argument(
+        "--only",
+        default=",".join(FEED_KINDS),
+        help=f"comma-separated feed kinds (default: {','.join(FEED_KINDS)})",
+    )
+    parser.add_argument(
+        "--org", type=int, action="append", default=[], help="org dashboard to build (repeatable)"
+    )
+    parser.add_argument(
+        "--user", action="append", default=[], help="user dashboard to build (repeatable)"
+    )
+    parser.add_argument("--wg", action="store_true", help="build the WG dashboard")
+    args = parser.parse_args()
+    kinds = tuple(k.strip() for k in args.only.split(",") if k.strip())
+    unknown = set(kinds) - set(FEED_KINDS)
+    if unknown:
+        parser.error(f"unknown feed kinds: {', '.join(sorted(unknown))}")
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        if args.org or args.user or args.wg:
+            summary = materialize_dashboards(args.org, args.user, args.wg)
+        else:
+            summary = materialize_feeds(kinds)
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
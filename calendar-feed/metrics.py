@@ -0,0 +1,345 @@
+# calendar-feed/metrics.py
+"""
+Prometheus metrics for the feed service, served by GET /metrics in the text
+exposition format (version 0.0.4).
+
+Recorded per request by app.py (after_request):
+- calfeed_request_duration_seconds{route}        histogram, whole request
+- calfeed_stage_duration_seconds{route,stage}    histogram, from the route's
+  timings dict: token, query, build
+- calfeed_feed_responses_total{route,outcome}    304, cached, built, streamed
+- calfeed_auth_failures_total{route}             401s from feed routes
+
+Read from the components' own counters at scrape time:
+- DB: errors from db/connect.get_conn, pool size/in-use gauges,
+  checkout/wait/timeout counters (pool_stats()) and prepared statement
+  counters (db/prepared.py)
+- payload cache (cache_backend.TieredCache.stats()), hearing fragment
+  cache, feed row sets and the validator cache
+
+Every worker keeps its own numbers, so every sample carries a worker="<pid>"
+label; aggregate across workers with sum by (...) in queries. There is no
+client library dependency: the handful of metric types needed are below.
+"""
+
+import os
+import threading
+from typing import Callable, Iterable, Iterator
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; feed requests range from sub-ms 304s to multi-second cold builds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stages of a feed request recorded by the routes and serve_ical/serve_json (ms)
+STAGES = ("token", "query", "build")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: dict | None = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self, extra: dict) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labelvalues, extra)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values: dict[tuple, list] = {}  # labels -> [bucket counts..., sum]
+        self._lock = threading.Lock()
+
+    def observe(self, *labelvalues, value: float):
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                counts = self._values[labelvalues] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def samples(self, extra: dict) -> Iterator[str]:
+        with self._lock:
+            values = sorted((k, list(v)) for k, v in self._values.items())
+        names = self.labelnames + ("le",)
+        for labelvalues, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels(names, labelvalues + (_number(bound),), extra)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.labelnames, labelvalues, extra)
+            yield f"{self.name}_sum{labels} {_number(counts[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Metrics recorded in-process plus collectors read at scrape time."""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        # Each collector returns (name, kind, help, [(labels dict, value), ...]) tuples
+        self._collectors: list[Callable[[], Iterable[tuple]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[tuple]]):
+        """Register fn (usable as a decorator)."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        extra = {"worker": str(os.getpid())}
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(extra))
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    names = tuple(labels)
+                    lines.append(
+                        f"{name}{_labels(names, tuple(labels.values()), extra)} {_number(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(
+    Histogram(
+        "calfeed_request_duration_seconds",
+        "Feed request duration, until the last byte of the body is sent.",
+        ("route",),
+    )
+)
+stage_duration = registry.register(
+    Histogram(
+        "calfeed_stage_duration_seconds",
+        "Duration of one stage of a feed request (token, query, build).",
+        ("route", "stage"),
+    )
+)
+feed_responses = registry.register(
+    Counter(
+        "calfeed_feed_responses_total",
+        "Feed responses by outcome: 304, cached (payload cache hit), built or streamed (misses).",
+        ("route", "outcome"),
+    )
+)
+auth_failures = registry.register(
+    Counter("calfeed_auth_failures_total", "Feed requests rejected with 401.", ("route",))
+)
+
+
+def observe_request(route: str, status: int, duration: float, timings: dict | None):
+    """Record one finished feed request; timings is the route's timings dict (ms)."""
+    request_duration.observe(route, value=duration)
+    if status == 401:
+        auth_failures.inc(route)
+    if not timings:
+        return
+    if "outcome" in timings:
+        feed_responses.inc(route, timings["outcome"])
+    for stage in STAGES:
+        if stage in timings:
+            stage_duration.observe(route, stage, value=timings[stage] / 1000)
+
+
+# ── Scrape-time collectors ─────────────────────────────────────────────────────
+
+
+@registry.collector
+def _db_metrics():
+    from db import prepared
+    from db.connect import db_error_count, pool_stats
+
+    yield (
+        "calfeed_db_errors_total",
+        "counter",
+        "Transactions in get_conn that failed with a database error.",
+        [({}, db_error_count())],
+    )
+    yield (
+        "calfeed_db_prepared_statements_total",
+        "counter",
+        "Prepared statement operations: PREPAREs, EXECUTEs and fallbacks to plain SQL.",
+        [
+            ({"op": "prepare"}, prepared.stats["prepares"]),
+            ({"op": "execute"}, prepared.stats["executes"]),
+            ({"op": "fallback"}, prepared.stats["fallbacks"]),
+        ],
+    )
+    stats = pool_stats()
+    if stats is None:
+        return
+    yield (
+        "calfeed_db_pool_connections",
+        "gauge",
+        "Open pooled connections by state.",
+        [({"state": "in_use"}, stats["in_use"]), ({"state": "idle"}, stats["idle"])],
+    )
+    yield (
+        "calfeed_db_pool_max_connections",
+        "gauge",
+        "Pool size limit (DB_POOL_MAX).",
+        [({}, stats["maxconn"])],
+    )
+    for key, help in (
+        ("checkouts", "Connections checked out of the pool."),
+        ("waits", "Checkouts that waited for a free connection."),
+        ("timeouts", "Checkouts that gave up waiting (DB_POOL_TIMEOUT)."),
+        ("connects", "Connections opened by the pool."),
+        ("discarded", "Connections dropped after an error or failed health check."),
+    ):
+        yield f"calfeed_db_pool_{key}_total", "counter", help, [({}, stats[key])]
+    yield (
+        "calfeed_db_pool_wait_seconds_total",
+        "counter",
+        "Total time checkouts spent waiting for a connection.",
+        [({}, stats["wait_ms_total"] / 1000)],
+    )
+
+
+@registry.collector
+def _cache_metrics():
+    from extensions import cache
+
+    backend = getattr(cache, "cache", None)
+    if backend is None or not hasattr(backend, "stats"):
+        return
+    stats = backend.stats()
+    yield (
+        "calfeed_cache_lookups_total",
+        "counter",
+        "Payload cache lookups by result: local or shared tier hit, or miss.",
+        [
+            ({"result": "local_hit"}, stats["local_hits"]),
+            ({"result": "shared_hit"}, stats["shared_hits"]),
+            ({"result": "miss"}, stats["misses"]),
+        ],
+    )
+    yield "calfeed_cache_sets_total", "counter", "Payload cache writes.", [({}, stats["sets"])]
+    yield (
+        "calfeed_cache_shared_errors_total",
+        "counter",
+        "Shared cache tier operations that failed (treated as misses).",
+        [({}, stats["shared_errors"])],
+    )
+    yield (
+        "calfeed_cache_local_evictions_total",
+        "counter",
+        "Entries evicted from the worker's local cache tier.",
+        [({}, stats["local_evictions"])],
+    )
+    yield (
+        "calfeed_cache_local_bytes",
+        "gauge",
+        "Bytes held in the worker's local cache tier.",
+        [({}, stats["local"]["bytes"])],
+    )
+    yield (
+        "calfeed_cache_local_items",
+        "gauge",
+        "Entries held in the worker's local cache tier.",
+        [({}, stats["local"]["items"])],
+    )
+
+
+@registry.collector
+def _builder_metrics():
+    from hearing_builder import fragments
+    from invalidation import validators_cache
+    from routes._helpers import row_sets
+
+    yield (
+        "calfeed_fragment_cache_lookups_total",
+        "counter",
+        "Hearing fragment cache lookups by result.",
+        [
+            ({"result": "hit"}, fragments.stats["hits"]),
+            ({"result": "miss"}, fragments.stats["misses"]),
+        ],
+    )
+    yield (
+        "calfeed_fragment_cache_evictions_total",
+        "counter",
+        "Hearing fragments evicted from the cache.",
+        [({}, fragments.stats["evictions"])],
+    )
+    yield "calfeed_fragment_cache_items", "gauge", "Cached hearing fragments.", [({}, len(fragments))]
+    yield (
+        "calfeed_row_set_lookups_total",
+        "counter",
+        "Feed row set lookups by result (rows shared by .ics and JSON builds).",
+        [({"result": "hit"}, row_sets.hits), ({"result": "miss"}, row_sets.misses)],
+    )
+    yield (
+        "calfeed_row_set_items",
+        "gauge",
+        "Cached feed row sets.",
+        [({}, row_sets.snapshot()["items"])],
+    )
+    yield (
+        "calfeed_validator_cache_lookups_total",
+        "counter",
+        "Validator cache lookups by result (only while the change listener is connected).",
+        [
+            ({"result": "hit"}, validators_cache.stats["hits"]),
+            ({"result": "miss"}, validators_cache.stats["misses"]),
+        ],
+    )
+    yield (
+        "calfeed_validator_cache_invalidations_total",
+        "counter",
+        "Cached validators evicted by change notifications.",
+        [({}, validators_cache.stats["invalidations"])],
+    )
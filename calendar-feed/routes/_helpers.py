@@ -1,28 +1,506 @@
-from flask import Response, jsonify
-from ics_builder import build_ical
+import gzip
+import hashlib
+import os
+import time
+import zlib
+from datetime import date, datetime, timezone
+from typing import Callable, Iterable, Iterator
+
+from flask import Response, abort, g, jsonify, request, stream_with_context
+from cache_backend import LocalLRU
+from db.calendar_queries import feed_window
+from extensions import cache
+from hearing_builder import group_hearings
+from ics_builder import build_ical, iter_ical
 from json_builder import build_json
 
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+CACHE_CONTROL = "public, max-age=3600"
+
+# How long the "first seen" time of a feed's current ETag is remembered. Only
+# used to answer If-Modified-Since; a forgotten entry just means one full 200.
+_ETAG_SEEN_TIMEOUT = 7 * 24 * 3600
+
+# Streamed builds (see serve_ical's stream_rows) are off with ICS_STREAMING=false.
+# A streamed payload is still cached if it fits in ICS_STREAM_CACHE_MAX_BYTES;
+# larger ones are re-streamed on every miss, keeping worker memory flat.
+ICS_STREAMING = os.getenv("ICS_STREAMING", "true").lower() == "true"
+_STREAM_CACHE_MAX_BYTES = int(
+    os.getenv("ICS_STREAM_CACHE_MAX_BYTES", str(4 * 1024 * 1024))
+)
+
+# Grouped rows per feed and data version, shared by the .ics and JSON
+# renderings of a feed within a worker (see feed_row_set)
+_ROW_SET_CACHE_SIZE = int(os.getenv("FEED_ROW_SET_CACHE_SIZE", "64"))
+_ROW_SET_TTL = float(os.getenv("FEED_ROW_SET_TTL", "300"))
+
+# Content-Encoding negotiation (see "Compression" below); FEED_COMPRESSION=false
+# sends every feed uncompressed
+FEED_COMPRESSION = os.getenv("FEED_COMPRESSION", "true").lower() == "true"
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 5  # 11 (the default) takes seconds on a large chamber feed
+
+
+# ── Feed window ────────────────────────────────────────────────────────────────
+#
+# ?since=YYYY-MM-DD, ?days_back=N and ?days_ahead=N choose the dates a feed
+# covers (db/calendar_queries.feed_window; defaults FEED_DAYS_BACK and
+# FEED_DAYS_AHEAD). Routes pass the window to the queries and to
+# serve_ical/serve_json, which add it to the feed key, so every window has its
+# own ETag and cache entries.
+
+
+def request_window() -> tuple[date, date]:
+    """The (since, until) window of the current feed request; 400 if malformed."""
+    args = request.args
+    try:
+        since = date.fromisoformat(args["since"]) if args.get("since") else None
+        days_back = int(args["days_back"]) if args.get("days_back") else None
+        days_ahead = int(args["days_ahead"]) if args.get("days_ahead") else None
+    except ValueError:
+        abort(400, description="since must be YYYY-MM-DD; days_back and days_ahead whole days")
+    return feed_window(since, days_back, days_ahead)
+
+
+def window_key(feed_key: str, window: tuple[date, date] | None) -> str:
+    """feed_key qualified by a window, for cache keys and ETags."""
+    if window is None:
+        return feed_key
+    since, until = window
+    return f"{feed_key}@{since.isoformat()}/{until.isoformat()}"
+
+
+# ── Conditional GET ────────────────────────────────────────────────────────────
+#
+# Every feed has a set of validators from db/calendar_queries.get_*_validators
+# (newest updated_at/canceled_at, hearing count, dashboard membership). They
+# are hashed into a strong ETag together with anything else that shapes the
+# body, so an unchanged feed is answered with a 304 — or served from the
+# payload cache, keyed on that ETag — without fetching rows or building.
+#
+# Dashboard removals leave no timestamp behind, so Last-Modified is the time
+# the service first saw the current ETag rather than MAX(updated_at). It is
+# never earlier than the data it covers, and moves whenever the ETag does.
+
+
+def feed_etag(feed_key: str, validators: dict, *extra) -> str:
+    """Unquoted strong ETag for one rendering of a feed at a data version."""
+    parts = [feed_key, *(str(e) for e in extra)]
+    parts += [f"{k}={validators[k]}" for k in sorted(validators)]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+def _last_modified(feed_key: str, etag: str) -> datetime:
+    seen_key = f"etag-seen:{feed_key}"
+    seen = cache.get(seen_key)
+    if seen and seen[0] == etag:
+        return seen[1]
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    cache.set(seen_key, (etag, now), timeout=_ETAG_SEEN_TIMEOUT)
+    return now
+
+
+def _is_not_modified(etag: str, last_modified: datetime) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    # Any encoding of the current version matches: the client can decode it.
+    if request.if_none_match:
+        return any(
+            request.if_none_match.contains_weak(_representation_etag(etag, encoding))
+            for encoding in (None, *ENCODINGS)
+        )
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _set_validators(response: Response, etag: str, last_modified: datetime) -> Response:
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if FEED_COMPRESSION:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def _conditional(
+    feed_key: str, validators: dict, *extra, encoding: str | None = None
+) -> tuple[str, datetime, Response | None]:
+    """
+    Return (etag, last_modified, 304 response or None). The 304 carries the
+    ETag of the encoding the client would be sent now.
+    """
+    etag = feed_etag(feed_key, validators, *extra)
+    last_modified = _last_modified(feed_key, etag)
+    if _is_not_modified(etag, last_modified):
+        response = Response(status=304)
+        return etag, last_modified, _set_validators(
+            response, _representation_etag(etag, encoding), last_modified
+        )
+    return etag, last_modified, None
+
+
+# ── Compression ────────────────────────────────────────────────────────────────
+#
+# Feeds are sent br- or gzip-encoded when the client accepts it (br only if the
+# brotli module is installed). Each encoding is its own representation, with
+# its own strong ETag ("<etag>-gzip"), and every feed response carries
+# Vary: Accept-Encoding so shared caches keep them apart.
+#
+# Encoded bodies are cached next to the raw payload, under
+# "<payload key>:<encoding>", as (raw size, body): a hit serves the stored
+# bytes without recompressing, and the raw size is still known for the log.
+# g.feed_sizes ({"raw": ..., "encoding": ...}) is read by app.py's
+# request-duration log line.
+#
+# Range requests are answered (206) for payloads served from memory; a
+# streamed build is sent whole, as before.
+
+
+def _accepted_encoding() -> str | None:
+    if not FEED_COMPRESSION:
+        return None
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def _representation_etag(etag: str, encoding: str | None) -> str:
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def _compress(payload: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(payload, quality=_BROTLI_QUALITY)
+    return gzip.compress(payload, _GZIP_LEVEL, mtime=0)
+
+
+def _variant_key(payload_key: str, encoding: str) -> str:
+    return f"{payload_key}:{encoding}"
+
+
+def _store_variant(payload_key: str, payload: bytes, encoding: str) -> bytes:
+    body = _compress(payload, encoding)
+    cache.set(_variant_key(payload_key, encoding), (len(payload), body))
+    return body
+
+
+def _note_sizes(raw: int, encoding: str | None) -> dict:
+    g.feed_sizes = {"raw": raw, "encoding": encoding}
+    return g.feed_sizes
+
+
+def _cached_body(payload_key: str, encoding: str | None) -> bytes | None:
+    """The cached payload in the given encoding, encoding it from the raw payload if needed."""
+    if encoding is not None:
+        variant = cache.get(_variant_key(payload_key, encoding))
+        if variant is not None:
+            raw_size, body = variant
+            _note_sizes(raw_size, encoding)
+            return body
+    payload = cache.get(payload_key)
+    if payload is None:
+        return None
+    return _encode_body(payload_key, payload, encoding)
+
+
+def _encode_body(payload_key: str, payload: bytes, encoding: str | None) -> bytes:
+    _note_sizes(len(payload), encoding)
+    if encoding is None:
+        return payload
+    return _store_variant(payload_key, payload, encoding)
+
+
+def _compress_stream(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    """Encode a streamed body as it goes, counting raw bytes into g.feed_sizes."""
+    # Noted before the first chunk: the request log reads g.feed_sizes up front
+    sizes = _note_sizes(0, encoding)
+    return _compressed_chunks(chunks, encoding, sizes)
+
+
+def _compressed_chunks(chunks: Iterator[bytes], encoding: str, sizes: dict) -> Iterator[bytes]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=_BROTLI_QUALITY)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        sizes["raw"] += len(chunk)
+        out = compress(chunk)
+        if out:
+            yield out
+    yield finish()
+
+
+def _finish(response: Response, encoding: str | None) -> Response:
+    """Set Content-Encoding and answer Range requests on an in-memory body."""
+    if encoding is not None:
+        response.content_encoding = encoding
+    if not response.is_streamed:
+        response.make_conditional(
+            request, accept_ranges=True, complete_length=response.calculate_content_length()
+        )
+    return response
+
+
+# ── Feed row sets ──────────────────────────────────────────────────────────────
+#
+# A feed's .ics and JSON renderings are built from the same rows, and the web
+# app tends to ask for one right after a calendar client asked for the other.
+# The first miss fetches and groups the rows; the grouped rows are kept in
+# the worker under the feed's validators, so the other rendering skips both
+# the query and the group_hearings pass. A data change means new validators
+# and so a new key; old entries age out of the LRU (or are evicted, see
+# evict_feeds).
+
+row_sets = LocalLRU(_ROW_SET_CACHE_SIZE, max_bytes=None, ttl=_ROW_SET_TTL)
+
+
+def _row_set_key(feed_key: str, validators: dict) -> str:
+    return f"{feed_key}:{feed_etag(feed_key, validators)}"
+
+
+def feed_row_set(
+    feed_key: str, validators: dict, fetch_rows: Callable[[], list], timings: dict | None = None
+) -> list[tuple[int, list[dict]]]:
+    """
+    group_hearings(fetch_rows()) for a feed at a data version, cached per
+    worker. timings, when given, gets 'query' and 'rows' on a fetch.
+    """
+    key = _row_set_key(feed_key, validators)
+    found, groups = row_sets.get(key)
+    if found:
+        return groups
+
+    start = time.time()
+    rows = fetch_rows()
+    if timings is not None:
+        timings["query"] = (time.time() - start) * 1000
+        timings["rows"] = len(rows)
+    groups = group_hearings(rows)
+    row_sets.put(key, groups, None)
+    return groups
+
+
+def _cached_row_set(feed_key: str, validators: dict) -> list[tuple[int, list[dict]]] | None:
+    return row_sets.get(_row_set_key(feed_key, validators))[1]
+
+
+def _feed_pattern(feed_key: str) -> str:
+    # Every window ("org:7@...") and rendering ("org:7:ics", ...) of a feed key
+    return f"{feed_key}[@:]*"
+
+
+def evict_feeds(feed_keys: Iterable[str] | None = None) -> int:
+    """
+    Drop the cached row sets and payloads (every window, rendering and
+    encoding) of these feed keys ("org:7", "wg", ...), or of every feed if
+    None. Called by invalidation.py when a notification says their data
+    changed: new validators normally mean new keys anyway, and evicting makes
+    sure the old payload is not served again under an unchanged ETag. The
+    shared tier is only searched with redis (TieredCache.delete_patterns).
+    Needs an app context; returns the number of shared payloads deleted.
+    """
+    if feed_keys is None:
+        row_sets.clear()
+        return cache.cache.delete_pattern("feed:*")
+    patterns = [_feed_pattern(feed_key) for feed_key in feed_keys]
+    if not patterns:
+        return 0
+    row_sets.delete_patterns(patterns)
+    return cache.cache.delete_patterns([f"feed:{pattern}" for pattern in patterns])
+
+
+# ── Responses ──────────────────────────────────────────────────────────────────
+
 
 def ical_response(
-    rows: list,
-    feed_title: str,
+    payload: bytes | Iterable[bytes],
     filename: str,
-    feed_label: str = "",
-    dashboard: bool = True
+    etag: str,
+    last_modified: datetime,
+    encoding: str | None = None,
 ) -> Response:
-    """Wrap build_ical output in the correct Flask Response."""
-    payload = build_ical(rows, feed_title, feed_label, dashboard)
-    return Response(
+    """
+    Wrap build_ical output (or iter_ical chunks) in the correct Flask Response.
+    encoding is the Content-Encoding the payload is already in, if any.
+    """
+    response = Response(
         payload,
         mimetype="text/calendar; charset=utf-8",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Cache-Control": "public, max-age=3600",
-        },
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+    _set_validators(response, _representation_etag(etag, encoding), last_modified)
+    return _finish(response, encoding)
+
+
+def json_response(
+    payload: bytes,
+    etag: str,
+    last_modified: datetime,
+    status: int = 200,
+    encoding: str | None = None,
+) -> Response:
+    """Wrap serialized build_json output in a JSON Flask Response (see ical_response)."""
+    response = Response(payload, status=status, mimetype="application/json")
+    _set_validators(response, _representation_etag(etag, encoding), last_modified)
+    return _finish(response, encoding)
+
+
+def _ical_variant(
+    feed_key: str, feed_title: str, feed_label: str, dashboard: bool
+) -> tuple[str, tuple]:
+    """The .ics feed key and the extra ETag inputs for one rendering of a feed."""
+    return f"{feed_key}:ics", (feed_title, feed_label, dashboard)
+
+
+def _payload_key(feed_key: str, etag: str) -> str:
+    return f"feed:{feed_key}:{etag}"
+
+
+def store_ical(
+    feed_key: str,
+    validators: dict,
+    payload: bytes,
+    feed_title: str,
+    feed_label: str = "",
+    dashboard: bool = True,
+    window: tuple[date, date] | None = None,
+) -> str:
+    """
+    Cache a prebuilt .ics payload, and its encoded variants, exactly where
+    serve_ical would look for them (used by the materialize job). Arguments
+    mirror serve_ical; returns the ETag.
+    """
+    feed_key, extra = _ical_variant(
+        window_key(feed_key, window), feed_title, feed_label, dashboard
+    )
+    etag = feed_etag(feed_key, validators, *extra)
+    _last_modified(feed_key, etag)  # records when this ETag was first seen
+    payload_key = _payload_key(feed_key, etag)
+    cache.set(payload_key, payload)
+    if FEED_COMPRESSION:
+        for encoding in ENCODINGS:
+            _store_variant(payload_key, payload, encoding)
+    return etag
+
+
+def serve_ical(
+    feed_key: str,
+    validators: dict,
+    fetch_rows: Callable[[], list],
+    feed_title: str,
+    filename: str,
+    feed_label: str = "",
+    dashboard: bool = True,
+    timings: dict | None = None,
+    stream_rows: Callable[[], Iterable[dict]] | None = None,
+    window: tuple[date, date] | None = None,
+) -> Response:
+    """
+    Serve an .ics feed: 304 if the client's copy is current, the cached
+    payload for the current ETag if there is one, else fetch rows and build.
+
+    fetch_rows is only called on a full build, through the feed's row set
+    (shared with serve_json). When stream_rows is given (an iterable of rows
+    ordered by hearing_id) and ICS_STREAMING is on, a miss without a row set
+    is streamed with iter_ical instead of built in memory.
+
+    The body is br/gzip-encoded if the client accepts it (see "Compression").
+    timings, when given, gets 'outcome' ('304', 'cached', 'built' or
+    'streamed') and, for builds, 'query', 'rows' and 'build'. window is the
+    feed window the validators and rows were loaded for (request_window).
+    """
+    timings = {} if timings is None else timings
+    g.feed_timings = timings  # read by app.py for /metrics
+    feed_key = row_set_key = window_key(feed_key, window)
+    feed_key, extra = _ical_variant(feed_key, feed_title, feed_label, dashboard)
+    encoding = _accepted_encoding()
+    etag, last_modified, not_modified = _conditional(
+        feed_key, validators, *extra, encoding=encoding
     )
+    if not_modified is not None:
+        timings["outcome"] = "304"
+        return not_modified
+
+    payload_key = _payload_key(feed_key, etag)
+    body = _cached_body(payload_key, encoding)
+    if body is not None:
+        timings["outcome"] = "cached"
+    elif (
+        stream_rows is not None
+        and ICS_STREAMING
+        and _cached_row_set(row_set_key, validators) is None
+    ):
+        timings["outcome"] = "streamed"
+        chunks = iter_ical(stream_rows(), feed_title, feed_label, dashboard)
+        chunks = _cache_streamed(chunks, payload_key)
+        if encoding is not None:
+            chunks = _compress_stream(chunks, encoding)
+        body = stream_with_context(chunks)
+    else:
+        groups = feed_row_set(row_set_key, validators, fetch_rows, timings)
+
+        start = time.time()
+        payload = build_ical(None, feed_title, feed_label, dashboard, groups=groups)
+        timings["build"] = (time.time() - start) * 1000
+        timings["outcome"] = "built"
+        cache.set(payload_key, payload)
+        body = _encode_body(payload_key, payload, encoding)
+
+    return ical_response(body, filename, etag, last_modified, encoding)
+
+
+def _cache_streamed(chunks: Iterator[bytes], payload_key: str) -> Iterator[bytes]:
+    """Pass chunks through, caching the whole payload if it stays small enough."""
+    kept = bytearray()
+    for chunk in chunks:
+        if kept is not None:
+            kept += chunk
+            if len(kept) > _STREAM_CACHE_MAX_BYTES:
+                kept = None
+        yield chunk
+    if kept is not None:
+        cache.set(payload_key, bytes(kept))
+
+
+def serve_json(
+    feed_key: str,
+    validators: dict,
+    fetch_rows: Callable[[], list],
+    timings: dict | None = None,
+    window: tuple[date, date] | None = None,
+) -> Response:
+    """
+    Serve a JSON feed like serve_ical: 304 if the client's copy is current,
+    the cached body for the current ETag if there is one, else build from
+    the feed's row set. timings and window as for serve_ical.
+    """
+    timings = {} if timings is None else timings
+    g.feed_timings = timings  # read by app.py for /metrics
+    feed_key = window_key(feed_key, window)
+    json_key = f"{feed_key}:json"
+    encoding = _accepted_encoding()
+    etag, last_modified, not_modified = _conditional(json_key, validators, encoding=encoding)
+    if not_modified is not None:
+        timings["outcome"] = "304"
+        return not_modified
+
+    payload_key = _payload_key(json_key, etag)
+    body = _cached_body(payload_key, encoding)
+    if body is not None:
+        timings["outcome"] = "cached"
+    else:
+        groups = feed_row_set(feed_key, validators, fetch_rows, timings)
 
+        start = time.time()
+        payload = jsonify(build_json(None, groups=groups)).get_data()
+        timings["build"] = (time.time() - start) * 1000
+        timings["outcome"] = "built"
+        cache.set(payload_key, payload)
+        body = _encode_body(payload_key, payload, encoding)
 
-def json_response(hearings: list, status: int = 200) -> Response:
-    """Wrap build_json output in a JSON Flask Response."""
-    payload = build_json(hearings)
-    return jsonify(payload), status
+    return json_response(body, etag, last_modified, encoding=encoding)
@@ -1,26 +1,56 @@
 from flask import Blueprint, current_app
-from extensions import cache
-from db.calendar_queries import get_hearings_for_chamber
-from routes._helpers import ical_response, json_response
+from db.calendar_queries import (
+    get_chamber_validators,
+    get_hearings_for_chamber,
+    stream_hearings_for_chamber,
+)
+from invalidation import feed_validators
+from routes._helpers import request_window, serve_ical, serve_json
 
 bp = Blueprint("chamber", __name__)
 
+# Shared with materialize.py, which prebuilds these feeds into the cache
+FEED_TITLE = "Chamber {chamber_id} - Legislation Tracker"
+
 
 @bp.route("/feed/chamber/<int:chamber_id>")
-@cache.cached(query_string=True)
 def chamber_feed(chamber_id: int):
-    rows = get_hearings_for_chamber(chamber_id)
-    current_app.logger.info(f"Feed served: chamber={chamber_id}, events={len(rows)}")
-    return ical_response(
-        rows,
-        feed_title=f"Chamber {chamber_id} - Legislation Tracker",
+    timings = {}
+    window = request_window()
+    result = serve_ical(
+        f"chamber:{chamber_id}",
+        feed_validators(
+            f"chamber:{chamber_id}",
+            lambda: get_chamber_validators(chamber_id, window),
+            window,
+        ),
+        lambda: get_hearings_for_chamber(chamber_id, grouped=True, window=window),
+        feed_title=FEED_TITLE.format(chamber_id=chamber_id),
         filename=f"chamber_{chamber_id}.ics",
-        dashboard=False
+        dashboard=False,
+        timings=timings,
+        stream_rows=lambda: stream_hearings_for_chamber(
+            chamber_id, grouped=True, window=window
+        ),
+        window=window,
+    )
+    current_app.logger.info(
+        f"Feed served: chamber={chamber_id}, {timings['outcome']}, events={timings.get('rows', '-')}"
     )
+    return result
 
 
 @bp.route("/feed/chamber/<int:chamber_id>/json")
 def chamber_feed_json(chamber_id: int):
-    rows = get_hearings_for_chamber(chamber_id)
-    current_app.logger.info(f"Feed served: chamber={chamber_id}, events={len(rows)}")
-    return json_response(rows)
+    current_app.logger.info(f"Feed served: chamber={chamber_id}")
+    window = request_window()
+    return serve_json(
+        f"chamber:{chamber_id}",
+        feed_validators(
+            f"chamber:{chamber_id}",
+            lambda: get_chamber_validators(chamber_id, window),
+            window,
+        ),
+        lambda: get_hearings_for_chamber(chamber_id, grouped=True, window=window),
+        window=window,
+    )
@@ -1,28 +1,58 @@
 # calendar-feed/routes/committee.py
 
 from flask import Blueprint, current_app
-from extensions import cache
-from db.calendar_queries import get_hearings_for_committee
-from routes._helpers import ical_response, json_response
+from db.calendar_queries import (
+    get_committee_validators,
+    get_hearings_for_committee,
+    stream_hearings_for_committee,
+)
+from invalidation import feed_validators
+from routes._helpers import request_window, serve_ical, serve_json
 
 bp = Blueprint("committee", __name__)
 
+# Shared with materialize.py, which prebuilds these feeds into the cache
+FEED_TITLE = "Committee {committee_id} - Legislation Tracker"
+
 
 @bp.route("/feed/committee/<int:committee_id>")
-@cache.cached(query_string=True)
 def committee_feed(committee_id: int):
-    rows = get_hearings_for_committee(committee_id)
-    current_app.logger.info(f"Feed served: chamber={committee_id}, events={len(rows)}")
-    return ical_response(
-        rows,
-        feed_title=f"Committee {committee_id} - Legislation Tracker",
+    timings = {}
+    window = request_window()
+    result = serve_ical(
+        f"committee:{committee_id}",
+        feed_validators(
+            f"committee:{committee_id}",
+            lambda: get_committee_validators(committee_id, window),
+            window,
+        ),
+        lambda: get_hearings_for_committee(committee_id, grouped=True, window=window),
+        feed_title=FEED_TITLE.format(committee_id=committee_id),
         filename=f"committee_{committee_id}.ics",
-        dashboard=False
+        dashboard=False,
+        timings=timings,
+        stream_rows=lambda: stream_hearings_for_committee(
+            committee_id, grouped=True, window=window
+        ),
+        window=window,
+    )
+    current_app.logger.info(
+        f"Feed served: committee={committee_id}, {timings['outcome']}, events={timings.get('rows', '-')}"
     )
+    return result
 
 
 @bp.route("/feed/committee/<int:committee_id>/json")
 def committee_feed_json(committee_id: int):
-    rows = get_hearings_for_committee(committee_id)
-    current_app.logger.info(f"Feed served: chamber={committee_id}, events={len(rows)}")
-    return json_response(rows)
+    current_app.logger.info(f"Feed served: committee={committee_id}")
+    window = request_window()
+    return serve_json(
+        f"committee:{committee_id}",
+        feed_validators(
+            f"committee:{committee_id}",
+            lambda: get_committee_validators(committee_id, window),
+            window,
+        ),
+        lambda: get_hearings_for_committee(committee_id, grouped=True, window=window),
+        window=window,
+    )
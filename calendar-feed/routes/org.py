@@ -1,52 +1,52 @@
 from flask import Blueprint, abort, current_app, request
-from extensions import cache
-from auth import resolve_org_token
-from db.calendar_queries import get_hearings_for_org, get_name_for_org
-from routes._helpers import ical_response, json_response
+from auth import load_org_feed
+from db.calendar_queries import get_hearings_for_org
+from routes._helpers import request_window, serve_ical, serve_json
 import time
 
 bp = Blueprint("org", __name__)
 
+# Shared with materialize.py, which prebuilds these feeds into the cache
+FEED_TITLE = "{org_name} - Legislation Tracker"
+FEED_LABEL = "ORG"
+
 
 @bp.route("/feed/org/<token>")
-@cache.cached(query_string=True)
 def org_feed(token: str):
     current_app.logger.info(f"🔑 Request URL: {request.url}")
 
     timings = {}
-    
+    window = request_window()
+
+    # Token, org name and validators in one round trip (rows too if uncached)
     start = time.time()
-    org_id = resolve_org_token(token)
+    org, validators, rows = load_org_feed(token, window)
     timings['token'] = (time.time() - start) * 1000
-    if not org_id:
+    if not org:
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
         abort(401)
+    org_name = org["org_name"]
 
-    start = time.time()
-    rows = get_hearings_for_org(org_id)
-    timings['query'] = (time.time() - start) * 1000
-    
-    start = time.time()
-    org_name = get_name_for_org(org_id)
-    timings['name'] = (time.time() - start) * 1000
-
-    start = time.time()
-    result = ical_response(
-        rows,
-        feed_title=f"{org_name} - Legislation Tracker",
+    result = serve_ical(
+        f"org:{org['org_id']}",
+        validators,
+        lambda: rows
+        if rows is not None
+        else get_hearings_for_org(org["org_id"], grouped=True, window=window),
+        feed_title=FEED_TITLE.format(org_name=org_name),
         filename="org_hearings.ics",
-        feed_label="ORG",
+        feed_label=FEED_LABEL,
+        timings=timings,
+        window=window,
     )
-    timings['build'] = (time.time() - start) * 1000
 
     current_app.logger.info(
         (
-            f"Org: {org_name} timings:"
+            f"Org: {org_name} {timings['outcome']} timings:"
             f"token={timings['token']:.0f}ms, "
-            f"query={timings['query']:.0f}ms, "
-            f"rows={len(rows), }"
-            f"name={timings['name']:.0f}ms, "
-            f"build={timings['build']:.0f}ms, "
+            f"query={timings.get('query', 0):.0f}ms, "
+            f"rows={timings.get('rows', '-')}, "
+            f"build={timings.get('build', 0):.0f}ms, "
         )
     )
     return result
@@ -55,11 +55,18 @@ def org_feed(token: str):
 @bp.route("/feed/org/<token>/json")
 def user_feed_json(token: str):
     """JSON endpoint for web app consumption."""
-    org_id = resolve_org_token(token)
-    if not org_id:
+    window = request_window()
+    org, validators, rows = load_org_feed(token, window)
+    if not org:
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
         abort(401)
 
-    rows = get_hearings_for_org(org_id)
-    current_app.logger.info(f"Feed served: org={org_id}, events={len(rows)}")
-    return json_response(rows)
+    current_app.logger.info(f"Feed served: org={org['org_id']}")
+    return serve_json(
+        f"org:{org['org_id']}",
+        validators,
+        lambda: rows
+        if rows is not None
+        else get_hearings_for_org(org["org_id"], grouped=True, window=window),
+        window=window,
+    )
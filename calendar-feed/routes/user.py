@@ -1,46 +1,48 @@
 from flask import Blueprint, abort, current_app, request
-from extensions import cache
-from auth import resolve_user_token
+from auth import load_user_feed
 from db.calendar_queries import get_hearings_for_user
-from routes._helpers import ical_response, json_response
+from routes._helpers import request_window, serve_ical, serve_json
 import time
 
 bp = Blueprint("user", __name__)
 
+# Shared with materialize.py, which prebuilds these feeds into the cache
+FEED_TITLE = "My Dashboard - Legislation Tracker"
+
 
 @bp.route("/feed/user/<token>")
-@cache.cached(query_string=True)
 def user_feed(token: str):
     current_app.logger.info(f"🔑 Request URL: {request.url}")
 
     timings = {}
-    
+    window = request_window()
+
+    # Token and validators in one round trip (rows too if uncached)
     start = time.time()
-    user = resolve_user_token(token)
+    user, validators, rows = load_user_feed(token, window)
     timings['token'] = (time.time() - start) * 1000
     if not user:
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
         abort(401)
 
-    start = time.time()
-    rows = get_hearings_for_user(user["email"])
-    timings['query'] = (time.time() - start) * 1000
-    # current_app.logger.info(f"Feed served: user={user["email"]}, events={len(rows)}")
-    
-    start = time.time()
-    result = ical_response(
-        rows,
-        feed_title="My Dashboard - Legislation Tracker",
+    result = serve_ical(
+        f"user:{user['email']}",
+        validators,
+        lambda: rows
+        if rows is not None
+        else get_hearings_for_user(user["email"], grouped=True, window=window),
+        feed_title=FEED_TITLE,
         filename="my_hearings.ics",
+        timings=timings,
+        window=window,
     )
-    timings['build'] = (time.time() - start) * 1000
     current_app.logger.info(
         (
-            f"User: {user["email"][:20]} timings:"
+            f"User: {user['email'][:20]} {timings['outcome']} timings:"
             f"token={timings['token']:.0f}ms, "
-            f"query={timings['query']:.0f}ms, "
-            f"rows={len(rows), }"
-            f"build={timings['build']:.0f}ms, "
+            f"query={timings.get('query', 0):.0f}ms, "
+            f"rows={timings.get('rows', '-')}, "
+            f"build={timings.get('build', 0):.0f}ms, "
         )
     )
     return result
@@ -48,11 +50,18 @@ def user_feed(token: str):
 @bp.route("/feed/user/<token>/json")
 def user_feed_json(token: str):
     """JSON endpoint for web app consumption."""
-    user = resolve_user_token(token)
+    window = request_window()
+    user, validators, rows = load_user_feed(token, window)
     if not user:
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
         abort(401)
 
-    rows = get_hearings_for_user(user["email"])
-    current_app.logger.info(f"Feed served: user={user["email"]}, events={len(rows)}")
-    return json_response(rows)
+    current_app.logger.info(f"Feed served: user={user['email']}")
+    return serve_json(
+        f"user:{user['email']}",
+        validators,
+        lambda: rows
+        if rows is not None
+        else get_hearings_for_user(user["email"], grouped=True, window=window),
+        window=window,
+    )
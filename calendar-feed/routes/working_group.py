@@ -1,22 +1,27 @@
 from flask import Blueprint, abort, current_app, request
-from extensions import cache
-from auth import resolve_user_token
+from auth import load_wg_feed
 from db.calendar_queries import get_hearings_for_wg
-from routes._helpers import ical_response, json_response
+from routes._helpers import request_window, serve_ical, serve_json
 import time
 
 bp = Blueprint("working_group", __name__)
 
+# Shared with materialize.py, which prebuilds these feeds into the cache
+FEED_TITLE = "AI Working Group - Legislation Tracker"
+FEED_LABEL = "AI-WG"
+
 
 @bp.route("/feed/working-group/<token>")
-@cache.cached(query_string=True)
 def working_group_feed(token: str):
     current_app.logger.info(f"🔑 Request URL: {request.url}")
 
     timings = {}
-    
+    window = request_window()
+
+    # Token and validators in one round trip (rows too if uncached); nothing
+    # beyond the token lookup runs for non-members
     start = time.time()
-    user = resolve_user_token(token)
+    user, validators, rows = load_wg_feed(token, window)
     timings['token'] = (time.time() - start) * 1000
     if not user:
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
@@ -25,26 +30,23 @@ def working_group_feed(token: str):
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
         abort(403)
 
-    start = time.time()
-    rows = get_hearings_for_wg()
-    timings['query'] = (time.time() - start) * 1000
-    # current_app.logger.info(f"Feed served: user={user["email"]}, events={len(rows)}")
-    
-    start = time.time()
-    result = ical_response(
-        rows,
-        feed_title="AI Working Group - Legislation Tracker",
+    result = serve_ical(
+        "wg",
+        validators,
+        lambda: rows if rows is not None else get_hearings_for_wg(grouped=True, window=window),
+        feed_title=FEED_TITLE,
         filename="working_group_hearings.ics",
-        feed_label="AI-WG",
+        feed_label=FEED_LABEL,
+        timings=timings,
+        window=window,
     )
-    timings['build'] = (time.time() - start) * 1000
     current_app.logger.info(
         (
-            f"User: {user["email"][:20]} timings:"
+            f"User: {user['email'][:20]} {timings['outcome']} timings:"
             f"token={timings['token']:.0f}ms, "
-            f"query={timings['query']:.0f}ms, "
-            f"rows={len(rows), }"
-            f"build={timings['build']:.0f}ms, "
+            f"query={timings.get('query', 0):.0f}ms, "
+            f"rows={timings.get('rows', '-')}, "
+            f"build={timings.get('build', 0):.0f}ms, "
         )
     )
     return result
@@ -52,7 +54,8 @@ def working_group_feed(token: str):
 
 @bp.route("/feed/working-group/<token>/json")
 def working_group_feed_json(token: str):
-    user = resolve_user_token(token)
+    window = request_window()
+    user, validators, rows = load_wg_feed(token, window)
     if not user:
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
         abort(401)
@@ -60,6 +63,10 @@ def working_group_feed_json(token: str):
         current_app.logger.warning(f"Auth failed: token={token[:8]}...")
         abort(403)
 
-    rows = get_hearings_for_wg()
-    current_app.logger.info(f"Feed served: user={user["email"]}, events={len(rows)}")
-    return json_response(rows)
+    current_app.logger.info(f"Feed served: user={user['email']}")
+    return serve_json(
+        "wg",
+        validators,
+        lambda: rows if rows is not None else get_hearings_for_wg(grouped=True, window=window),
+        window=window,
+    )
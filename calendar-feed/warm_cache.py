@@ -1,8 +1,39 @@
-import requests
+"""
+Warms the feed cache over HTTP by requesting every user, WG and org feed.
+
+    python warm_cache.py                         # all feeds against localhost:5000
+    python warm_cache.py --workers 16 --retries 3
+    python warm_cache.py --dry-run               # token counts only, no requests
+    python warm_cache.py --json summary.json     # also write the JSON summary to a file
+    python warm_cache.py --verify                # ...then check each warmed ETag
+
+materialize.py prebuilds the same feeds without going through HTTP; this
+script stays useful for warming a remote service or for exercising the full
+request path.
+
+A warm request usually finds its token uncached, so the service loads the
+feed with the single-round-trip get_*_feed_by_token query; later polls find
+the token cached and go through get_*_validators. --verify re-requests every
+warmed feed with If-None-Match and counts anything but a 304 as a mismatch
+between the two (benchmarks/check_feed_paths.py compares them directly).
+"""
+
+import argparse
+import json
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
 from db.connect import get_conn
 
+# Latency histogram bucket upper bounds, in ms (the last bucket is open-ended)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 
 def get_all_tokens():
     """Fetch ALL user and org feed tokens from database with debug info"""
@@ -35,47 +66,222 @@ def get_all_tokens():
     return users, orgs
 
 
-def warm_endpoint(endpoint_type, name, url):
+def build_urls(users, orgs, base_url: str) -> list[tuple[str, str, str]]:
+    """(endpoint_type, name, url) for EVERY user, WG member and org feed."""
+    urls = []
+    for token, email, is_wg in users:
+        urls.append(("User", email, f"{base_url}/feed/user/{token}"))
+        if (is_wg or "").strip().lower() == "yes":
+            urls.append(("WG", email, f"{base_url}/feed/working-group/{token}"))
+    for token, name in orgs:
+        urls.append(("Org", name, f"{base_url}/feed/org/{token}"))
+    return urls
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """Session with a keep-alive connection pool sized for the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def warm_endpoint(session, endpoint_type, name, url, timeout, retries, backoff) -> dict:
+    """
+    GET one feed, retrying connection errors and 429/5xx responses with
+    exponential backoff plus jitter. Returns a result record for the summary.
+    """
+    attempt = 0
+    start = time.perf_counter()
+    while True:
+        attempt += 1
+        error = None
+        status = None
+        etag = None
+        try:
+            resp = session.get(url, timeout=timeout)
+            status = resp.status_code
+            etag = resp.headers.get("ETag")
+        except requests.RequestException as e:
+            error = str(e)
+
+        retryable = error is not None or status in RETRY_STATUSES
+        if not retryable or attempt > retries:
+            break
+        time.sleep(backoff * 2 ** (attempt - 1) * (1 + random.random()))
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    ok = status == 200
+    if ok:
+        print(f"✓ {endpoint_type}: {name[:30]}... ({latency_ms:.0f}ms)")
+    else:
+        print(f"✗ {endpoint_type}: {name[:30]}... ({error or status})")
+    return {
+        "endpoint": endpoint_type,
+        "name": name,
+        "url": url,
+        "etag": etag if ok else None,
+        "ok": ok,
+        "status": status,
+        "attempts": attempt,
+        "latency_ms": latency_ms,
+        "error": error,
+    }
+
+
+def verify_endpoint(session, result: dict, timeout) -> str:
+    """
+    Re-request a warmed feed with its ETag. Returns "match" (304), "mismatch"
+    (200 with another ETag) or "error".
+    """
     try:
-        resp = requests.get(url, timeout=30)
-        if resp.status_code == 200:
-            print(f"✓ {endpoint_type}: {name[:30]}...")
-            return 1
+        resp = session.get(result["url"], headers={"If-None-Match": result["etag"]}, timeout=timeout)
+    except requests.RequestException:
+        return "error"
+    if resp.status_code == 304:
+        return "match"
+    if resp.status_code == 200:
+        print(
+            f"≠ {result['endpoint']}: {result['name'][:30]}... "
+            f"warmed {result['etag']}, now {resp.headers.get('ETag')}"
+        )
+        return "mismatch"
+    return "error"
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _histogram(latencies: list[float]) -> dict[str, int]:
+    counts = {f"<={b}ms": 0 for b in LATENCY_BUCKETS_MS}
+    counts[f">{LATENCY_BUCKETS_MS[-1]}ms"] = 0
+    for ms in latencies:
+        for bound in LATENCY_BUCKETS_MS:
+            if ms <= bound:
+                counts[f"<={bound}ms"] += 1
+                break
         else:
-            print(f"✗ {endpoint_type}: {name[:30]}... ({resp.status_code})")
-    except Exception as e:
-        print(f"✗ {endpoint_type}: {name[:30]}... ({e})")
-    return 0
+            counts[f">{LATENCY_BUCKETS_MS[-1]}ms"] += 1
+    return counts
+
+
+def summarize(results: list[dict], elapsed: float) -> dict:
+    """Machine-readable summary: totals plus per-endpoint latency stats and histogram."""
+    endpoints = {}
+    for endpoint_type in sorted({r["endpoint"] for r in results}):
+        subset = [r for r in results if r["endpoint"] == endpoint_type]
+        latencies = [r["latency_ms"] for r in subset]
+        endpoints[endpoint_type] = {
+            "requests": len(subset),
+            "ok": sum(r["ok"] for r in subset),
+            "failed": sum(not r["ok"] for r in subset),
+            "retried": sum(r["attempts"] > 1 for r in subset),
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "max_ms": max(latencies),
+            "histogram": _histogram(latencies),
+        }
+    return {
+        "requests": len(results),
+        "warmed": sum(r["ok"] for r in results),
+        "failed": sum(not r["ok"] for r in results),
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_s": round(len(results) / elapsed, 1) if elapsed else None,
+        "endpoints": endpoints,
+    }
+
+
+def print_histograms(summary: dict):
+    for endpoint_type, stats in summary["endpoints"].items():
+        print(
+            f"\n{endpoint_type}: {stats['ok']}/{stats['requests']} ok, "
+            f"p50={stats['p50_ms']:.0f}ms p95={stats['p95_ms']:.0f}ms max={stats['max_ms']:.0f}ms"
+        )
+        peak = max(stats["histogram"].values()) or 1
+        for bucket, count in stats["histogram"].items():
+            print(f"  {bucket:>9} {count:6d} {'#' * round(40 * count / peak)}")
 
 
-def warm_cache():
+def warm_cache(
+    base_url: str = "http://localhost:5000",
+    workers: int = 8,
+    retries: int = 2,
+    backoff: float = 0.5,
+    timeout: float = 30,
+    dry_run: bool = False,
+    verify: bool = False,
+) -> dict:
     print("Fetching ALL feed tokens from database...")
     users, orgs = get_all_tokens()
-    print(f"Warming cache for {len(users)} users and {len(orgs)} orgs")
+    urls = build_urls(users, orgs, base_url)
+    wg_count = sum(1 for endpoint_type, _, _ in urls if endpoint_type == "WG")
+    print(f"Found {len(users)} users ({wg_count} WG members) and {len(orgs)} orgs")
+
+    if dry_run:
+        return {"dry_run": True, "users": len(users), "wg_members": wg_count, "orgs": len(orgs)}
+
+    print(f"Warming {len(urls)} feeds with {workers} workers")
     print(f"Started at: {datetime.now().strftime('%H:%M:%S')}")
 
     start = time.time()
-    warmed = 0
+    session = make_session(workers)
 
-    base_url = "http://localhost:5000"
-    # Build URLs for EVERY user and org
-    urls = []
+    def warm(entry):
+        return warm_endpoint(session, *entry, timeout, retries, backoff)
 
-    for token, email, is_wg in users:
-        user_url = f"{base_url}/feed/user/{token}"
-        warmed += warm_endpoint("User", email, user_url)
-        if is_wg == "yes":
-            wg_url = f"{base_url}/feed/working-group/{token}"
-            warmed += warm_endpoint("WG", email, wg_url)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(warm, urls))
+    elapsed = time.time() - start
+    summary = summarize(results, elapsed)
 
-    for token, name in orgs:
-        url = f"{base_url}/feed/org/{token}"
-        warmed += warm_endpoint("Org", name, url)
+    if verify:
+        warmed = [r for r in results if r["etag"]]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(lambda r: verify_endpoint(session, r, timeout), warmed))
+        summary["verify"] = {o: outcomes.count(o) for o in ("match", "mismatch", "error")}
+    session.close()
 
-    elapsed = time.time() - start
     print(f"\nFinished at: {datetime.now().strftime('%H:%M:%S')}")
-    print(f"Warmed {warmed} endpoints in {elapsed:.1f}s")
+    print(f"Warmed {summary['warmed']}/{len(urls)} endpoints in {elapsed:.1f}s")
+    if verify:
+        v = summary["verify"]
+        print(f"Verified ETags: {v['match']} match, {v['mismatch']} mismatch, {v['error']} errors")
+    print_histograms(summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the calendar feed cache over HTTP")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--retries", type=int, default=2, help="retries per feed on errors/5xx")
+    parser.add_argument("--backoff", type=float, default=0.5, help="first retry delay, seconds")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout, seconds")
+    parser.add_argument("--dry-run", action="store_true", help="only report token counts")
+    parser.add_argument("--json", metavar="PATH", help="also write the JSON summary here")
+    parser.add_argument("--verify", action="store_true",
+                        help="re-request each warmed feed with If-None-Match; expect 304")
+    args = parser.parse_args()
+
+    summary = warm_cache(
+        base_url=args.base_url.rstrip("/"),
+        workers=args.workers,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout,
+        dry_run=args.dry_run,
+        verify=args.verify,
+    )
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
 
 
 if __name__ == "__main__":
-    warm_cache()
+    main()
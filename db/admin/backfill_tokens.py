@@ -22,7 +22,7 @@ import sys
 from psycopg2.extras import RealDictCursor
 
 from db.connect import get_conn
-from db.tokens import generate_user_token, generate_org_token
+from db.tokens import TOKEN_ROTATED_CHANNEL, generate_user_token, generate_org_token
 
 
 def _clear_all_tokens(conn):
@@ -34,6 +34,7 @@ def _clear_all_tokens(conn):
         cur.execute(
             "UPDATE auth.approved_organizations SET feed_token = NULL, feed_token_hash = NULL, feed_token_created_at = NULL"
         )
+        cur.execute("SELECT pg_notify(%s, '*')", (TOKEN_ROTATED_CHANNEL,))
     conn.commit()
     print("  Done.")
 
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+db/admin/explain_feed_queries.py
+
+Query-plan regression check for the calendar feed queries. Runs every
+per-request query function in db.calendar_queries against a seeded database,
+EXPLAINs each statement it executes (the exact SQL and parameters), and
+fails if any plan reads a large table with a sequential scan.
+
+By default the planner runs with enable_seqscan off, so a remaining Seq Scan
+means no index can serve that access path (a missing index or a predicate
+that cannot use one), independent of table sizes and statistics. --natural
+keeps the planner's own choices, for checking plans against a production-
+sized copy.
+
+A table is "large" when pg_class.reltuples >= --min-rows; tables never
+ANALYZEd count as large. The whole-table loads of load_feed_snapshot
+(materialize.py) are not checked.
+
+Needs a database with the feed tables and data, e.g. one seeded by the load
+test (calendar-feed: python -m benchmarks.load_test --db postgres --seed-db,
+whose schema includes the indexes of db/migrations/010), or a restored copy
+of legtracker_2026. Only reads; connects like db.connect (DB_* / credentials.ini).
+
+Usage:
+    python -m db.admin.explain_feed_queries                          # check all feed queries
+    python -m db.admin.explain_feed_queries --since 2026-04-01       # feed window start
+    python -m db.admin.explain_feed_queries --natural --min-rows 50000
+    python -m db.admin.explain_feed_queries --plans                  # print every plan
+"""
+
+import argparse
+import sys
+from contextlib import contextmanager
+from datetime import date
+from unittest import mock
+
+from psycopg2.extras import RealDictCursor
+
+from db import calendar_queries as q
+from db.connect import get_conn
+
+_SCHEMAS = ("snapshot", "app", "auth")
+
+
+class _ExplainingCursor:
+    """Cursor wrapper that EXPLAINs each SELECT before executing it."""
+
+    def __init__(self, cur, conn, plans: list):
+        object.__setattr__(self, "_cur", cur)
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_plans", plans)
+
+    def execute(self, sql, params=None):
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            with self._conn.cursor() as explain:
+                explain.execute("EXPLAIN (FORMAT JSON, VERBOSE) " + sql, params)
+                self._plans.append(explain.fetchone()[0][0]["Plan"])
+        return self._cur.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __setattr__(self, name, value):  # e.g. itersize on named cursors
+        setattr(self._cur, name, value)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        self._cur.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cur.__exit__(*exc)
+
+
+class _ExplainingConn:
+    def __init__(self, conn, plans: list):
+        self._conn = conn
+        self._plans = plans
+
+    def cursor(self, *args, **kwargs):
+        return _ExplainingCursor(self._conn.cursor(*args, **kwargs), self._conn, self._plans)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _explaining_get_conn(plans: list, natural: bool):
+    @contextmanager
+    def explaining_get_conn(**kwargs):
+        with get_conn(**kwargs) as conn:
+            if not natural:
+                with conn.cursor() as cur:
+                    cur.execute("SET enable_seqscan = off")
+            try:
+                yield _ExplainingConn(conn, plans)
+            finally:
+                if not natural and not conn.closed:
+                    conn.rollback()
+                    with conn.cursor() as cur:
+                        cur.execute("RESET enable_seqscan")
+    return explaining_get_conn
+
+
+def _table_rows(conn) -> dict:
+    """schema.table -> reltuples (-1 if never ANALYZEd)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT n.nspname || '.' || c.relname, c.reltuples::bigint
+              FROM pg_class c
+              JOIN pg_namespace n ON n.oid = c.relnamespace
+             WHERE c.relkind IN ('r', 'm', 'p')
+               AND n.nspname = ANY(%s)
+            """,
+            (list(_SCHEMAS),),
+        )
+        return dict(cur.fetchall())
+
+
+def _samples(conn, window: tuple[date, date]) -> dict:
+    """One chamber, committee, org, user and WG member with data in the window."""
+    since, until = window
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            """
+            SELECT chamber_id, committee_id FROM snapshot.hearings
+             WHERE date >= %s AND date < %s
+               AND chamber_id IS NOT NULL AND committee_id IS NOT NULL
+             LIMIT 1
+            """,
+            (since, until),
+        )
+        hearing = cur.fetchone() or {}
+        cur.execute(
+            """
+            SELECT o.id, o.feed_token_hash
+              FROM auth.approved_organizations o
+             WHERE o.feed_token_hash IS NOT NULL
+               AND EXISTS (SELECT 1 FROM app.org_bill_dashboard d WHERE d.org_id = o.id)
+             LIMIT 1
+            """
+        )
+        org = cur.fetchone() or {}
+        cur.execute(
+            """
+            SELECT u.email, u.feed_token_hash
+              FROM auth.approved_users u
+             WHERE u.feed_token_hash IS NOT NULL
+               AND EXISTS (SELECT 1 FROM app.user_bill_dashboard d WHERE d.user_email = u.email)
+             LIMIT 1
+            """
+        )
+        user = cur.fetchone() or {}
+        cur.execute(
+            """
+            SELECT feed_token_hash FROM auth.approved_users
+             WHERE feed_token_hash IS NOT NULL
+               AND LOWER(BTRIM(COALESCE(ai_working_group, ''))) = 'yes'
+             LIMIT 1
+            """
+        )
+        wg = cur.fetchone() or {}
+    return {
+        "chamber_id": hearing.get("chamber_id"),
+        "committee_id": hearing.get("committee_id"),
+        "org_id": org.get("id"),
+        "org_token_hash": org.get("feed_token_hash"),
+        "user_email": user.get("email"),
+        "user_token_hash": user.get("feed_token_hash"),
+        "wg_token_hash": wg.get("feed_token_hash"),
+    }
+
+
+def _cases(s: dict, window: tuple[date, date]) -> list:
+    """(name, sample keys needed, zero-argument call) for every checked query."""
+    w = {"window": window}
+    cases = [
+        ("get_chamber_validators", ("chamber_id",), lambda: q.get_chamber_validators(s["chamber_id"], **w)),
+        ("get_committee_validators", ("committee_id",), lambda: q.get_committee_validators(s["committee_id"], **w)),
+        ("get_org_validators", ("org_id",), lambda: q.get_org_validators(s["org_id"], **w)),
+        ("get_user_validators", ("user_email",), lambda: q.get_user_validators(s["user_email"], **w)),
+        ("get_wg_validators", (), lambda: q.get_wg_validators(**w)),
+        (
+            "get_hearings_for_dashboards", ("org_id", "user_email"),
+            lambda: q.get_hearings_for_dashboards([s["org_id"]], [s["user_email"]], True, **w),
+        ),
+    ]
+    for grouped in (False, True):
+        g = {"grouped": grouped, **w}
+        suffix = " (grouped)" if grouped else ""
+        cases += [
+            (f"get_hearings_for_chamber{suffix}", ("chamber_id",), lambda g=g: q.get_hearings_for_chamber(s["chamber_id"], **g)),
+            (f"get_hearings_for_committee{suffix}", ("committee_id",), lambda g=g: q.get_hearings_for_committee(s["committee_id"], **g)),
+            (f"stream_hearings_for_chamber{suffix}", ("chamber_id",), lambda g=g: list(q.stream_hearings_for_chamber(s["chamber_id"], **g))),
+            (f"stream_hearings_for_committee{suffix}", ("committee_id",), lambda g=g: list(q.stream_hearings_for_committee(s["committee_id"], **g))),
+            (f"get_hearings_for_org{suffix}", ("org_id",), lambda g=g: q.get_hearings_for_org(s["org_id"], **g)),
+            (f"get_hearings_for_user{suffix}", ("user_email",), lambda g=g: q.get_hearings_for_user(s["user_email"], **g)),
+            (f"get_hearings_for_wg{suffix}", (), lambda g=g: q.get_hearings_for_wg(**g)),
+            (f"get_org_feed_by_token{suffix}", ("org_token_hash",), lambda g=g: q.get_org_feed_by_token(s["org_token_hash"], **g)),
+            (f"get_user_feed_by_token{suffix}", ("user_token_hash",), lambda g=g: q.get_user_feed_by_token(s["user_token_hash"], **g)),
+            (f"get_wg_feed_by_token{suffix}", ("wg_token_hash",), lambda g=g: q.get_wg_feed_by_token(s["wg_token_hash"], **g)),
+        ]
+    return cases
+
+
+def _nodes(plan: dict, depth: int = 0):
+    yield depth, plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child, depth + 1)
+
+
+def _relation(node: dict) -> str:
+    return f"{node.get('Schema', '?')}.{node['Relation Name']}"
+
+
+def _describe(node: dict) -> str:
+    text = node["Node Type"]
+    if "Relation Name" in node:
+        text += f" on {_relation(node)}"
+    if "Index Name" in node:
+        text += f" using {node['Index Name']}"
+    return text
+
+
+def _print_plan(plan: dict):
+    for depth, node in _nodes(plan):
+        print(f"      {'  ' * depth}{_describe(node)}")
+
+
+def _large_seq_scans(plan: dict, table_rows: dict, min_rows: int) -> list[str]:
+    found = []
+    for _, node in _nodes(plan):
+        if node["Node Type"] != "Seq Scan":
+            continue
+        relation = _relation(node)
+        rows = table_rows.get(relation, -1)
+        if rows < 0 or rows >= min_rows:
+            found.append(f"{relation} ({'never analyzed' if rows < 0 else f'~{rows} rows'})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a feed query plan seq-scans a large table")
+    parser.add_argument("--since", type=date.fromisoformat, help="feed window start (default: feed_window())")
+    parser.add_argument("--min-rows", type=int, default=1000, help="tables at least this big count as large")
+    parser.add_argument("--natural", action="store_true", help="keep enable_seqscan on")
+    parser.add_argument("--plans", action="store_true", help="print every plan, not only failing ones")
+    args = parser.parse_args()
+
+    window = q.feed_window(since=args.since)
+    with get_conn() as conn:
+        table_rows = _table_rows(conn)
+        samples = _samples(conn, window)
+
+    print(f"\n-- Feed query plans (window {window[0]} .. {window[1]}, "
+          f"{'natural' if args.natural else 'enable_seqscan off'}, large >= {args.min_rows} rows) ---")
+    failures, skipped = 0, 0
+    for name, needs, call in _cases(samples, window):
+        missing = [k for k in needs if samples[k] is None]
+        if missing:
+            print(f"  [SKIP] {name}: no sample {', '.join(missing)}")
+            skipped += 1
+            continue
+        plans = []
+        with mock.patch.object(q, "get_conn", _explaining_get_conn(plans, args.natural)):
+            call()
+        scans = [scan for plan in plans for scan in _large_seq_scans(plan, table_rows, args.min_rows)]
+        if scans:
+            failures += 1
+            print(f"  [SEQ] {name}: {'; '.join(scans)}")
+        else:
+            print(f"  [OK] {name}")
+        if scans or args.plans:
+            for plan in plans:
+                _print_plan(plan)
+
+    print(f"\n{failures} query function(s) with large sequential scans, {skipped} skipped.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
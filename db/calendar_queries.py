@@ -1,12 +1,19 @@
 # db/calendar_queries.py
 
+import os
+from datetime import date, timedelta
+from typing import Callable, Iterator
+
 from psycopg2.extras import RealDictCursor
+from db import prepared
 from db.connect import get_conn
 
 # ── Shared SQL fragments ───────────────────────────────────────────────────────
 
 _FUTURE_ONLY = "h.date >= CURRENT_DATE"  # For getting future only events
-_ALL_TIME = "h.date >= '2026-04-01'"  # For getting all events from this season, including past ones (but starting from specific date)
+# Feed hearings: a [since, until) date window (see feed_window), bound as
+# parameters so the predicate is a plain range on h.date
+_WINDOW = "h.date >= %(since)s AND h.date < %(until)s"
 _ORDER = "ORDER BY h.date, h.time_normalized NULLS LAST"
 
 # Core SELECT for chamber/committee feeds — no dashboard context, no deadlines.
@@ -84,7 +91,8 @@ _DASHBOARD_SELECT_BASE = """
 """
 
 # Extended template with org_position (for org feeds only)
-# NOTE: placeholder for org_id included at the end of the template, needs to be resolved
+# NOTE: {org_id} slot at the end of the template is formatted in by _ORG_FEED —
+# either a %(org_id)s placeholder or a column reference from the token CTE.
 _DASHBOARD_SELECT_WITH_CUSTOM = """
     SELECT
         h.hearing_id,
@@ -120,9 +128,69 @@ _DASHBOARD_SELECT_WITH_CUSTOM = """
     LEFT JOIN snapshot.hearing_bills     hb ON hb.hearing_id = h.hearing_id
     LEFT JOIN app.bills_mv               b ON b.openstates_bill_id = hb.openstates_bill_id
     LEFT JOIN app.bill_custom_details    bcd ON bcd.openstates_bill_id = hb.openstates_bill_id
-                                            AND bcd.last_updated_org_id = %s
+                                            AND bcd.last_updated_org_id = {org_id}
+"""
+
+# Grouped mode (grouped=True on the feed queries): one row per hearing, in
+# hearing_id order, instead of one per hearing × bill × deadline. Hearing
+# columns are sent once; the agenda comes as a `bills` JSON array ordered by
+# file_order and the deadlines as parallel `deadline_dates`/`deadline_types`
+# arrays. hearing_builder.group_hearings/iter_hearing_groups expand these rows
+# in query order without re-sorting. {bill_fields} adds dashboard columns to
+# each bill object and {bill_joins} their joins, exactly as in the flat
+# SELECTs above.
+_GROUPED_ORDER = "ORDER BY h.hearing_id"
+
+_GROUPED_SELECT = """
+    SELECT
+        h.hearing_id,
+        h.name              AS hearing_name,
+        h.date              AS hearing_date,
+        h.time_verbatim     AS hearing_time_verbatim,
+        h.time_normalized   AS hearing_time,
+        h.is_allday,
+        h.location          AS hearing_location,
+        h.room              AS hearing_room,
+        h.notes,
+        h.chamber_id,
+        h.committee_id,
+        h.updated_at,
+        h.canceled_at,
+        c.webpage_link      AS committee_webpage,
+        dl.deadline_dates,
+        dl.deadline_types,
+        COALESCE(bl.bills, '[]'::json) AS bills
+    FROM snapshot.hearings h
+    LEFT JOIN snapshot.committee c ON c.committee_id = h.committee_id
+    LEFT JOIN LATERAL (
+        SELECT array_agg(hd.deadline_date ORDER BY hd.deadline_date, hd.deadline_type) AS deadline_dates,
+               array_agg(hd.deadline_type ORDER BY hd.deadline_date, hd.deadline_type) AS deadline_types
+          FROM snapshot.hearing_deadlines hd
+         WHERE hd.hearing_id = h.hearing_id
+    ) dl ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'openstates_bill_id', b.openstates_bill_id,
+                   'bill_number',        b.bill_number,
+                   'bill_name',          b.bill_name,
+                   'bill_author',        b.author,
+                   'file_order',         hb.file_order,
+                   'footnote',           hb.footnote,
+                   'footnote_symbol',    hb.footnote_symbol{bill_fields}
+               ) ORDER BY hb.file_order) AS bills
+          FROM snapshot.hearing_bills hb
+          LEFT JOIN app.bills_mv b ON b.openstates_bill_id = hb.openstates_bill_id
+          {bill_joins}
+         WHERE hb.hearing_id = h.hearing_id
+    ) bl ON TRUE
 """
 
+_FEED_SELECT_GROUPED = _GROUPED_SELECT.format(bill_fields="", bill_joins="")
+
+_ON_DASHBOARD_FIELD = """,
+                   'on_dashboard',       dash.openstates_bill_id IS NOT NULL"""
+
+
 # ── Page queries (Streamlit) ───────────────────────────────────────────────────
 
 
@@ -153,7 +221,7 @@ def get_hearings() -> list[dict]:
         WHERE {_FUTURE_ONLY}
         {_ORDER}
     """
-    with get_conn() as conn:
+    with get_conn(readonly=True) as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(sql)
             return cur.fetchall()
@@ -178,146 +246,921 @@ def get_hearing_agenda(hearing_id: int) -> list[dict]:
         WHERE hb.hearing_id = %s
         ORDER BY hb.file_order
     """
-    with get_conn() as conn:
+    with get_conn(readonly=True) as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(sql, (hearing_id,))
             return cur.fetchall()
 
 
-# ── Feed queries (calendar-feed service) ──────────────────────────────────────
-def get_hearings_for_chamber(chamber_id: int) -> list[dict]:
-    """
-    No dashboard context — on_dashboard absent, no deadline events emitted.
+# ── Feed window ───────────────────────────────────────────────────────────────
+#
+# Feeds cover hearings in a [since, until) date window instead of the whole
+# session, so feed size and query cost stay bounded as the session goes on.
+# The feed service takes it from ?since= / ?days_back= / ?days_ahead= and
+# puts it in the cache key and ETag; everything else uses the default.
+
+SEASON_START = date(2026, 4, 1)  # nothing before the start of this session
+FEED_DAYS_BACK = int(os.getenv("FEED_DAYS_BACK", "90"))
+FEED_DAYS_AHEAD = int(os.getenv("FEED_DAYS_AHEAD", "365"))
+FEED_MAX_DAYS = int(os.getenv("FEED_MAX_DAYS", "400"))  # cap on days_back / days_ahead
+
 
-    Replace _ALL_TIME with _FUTURE_ONLY to exclude past hearings from chamber feeds.
+def feed_window(
+    since: date | None = None,
+    days_back: int | None = None,
+    days_ahead: int | None = None,
+    today: date | None = None,
+) -> tuple[date, date]:
     """
-    sql = f"""
-        {_FEED_SELECT}
-        WHERE {_ALL_TIME}
-          AND h.chamber_id = %s
-        {_ORDER}
+    The (since, until) dates of a feed: hearings on or after since and
+    before until. since defaults to today - days_back (FEED_DAYS_BACK), until
+    to the day after today + days_ahead (FEED_DAYS_AHEAD). Both reach at most
+    FEED_MAX_DAYS from today, and never before SEASON_START.
     """
-    with get_conn() as conn:
+    today = today or date.today()
+    if since is None:
+        back = FEED_DAYS_BACK if days_back is None else days_back
+        since = today - timedelta(days=min(max(back, 0), FEED_MAX_DAYS))
+    since = max(since, SEASON_START, today - timedelta(days=FEED_MAX_DAYS))
+    ahead = FEED_DAYS_AHEAD if days_ahead is None else days_ahead
+    until = today + timedelta(days=min(max(ahead, 0), FEED_MAX_DAYS) + 1)
+    return min(since, until), until
+
+
+def _window(window: tuple[date, date] | None) -> dict:
+    since, until = window or feed_window()
+    return {"since": since, "until": until}
+
+
+# ── Feed queries (calendar-feed service) ──────────────────────────────────────
+#
+# The per-request queries are built once at import and registered as prepared
+# statements (db/prepared.py): each pooled connection parses and plans them
+# once, then runs them with EXECUTE. Flat and grouped variants are separate
+# statements ("<name>" and "<name>_grouped").
+
+
+def _prepare_both(name: str, build: Callable[[bool], str]) -> dict[bool, prepared.Statement]:
+    """{grouped: Statement} for build(False) and build(True)."""
+    return {
+        False: prepared.statement(name, build(False)),
+        True: prepared.statement(f"{name}_grouped", build(True)),
+    }
+
+
+def _fetch_all(stmt: prepared.Statement, params: dict) -> list[dict]:
+    with get_conn(readonly=True) as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql, (chamber_id,))
+            prepared.execute(cur, stmt, params)
             return cur.fetchall()
 
 
-def get_hearings_for_committee(committee_id: int) -> list[dict]:
+_CHAMBER_FEED = _prepare_both("feed_chamber", lambda grouped: f"""
+    {_FEED_SELECT_GROUPED if grouped else _FEED_SELECT}
+    WHERE {_WINDOW}
+      AND h.chamber_id = %(chamber_id)s
+    {_GROUPED_ORDER if grouped else _ORDER}
+""")
+
+_COMMITTEE_FEED = _prepare_both("feed_committee", lambda grouped: f"""
+    {_FEED_SELECT_GROUPED if grouped else _FEED_SELECT}
+    WHERE {_WINDOW}
+      AND h.committee_id = %(committee_id)s
+    {_GROUPED_ORDER if grouped else _ORDER}
+""")
+
+def get_hearings_for_chamber(
+    chamber_id: int, grouped: bool = False, window: tuple[date, date] | None = None
+) -> list[dict]:
     """
     No dashboard context — on_dashboard absent, no deadline events emitted.
+    grouped=True returns one row per hearing (see _GROUPED_SELECT).
+    Hearings are limited to `window` (default feed_window()).
+    """
+    return _fetch_all(_CHAMBER_FEED[grouped], {**_window(window), "chamber_id": chamber_id})
 
-    Replace _ALL_TIME with _FUTURE_ONLY to exclude past hearings from committee feeds.
+
+def get_hearings_for_committee(
+    committee_id: int, grouped: bool = False, window: tuple[date, date] | None = None
+) -> list[dict]:
     """
-    sql = f"""
-        {_FEED_SELECT}
-        WHERE {_ALL_TIME}
-          AND h.committee_id = %s
-        {_ORDER}
+    No dashboard context — on_dashboard absent, no deadline events emitted.
+    grouped=True returns one row per hearing (see _GROUPED_SELECT).
+    Hearings are limited to `window` (default feed_window()).
     """
-    with get_conn() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql, (committee_id,))
-            return cur.fetchall()
+    return _fetch_all(_COMMITTEE_FEED[grouped], {**_window(window), "committee_id": committee_id})
 
 
-def get_name_for_org(org_id: int) -> str | None:
-    """
-    Return org nickname associated with org ID to use in feed title.
+# Streaming variants for the largest feeds: rows come from a server-side
+# (named) cursor in batches of `itersize`, so neither this process nor the
+# client library ever holds the whole result. Ordered by hearing_id so that a
+# hearing's rows arrive together and can be grouped without sorting (the same
+# event order group_hearings produces). The connection stays checked out until
+# the generator is exhausted or closed.
+_STREAM_ORDER = "ORDER BY h.hearing_id"
+STREAM_ITERSIZE = 2000
+
+
+def _stream_rows(sql: str, params: dict, itersize: int) -> Iterator[dict]:
+    with get_conn(readonly=True, snapshot=True) as conn:
+        with conn.cursor(name="feed_stream", cursor_factory=RealDictCursor) as cur:
+            cur.itersize = itersize
+            cur.execute(sql, params)
+            yield from cur
+
+
+def stream_hearings_for_chamber(
+    chamber_id: int,
+    itersize: int = STREAM_ITERSIZE,
+    grouped: bool = False,
+    window: tuple[date, date] | None = None,
+) -> Iterator[dict]:
+    """get_hearings_for_chamber rows, streamed in hearing_id order."""
+    select = _FEED_SELECT_GROUPED if grouped else _FEED_SELECT
+    sql = f"""
+        {select}
+        WHERE {_WINDOW}
+          AND h.chamber_id = %(chamber_id)s
+        {_STREAM_ORDER}
     """
+    return _stream_rows(sql, {**_window(window), "chamber_id": chamber_id}, itersize)
+
+
+def stream_hearings_for_committee(
+    committee_id: int,
+    itersize: int = STREAM_ITERSIZE,
+    grouped: bool = False,
+    window: tuple[date, date] | None = None,
+) -> Iterator[dict]:
+    """get_hearings_for_committee rows, streamed in hearing_id order."""
+    select = _FEED_SELECT_GROUPED if grouped else _FEED_SELECT
     sql = f"""
-        SELECT nickname FROM auth.approved_organizations
-        WHERE id = %s
+        {select}
+        WHERE {_WINDOW}
+          AND h.committee_id = %(committee_id)s
+        {_STREAM_ORDER}
     """
-    with get_conn() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql, (org_id,))
-            result = cur.fetchone()
-            return result["nickname"] if result else None
+    return _stream_rows(sql, {**_window(window), "committee_id": committee_id}, itersize)
+
+
+# Hearing-id filters for dashboard feeds, shared by the feed bodies and the
+# validator queries. The {org_id}/{user_email} slots are filled with
+# %(org_id)s/%(user_email)s for the identity-keyed queries below, or with a
+# column from the token CTE for the single-round-trip *_feed_by_token queries.
+_ORG_HEARING_IDS = """
+    SELECT DISTINCT hb2.hearing_id
+      FROM snapshot.hearing_bills hb2
+      JOIN app.org_bill_dashboard d
+        ON d.openstates_bill_id = hb2.openstates_bill_id
+     WHERE d.org_id = {org_id}
+"""
+
+_USER_HEARING_IDS = """
+    SELECT DISTINCT hb2.hearing_id
+      FROM snapshot.hearing_bills    hb2
+      JOIN app.user_bill_dashboard   d
+        ON d.openstates_bill_id = hb2.openstates_bill_id
+     WHERE d.user_email = {user_email}
+"""
+
+_WG_HEARING_IDS = """
+    SELECT DISTINCT hb2.hearing_id
+      FROM snapshot.hearing_bills      hb2
+      JOIN app.working_group_dashboard d
+        ON d.openstates_bill_id = hb2.openstates_bill_id
+"""
+
+# Dashboard feed bodies
+_ORG_FEED = f"""
+    {_DASHBOARD_SELECT_WITH_CUSTOM}
+    LEFT JOIN app.org_bill_dashboard dash
+           ON dash.openstates_bill_id = b.openstates_bill_id
+          AND dash.org_id = {{org_id}}
+    WHERE {_WINDOW}
+      AND h.hearing_id IN ({_ORG_HEARING_IDS})
+"""
+
+_USER_FEED = f"""
+    {_DASHBOARD_SELECT_BASE}
+    LEFT JOIN app.user_bill_dashboard dash
+           ON dash.openstates_bill_id = b.openstates_bill_id
+          AND dash.user_email = {{user_email}}
+    WHERE {_WINDOW}
+      AND h.hearing_id IN ({_USER_HEARING_IDS})
+"""
+
+_WG_FEED = f"""
+    {_DASHBOARD_SELECT_BASE}
+    LEFT JOIN app.working_group_dashboard dash
+           ON dash.openstates_bill_id = b.openstates_bill_id
+    WHERE {_WINDOW}
+      AND h.hearing_id IN ({_WG_HEARING_IDS})
+"""
+
+# Grouped dashboard feed bodies (see _GROUPED_SELECT); the dashboard joins
+# move into the per-hearing bills subquery
+_ORG_BILL_JOINS = """
+          LEFT JOIN app.bill_custom_details bcd
+                 ON bcd.openstates_bill_id = hb.openstates_bill_id
+                AND bcd.last_updated_org_id = {org_id}
+          LEFT JOIN app.org_bill_dashboard dash
+                 ON dash.openstates_bill_id = b.openstates_bill_id
+                AND dash.org_id = {org_id}"""
+
+_USER_BILL_JOINS = """
+          LEFT JOIN app.user_bill_dashboard dash
+                 ON dash.openstates_bill_id = b.openstates_bill_id
+                AND dash.user_email = {user_email}"""
+
+_WG_BILL_JOINS = """
+          LEFT JOIN app.working_group_dashboard dash
+                 ON dash.openstates_bill_id = b.openstates_bill_id"""
+
+_ORG_POSITION_FIELD = """,
+                   'org_position',       bcd.org_position"""
+
+_ORG_FEED_GROUPED = f"""
+    {_GROUPED_SELECT.format(
+        bill_fields=_ON_DASHBOARD_FIELD + _ORG_POSITION_FIELD, bill_joins=_ORG_BILL_JOINS
+    )}
+    WHERE {_WINDOW}
+      AND h.hearing_id IN ({_ORG_HEARING_IDS})
+"""
+
+_USER_FEED_GROUPED = f"""
+    {_GROUPED_SELECT.format(bill_fields=_ON_DASHBOARD_FIELD, bill_joins=_USER_BILL_JOINS)}
+    WHERE {_WINDOW}
+      AND h.hearing_id IN ({_USER_HEARING_IDS})
+"""
+
+_WG_FEED_GROUPED = f"""
+    {_GROUPED_SELECT.format(bill_fields=_ON_DASHBOARD_FIELD, bill_joins=_WG_BILL_JOINS)}
+    WHERE {_WINDOW}
+      AND h.hearing_id IN ({_WG_HEARING_IDS})
+"""
+
+# Token-keyed feeds select from the dashboard body LATERAL-joined to the token
+# row, so the outer query re-applies the ordering of _ORDER (or, grouped, of
+# _GROUPED_ORDER) on output columns.
+_FEED_ORDER = "ORDER BY feed.hearing_date, feed.hearing_time NULLS LAST"
+_FEED_GROUPED_ORDER = "ORDER BY feed.hearing_id"
+
+_ORG_FEED_STATEMENTS = _prepare_both("feed_org", lambda grouped: f"""
+    {(_ORG_FEED_GROUPED if grouped else _ORG_FEED).format(org_id="%(org_id)s")}
+    {_GROUPED_ORDER if grouped else _ORDER}
+""")
 
+_USER_FEED_STATEMENTS = _prepare_both("feed_user", lambda grouped: f"""
+    {(_USER_FEED_GROUPED if grouped else _USER_FEED).format(user_email="%(user_email)s")}
+    {_GROUPED_ORDER if grouped else _ORDER}
+""")
 
-def get_hearings_for_org(org_id: int) -> list[dict]:
+_WG_FEED_STATEMENTS = _prepare_both("feed_wg", lambda grouped: f"""
+    {_WG_FEED_GROUPED if grouped else _WG_FEED}
+    {_GROUPED_ORDER if grouped else _ORDER}
+""")
+
+
+def get_hearings_for_org(
+    org_id: int, grouped: bool = False, window: tuple[date, date] | None = None
+) -> list[dict]:
     """
     All hearings where at least one bill on the org's dashboard is on
     the agenda. Returns all bills on each hearing; on_dashboard=TRUE only for
     bills tracked on this org's dashboard. Deadline events emitted for those only.
-
-    Replace _ALL_TIME with _FUTURE_ONLY to exclude past hearings from org feeds.
+    grouped=True returns one row per hearing (see _GROUPED_SELECT).
+    Hearings are limited to `window` (default feed_window()).
     """
-    sql = f"""
-        {_DASHBOARD_SELECT_WITH_CUSTOM}
-        LEFT JOIN app.org_bill_dashboard dash
-               ON dash.openstates_bill_id = b.openstates_bill_id
-              AND dash.org_id = %s
-        WHERE {_ALL_TIME}
-          AND h.hearing_id IN (
-                SELECT DISTINCT hb2.hearing_id
-                  FROM snapshot.hearing_bills hb2
-                  JOIN app.org_bill_dashboard d
-                    ON d.openstates_bill_id = hb2.openstates_bill_id
-                 WHERE d.org_id = %s
-          )
-        {_ORDER}
-    """
-    with get_conn() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(
-                sql, (org_id, org_id, org_id)
-            )  # All three org_id placeholders need to be resolved
-            return cur.fetchall()
+    return _fetch_all(_ORG_FEED_STATEMENTS[grouped], {**_window(window), "org_id": org_id})
 
 
-def get_hearings_for_user(user_email: str) -> list[dict]:
+def get_hearings_for_user(
+    user_email: str, grouped: bool = False, window: tuple[date, date] | None = None
+) -> list[dict]:
     """
     All hearings where at least one bill on the user's personal dashboard
     is on the agenda. on_dashboard=TRUE only for bills tracked by this user.
     Deadline events emitted for those only.
-
-    Replace _ALL_TIME with _FUTURE_ONLY to exclude past hearings from user feeds.
+    grouped=True returns one row per hearing (see _GROUPED_SELECT).
+    Hearings are limited to `window` (default feed_window()).
     """
-    sql = f"""
-        {_DASHBOARD_SELECT_BASE}
-        LEFT JOIN app.user_bill_dashboard dash
-               ON dash.openstates_bill_id = b.openstates_bill_id
-              AND dash.user_email = %s
-        WHERE {_ALL_TIME}
-          AND h.hearing_id IN (
-                SELECT DISTINCT hb2.hearing_id
-                  FROM snapshot.hearing_bills    hb2
-                  JOIN app.user_bill_dashboard   d
-                    ON d.openstates_bill_id = hb2.openstates_bill_id
-                 WHERE d.user_email = %s
-          )
-        {_ORDER}
-    """
-    with get_conn() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql, (user_email, user_email))
-            return cur.fetchall()
+    return _fetch_all(_USER_FEED_STATEMENTS[grouped], {**_window(window), "user_email": user_email})
 
 
-def get_hearings_for_wg() -> list[dict]:
+def get_hearings_for_wg(
+    grouped: bool = False, window: tuple[date, date] | None = None
+) -> list[dict]:
     """
     All future hearings where at least one bill on the working group dashboard
     is on the agenda. on_dashboard=TRUE only for bills tracked by the WG.
     Deadline events emitted for those only.
+    grouped=True returns one row per hearing (see _GROUPED_SELECT).
+    Hearings are limited to `window` (default feed_window()).
+    """
+    return _fetch_all(_WG_FEED_STATEMENTS[grouped], _window(window))
+
+
+# ── Feed validators (conditional GET) ─────────────────────────────────────────
+#
+# One aggregate row per feed: the newest updated_at/canceled_at and hearing
+# count over the feed's hearings, plus a membership fingerprint for dashboard
+# feeds. hearing_bills, hearing_deadlines and committee changes touch
+# hearings.updated_at via triggers (migrations 004, 011); bill numbers, names
+# and authors come from the bills_mv materialized view, whose last content
+# change is bills_changed_at (app.feed_source_versions, 011). Dashboard
+# adds/removals (and org positions) are covered by membership.
+# The feed service hashes these into the ETag without fetching any rows.
+
+_VALIDATOR_KEYS = ("updated_at", "canceled_at", "hearing_count", "membership", "bills_changed_at")
+
+_BILLS_CHANGED_AT = """
+    SELECT changed_at FROM app.feed_source_versions WHERE source = 'bills_mv'
+"""
+
+_VALIDATORS = f"""
+    SELECT MAX(h.updated_at)  AS updated_at,
+           MAX(h.canceled_at) AS canceled_at,
+           COUNT(*)           AS hearing_count,
+           ({{membership}})     AS membership,
+           ({_BILLS_CHANGED_AT}) AS bills_changed_at
+      FROM snapshot.hearings h
+     WHERE {{where}}
+"""
+
+_ORG_MEMBERSHIP = """
+    SELECT md5(COALESCE(string_agg(d.openstates_bill_id, ',' ORDER BY d.openstates_bill_id), ''))
+           || ':' || COALESCE((
+                SELECT MAX(bcd.last_updated_at)::text
+                  FROM app.bill_custom_details bcd
+                 WHERE bcd.last_updated_org_id = {org_id}
+           ), '')
+      FROM app.org_bill_dashboard d
+     WHERE d.org_id = {org_id}
+"""
+
+_USER_MEMBERSHIP = """
+    SELECT md5(COALESCE(string_agg(d.openstates_bill_id, ',' ORDER BY d.openstates_bill_id), ''))
+      FROM app.user_bill_dashboard d
+     WHERE d.user_email = {user_email}
+"""
 
-    Replace _ALL_TIME with _FUTURE_ONLY to exclude past hearings from WG feeds.
+_WG_MEMBERSHIP = """
+    SELECT md5(COALESCE(string_agg(d.openstates_bill_id, ',' ORDER BY d.openstates_bill_id), ''))
+      FROM app.working_group_dashboard d
+"""
+
+_ORG_VALIDATORS = _VALIDATORS.format(
+    membership=_ORG_MEMBERSHIP,
+    where=f"{_WINDOW} AND h.hearing_id IN ({_ORG_HEARING_IDS})",
+)
+_USER_VALIDATORS = _VALIDATORS.format(
+    membership=_USER_MEMBERSHIP,
+    where=f"{_WINDOW} AND h.hearing_id IN ({_USER_HEARING_IDS})",
+)
+_WG_VALIDATORS = _VALIDATORS.format(
+    membership=_WG_MEMBERSHIP,
+    where=f"{_WINDOW} AND h.hearing_id IN ({_WG_HEARING_IDS})",
+)
+
+
+_CHAMBER_VALIDATORS_STATEMENT = prepared.statement(
+    "validators_chamber",
+    _VALIDATORS.format(membership="NULL", where=f"{_WINDOW} AND h.chamber_id = %(chamber_id)s"),
+)
+_COMMITTEE_VALIDATORS_STATEMENT = prepared.statement(
+    "validators_committee",
+    _VALIDATORS.format(membership="NULL", where=f"{_WINDOW} AND h.committee_id = %(committee_id)s"),
+)
+_ORG_VALIDATORS_STATEMENT = prepared.statement(
+    "validators_org", _ORG_VALIDATORS.format(org_id="%(org_id)s")
+)
+_USER_VALIDATORS_STATEMENT = prepared.statement(
+    "validators_user", _USER_VALIDATORS.format(user_email="%(user_email)s")
+)
+_WG_VALIDATORS_STATEMENT = prepared.statement("validators_wg", _WG_VALIDATORS)
+
+
+def _fetch_validators(stmt: prepared.Statement, params: dict) -> dict:
+    with get_conn(readonly=True) as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            prepared.execute(cur, stmt, params)
+            return dict(cur.fetchone())
+
+
+def get_chamber_validators(chamber_id: int, window: tuple[date, date] | None = None) -> dict:
+    return _fetch_validators(
+        _CHAMBER_VALIDATORS_STATEMENT, {**_window(window), "chamber_id": chamber_id}
+    )
+
+
+def get_committee_validators(committee_id: int, window: tuple[date, date] | None = None) -> dict:
+    return _fetch_validators(
+        _COMMITTEE_VALIDATORS_STATEMENT, {**_window(window), "committee_id": committee_id}
+    )
+
+
+def get_org_validators(org_id: int, window: tuple[date, date] | None = None) -> dict:
+    return _fetch_validators(_ORG_VALIDATORS_STATEMENT, {**_window(window), "org_id": org_id})
+
+
+def get_user_validators(user_email: str, window: tuple[date, date] | None = None) -> dict:
+    return _fetch_validators(
+        _USER_VALIDATORS_STATEMENT, {**_window(window), "user_email": user_email}
+    )
+
+
+def get_wg_validators(window: tuple[date, date] | None = None) -> dict:
+    return _fetch_validators(_WG_VALIDATORS_STATEMENT, _window(window))
+
+
+# ── Token-keyed feed queries (one round trip per feed request) ────────────────
+#
+# Each returns (identity, validators, rows). identity is None when no row
+# matches the token hash; rows are shaped exactly like the get_hearings_for_*
+# results (with the same grouped option). The token CTE is LEFT JOINed to the feed so a valid token with no
+# hearings still comes back as a single all-NULL feed row carrying the
+# identity and validators. Validator columns are selected as v_<key>, since
+# updated_at and canceled_at are also hearing columns.
+
+_TOKEN_VALIDATOR_COLUMNS = ",\n           ".join(f"v.{k} AS v_{k}" for k in _VALIDATOR_KEYS)
+
+_USER_TOKEN_CTE = """
+    WITH u AS (
+        SELECT email,
+               LOWER(BTRIM(COALESCE(ai_working_group, ''))) = 'yes' AS is_wg_member
+          FROM auth.approved_users
+         WHERE feed_token_hash = %(token_hash)s
+    )
+"""
+
+
+def _split_identity(
+    rows: list[dict], keys: tuple[str, ...]
+) -> tuple[dict | None, dict | None, list[dict]]:
+    """Pull identity and v_* validator columns off each row; drop the placeholder row of an empty feed."""
+    if not rows:
+        return None, None, []
+    identity = {k: rows[0][k] for k in keys}
+    validators = {k: rows[0][f"v_{k}"] for k in _VALIDATOR_KEYS}
+    hearings = []
+    for row in rows:
+        for k in keys:
+            del row[k]
+        for k in _VALIDATOR_KEYS:
+            del row[f"v_{k}"]
+        if row["hearing_id"] is not None:
+            hearings.append(row)
+    return identity, validators, hearings
+
+
+_ORG_FEED_BY_TOKEN = _prepare_both("feed_org_by_token", lambda grouped: f"""
+    WITH o AS (
+        SELECT id, nickname
+          FROM auth.approved_organizations
+         WHERE feed_token_hash = %(token_hash)s
+    )
+    SELECT o.id       AS org_id,
+           o.nickname AS org_name,
+           {_TOKEN_VALIDATOR_COLUMNS},
+           feed.*
+      FROM o
+      CROSS JOIN LATERAL ({_ORG_VALIDATORS.format(org_id="o.id")}) v
+      LEFT JOIN LATERAL ({(_ORG_FEED_GROUPED if grouped else _ORG_FEED).format(org_id="o.id")}) feed ON TRUE
+    {_FEED_GROUPED_ORDER if grouped else _FEED_ORDER}
+""")
+
+_USER_FEED_BY_TOKEN = _prepare_both("feed_user_by_token", lambda grouped: f"""
+    {_USER_TOKEN_CTE}
+    SELECT u.email,
+           u.is_wg_member,
+           {_TOKEN_VALIDATOR_COLUMNS},
+           feed.*
+      FROM u
+      CROSS JOIN LATERAL ({_USER_VALIDATORS.format(user_email="u.email")}) v
+      LEFT JOIN LATERAL ({(_USER_FEED_GROUPED if grouped else _USER_FEED).format(user_email="u.email")}) feed ON TRUE
+    {_FEED_GROUPED_ORDER if grouped else _FEED_ORDER}
+""")
+
+_WG_FEED_BY_TOKEN = _prepare_both("feed_wg_by_token", lambda grouped: f"""
+    {_USER_TOKEN_CTE}
+    SELECT u.email,
+           u.is_wg_member,
+           {_TOKEN_VALIDATOR_COLUMNS},
+           feed.*
+      FROM u
+      LEFT JOIN LATERAL (
+            SELECT * FROM ({_WG_VALIDATORS}) wv WHERE u.is_wg_member
+      ) v ON TRUE
+      LEFT JOIN LATERAL (
+            SELECT * FROM ({_WG_FEED_GROUPED if grouped else _WG_FEED}) wg WHERE u.is_wg_member
+      ) feed ON TRUE
+    {_FEED_GROUPED_ORDER if grouped else _FEED_ORDER}
+""")
+
+
+def get_org_feed_by_token(
+    token_hash: str, grouped: bool = False, window: tuple[date, date] | None = None
+) -> tuple[dict | None, dict | None, list[dict]]:
     """
-    sql = f"""
-        {_DASHBOARD_SELECT_BASE}
-        LEFT JOIN app.working_group_dashboard dash
-               ON dash.openstates_bill_id = b.openstates_bill_id
-        WHERE {_ALL_TIME}
-          AND h.hearing_id IN (
-                SELECT DISTINCT hb2.hearing_id
-                  FROM snapshot.hearing_bills      hb2
-                  JOIN app.working_group_dashboard d
-                    ON d.openstates_bill_id = hb2.openstates_bill_id
-          )
-        {_ORDER}
+    Resolve an org feed token, its display name, its validators and its
+    hearing rows in one statement.
+    Returns ({org_id, org_name}, validators, rows) or (None, None, []).
+    """
+    rows = _fetch_all(_ORG_FEED_BY_TOKEN[grouped], {**_window(window), "token_hash": token_hash})
+    return _split_identity(rows, ("org_id", "org_name"))
+
+
+def get_user_feed_by_token(
+    token_hash: str, grouped: bool = False, window: tuple[date, date] | None = None
+) -> tuple[dict | None, dict | None, list[dict]]:
+    """
+    Resolve a user feed token, its validators and the user's dashboard
+    hearing rows in one statement.
+    Returns ({email, is_wg_member}, validators, rows) or (None, None, []).
     """
-    with get_conn() as conn:
+    rows = _fetch_all(_USER_FEED_BY_TOKEN[grouped], {**_window(window), "token_hash": token_hash})
+    return _split_identity(rows, ("email", "is_wg_member"))
+
+
+def get_wg_feed_by_token(
+    token_hash: str, grouped: bool = False, window: tuple[date, date] | None = None
+) -> tuple[dict | None, dict | None, list[dict]]:
+    """
+    Resolve a user feed token and, for working group members only, the WG
+    validators and dashboard hearing rows in one statement. Non-members get
+    ({email, is_wg_member: False}, None-valued validators, []) without the
+    hearings scan running.
+    """
+    rows = _fetch_all(_WG_FEED_BY_TOKEN[grouped], {**_window(window), "token_hash": token_hash})
+    return _split_identity(rows, ("email", "is_wg_member"))
+
+
+# ── Bulk snapshot (feed materialization) ──────────────────────────────────────
+#
+# Everything needed to render every feed at once: all hearings in the window
+# (one grouped-mode row each), the agenda and dashboard memberships from which
+# dashboard_feed_rows() derives each dashboard feed's hearings and
+# on_dashboard flags, org positions, and each feed's validators. The validators reuse the exact
+# per-feed SQL above with the identity supplied by a column, so the ETags the
+# job computes match what the routes compute for the same data.
+#
+# All statements run in one REPEATABLE READ transaction, so rows and
+# validators describe the same snapshot even if a refresh lands mid-load.
+
+# Chamber/committee validators for every id at once; per group identical to
+# get_chamber_validators / get_committee_validators
+_GROUPED_VALIDATORS = f"""
+    SELECT h.{{column}}       AS feed_id,
+           MAX(h.updated_at)  AS updated_at,
+           MAX(h.canceled_at) AS canceled_at,
+           COUNT(*)           AS hearing_count,
+           NULL               AS membership,
+           ({_BILLS_CHANGED_AT}) AS bills_changed_at
+      FROM snapshot.hearings h
+     WHERE {_WINDOW}
+       AND h.{{column}} IS NOT NULL
+     GROUP BY h.{{column}}
+"""
+
+
+def _grouped_validators(cur, column: str, params: dict) -> dict:
+    cur.execute(_GROUPED_VALIDATORS.format(column=column), params)
+    return {r["feed_id"]: {k: r[k] for k in _VALIDATOR_KEYS} for r in cur.fetchall()}
+
+
+def load_feed_snapshot(window: tuple[date, date] | None = None) -> dict:
+    """
+    Load all feed inputs in one consistent snapshot, for `window` (default
+    feed_window()).
+
+    Returns a dict with:
+        rows:        one grouped-mode row (see _GROUPED_SELECT) per hearing in
+                     the window, in hearing_id order
+        agenda:      {openstates_bill_id: [hearing_id, ...]} in the window
+        chambers, committees:  {id: validators}
+        orgs:        {org_id: {org_name, validators}}
+        users:       {email: {is_wg_member, validators}}
+        wg:          {validators}
+        dashboards:  {feed_key: set of tracked bill ids}
+        positions:   {"org:<id>": {openstates_bill_id: org_position}}
+    Only orgs and users with a feed token are included. Like a
+    get_hearings_for_dashboards() result, it can be passed to
+    dashboard_feed_rows() for each dashboard feed's rows.
+    """
+    params = _window(window)
+    with get_conn(readonly=True, snapshot=True) as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql)
-            return cur.fetchall()
+
+            cur.execute(f"{_FEED_SELECT_GROUPED} WHERE {_WINDOW} {_GROUPED_ORDER}", params)
+            rows = cur.fetchall()
+
+            cur.execute(
+                f"""
+                SELECT DISTINCT hb.openstates_bill_id, hb.hearing_id
+                  FROM snapshot.hearing_bills hb
+                  JOIN snapshot.hearings h ON h.hearing_id = hb.hearing_id
+                 WHERE {_WINDOW}
+                """,
+                params,
+            )
+            agenda = {}
+            for r in cur.fetchall():
+                agenda.setdefault(r["openstates_bill_id"], []).append(r["hearing_id"])
+
+            chambers = _grouped_validators(cur, "chamber_id", params)
+            committees = _grouped_validators(cur, "committee_id", params)
+
+            cur.execute(
+                f"""
+                SELECT o.id AS org_id, o.nickname AS org_name, v.*
+                  FROM auth.approved_organizations o
+                 CROSS JOIN LATERAL ({_ORG_VALIDATORS.format(org_id="o.id")}) v
+                 WHERE o.feed_token_hash IS NOT NULL
+                """,
+                params,
+            )
+            orgs = {
+                r["org_id"]: {
+                    "org_name": r["org_name"],
+                    "validators": {k: r[k] for k in _VALIDATOR_KEYS},
+                }
+                for r in cur.fetchall()
+            }
+
+            cur.execute(
+                f"""
+                SELECT u.email,
+                       LOWER(BTRIM(COALESCE(u.ai_working_group, ''))) = 'yes' AS is_wg_member,
+                       v.*
+                  FROM auth.approved_users u
+                 CROSS JOIN LATERAL ({_USER_VALIDATORS.format(user_email="u.email")}) v
+                 WHERE u.feed_token_hash IS NOT NULL
+                """,
+                params,
+            )
+            users = {
+                r["email"]: {
+                    "is_wg_member": r["is_wg_member"],
+                    "validators": {k: r[k] for k in _VALIDATOR_KEYS},
+                }
+                for r in cur.fetchall()
+            }
+
+            cur.execute(_WG_VALIDATORS, params)
+            wg = {"validators": dict(cur.fetchone())}
+
+            dashboards = {f"org:{org_id}": set() for org_id in orgs}
+            dashboards.update((f"user:{email}", set()) for email in users)
+            positions = {f"org:{org_id}": {} for org_id in orgs}
+
+            cur.execute("SELECT org_id, openstates_bill_id FROM app.org_bill_dashboard")
+            for r in cur.fetchall():
+                if r["org_id"] in orgs:
+                    dashboards[f"org:{r['org_id']}"].add(r["openstates_bill_id"])
+
+            cur.execute(
+                """
+                SELECT last_updated_org_id AS org_id, openstates_bill_id, org_position
+                  FROM app.bill_custom_details
+                 WHERE last_updated_org_id IS NOT NULL
+                """
+            )
+            for r in cur.fetchall():
+                if r["org_id"] in orgs:
+                    positions[f"org:{r['org_id']}"][r["openstates_bill_id"]] = r["org_position"]
+
+            cur.execute("SELECT user_email, openstates_bill_id FROM app.user_bill_dashboard")
+            for r in cur.fetchall():
+                if r["user_email"] in users:
+                    dashboards[f"user:{r['user_email']}"].add(r["openstates_bill_id"])
+
+            cur.execute("SELECT openstates_bill_id FROM app.working_group_dashboard")
+            dashboards["wg"] = {r["openstates_bill_id"] for r in cur.fetchall()}
+
+    return {
+        "rows": rows,
+        "agenda": agenda,
+        "chambers": chambers,
+        "committees": committees,
+        "orgs": orgs,
+        "users": users,
+        "wg": wg,
+        "dashboards": dashboards,
+        "positions": positions,
+    }
+
+
+# ── Batch dashboard feeds ─────────────────────────────────────────────────────
+#
+# Any set of org, user and WG dashboard feeds from one hearings scan: the
+# hearings with a tracked bill on the agenda are loaded once, without
+# dashboard columns, together with which dashboards track which bills.
+# dashboard_feed_rows() then joins one feed in memory, so N dashboards cost
+# one scan instead of N get_hearings_for_* queries. Validators use the same
+# per-feed SQL as the routes, so stored payloads get the routes' ETags.
+
+_BATCH_MEMBERSHIP = """
+    SELECT 'org:' || d.org_id AS feed_key, d.openstates_bill_id
+      FROM app.org_bill_dashboard d
+     WHERE d.org_id = ANY(%(org_ids)s::int[])
+    UNION ALL
+    SELECT 'user:' || d.user_email, d.openstates_bill_id
+      FROM app.user_bill_dashboard d
+     WHERE d.user_email = ANY(%(user_emails)s::text[])
+    UNION ALL
+    SELECT 'wg', d.openstates_bill_id
+      FROM app.working_group_dashboard d
+     WHERE %(include_wg)s
+"""
+
+
+def get_hearings_for_dashboards(
+    org_ids: list[int],
+    user_emails: list[str],
+    include_wg: bool = False,
+    window: tuple[date, date] | None = None,
+) -> dict:
+    """
+    Load the inputs of many dashboard feeds in one consistent snapshot.
+
+    Returns a dict with:
+        rows:        one grouped-mode row (see _GROUPED_SELECT) per hearing in
+                     the window with a bill on any requested dashboard, in
+                     hearing_id order; bills carry no dashboard fields
+        agenda:      {openstates_bill_id: [hearing_id, ...]} for tracked bills
+        dashboards:  {feed_key: set of tracked bill ids}
+        positions:   {"org:<id>": {openstates_bill_id: org_position}}
+        validators:  {feed_key: validators}
+        org_names:   {"org:<id>": nickname}
+    Feed keys are "org:<id>", "user:<email>" and "wg". Unknown org ids are
+    dropped; unknown emails get an empty dashboard.
+    Pass the result to dashboard_feed_rows() for each feed's rows.
+    """
+    org_ids, user_emails = list(org_ids), list(user_emails)
+    params = _window(window)
+    with get_conn(readonly=True, snapshot=True) as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+
+            cur.execute(
+                f"""
+                SELECT o.id AS org_id, o.nickname AS org_name, v.*
+                  FROM auth.approved_organizations o
+                 CROSS JOIN LATERAL ({_ORG_VALIDATORS.format(org_id="o.id")}) v
+                 WHERE o.id = ANY(%(org_ids)s::int[])
+                """,
+                {**params, "org_ids": org_ids},
+            )
+            validators, org_names = {}, {}
+            for r in cur.fetchall():
+                validators[f"org:{r['org_id']}"] = {k: r[k] for k in _VALIDATOR_KEYS}
+                org_names[f"org:{r['org_id']}"] = r["org_name"]
+
+            cur.execute(
+                f"""
+                SELECT u.email, v.*
+                  FROM unnest(%(user_emails)s::text[]) AS u(email)
+                 CROSS JOIN LATERAL ({_USER_VALIDATORS.format(user_email="u.email")}) v
+                """,
+                {**params, "user_emails": user_emails},
+            )
+            for r in cur.fetchall():
+                validators[f"user:{r['email']}"] = {k: r[k] for k in _VALIDATOR_KEYS}
+
+            if include_wg:
+                cur.execute(_WG_VALIDATORS, params)
+                validators["wg"] = dict(cur.fetchone())
+
+            dashboards = {feed_key: set() for feed_key in validators}
+            cur.execute(
+                _BATCH_MEMBERSHIP,
+                {"org_ids": org_ids, "user_emails": user_emails, "include_wg": include_wg},
+            )
+            for r in cur.fetchall():
+                if r["feed_key"] in dashboards:
+                    dashboards[r["feed_key"]].add(r["openstates_bill_id"])
+
+            positions = {feed_key: {} for feed_key in org_names}
+            cur.execute(
+                """
+                SELECT last_updated_org_id AS org_id, openstates_bill_id, org_position
+                  FROM app.bill_custom_details
+                 WHERE last_updated_org_id = ANY(%s::int[])
+                """,
+                (org_ids,),
+            )
+            for r in cur.fetchall():
+                org_positions = positions.get(f"org:{r['org_id']}")
+                if org_positions is not None:
+                    org_positions[r["openstates_bill_id"]] = r["org_position"]
+
+            tracked = sorted(set().union(*dashboards.values()))
+            cur.execute(
+                f"""
+                SELECT DISTINCT hb.openstates_bill_id, hb.hearing_id
+                  FROM snapshot.hearing_bills hb
+                  JOIN snapshot.hearings h ON h.hearing_id = hb.hearing_id
+                 WHERE {_WINDOW}
+                   AND hb.openstates_bill_id = ANY(%(tracked)s::text[])
+                """,
+                {**params, "tracked": tracked},
+            )
+            agenda = {}
+            for r in cur.fetchall():
+                agenda.setdefault(r["openstates_bill_id"], []).append(r["hearing_id"])
+
+            hearing_ids = sorted({hid for hids in agenda.values() for hid in hids})
+            cur.execute(
+                f"""
+                {_FEED_SELECT_GROUPED}
+                WHERE h.hearing_id = ANY(%s::int[])
+                {_GROUPED_ORDER}
+                """,
+                (hearing_ids,),
+            )
+            rows = cur.fetchall()
+
+    return {
+        "rows": rows,
+        "agenda": agenda,
+        "dashboards": dashboards,
+        "positions": positions,
+        "validators": validators,
+        "org_names": org_names,
+    }
+
+
+def dashboard_feed_rows(batch: dict, feed_key: str) -> list[dict]:
+    """
+    Rows of one dashboard feed from a get_hearings_for_dashboards() or
+    load_feed_snapshot() result, shaped like get_hearings_for_org/user/wg(grouped=True): every hearing
+    with a tracked bill on its agenda, with each bill flagged on_dashboard
+    (and given org_position for org feeds).
+    """
+    bills = batch["dashboards"].get(feed_key, set())
+    positions = batch["positions"].get(feed_key)
+    agenda = batch["agenda"]
+
+    hearing_ids = set()
+    for bill_id in bills:
+        hearing_ids.update(agenda.get(bill_id, ()))
+
+    rows = []
+    for row in batch["rows"]:
+        if row["hearing_id"] not in hearing_ids:
+            continue
+        feed_bills = []
+        for bill in row["bills"]:
+            feed_bill = {**bill, "on_dashboard": bill["openstates_bill_id"] in bills}
+            if positions is not None:
+                feed_bill["org_position"] = positions.get(bill["openstates_bill_id"])
+            feed_bills.append(feed_bill)
+        rows.append({**row, "bills": feed_bills})
+    return rows
+
+
+# ── Change routing (event-driven invalidation) ────────────────────────────────
+#
+# db/migrations/009 NOTIFYs FEED_CHANGED_CHANNEL with the routing columns of
+# every changed row. Hearing and agenda changes reach dashboard feeds only
+# through the bills on a hearing, so those need a lookup: which chamber,
+# committee and dashboards are behind a set of hearings and bills.
+
+FEED_CHANGED_CHANNEL = "feed_changed"
+
+
+def get_feed_keys_for_changes(hearing_ids: list[int], bill_ids: list[str]) -> set[str]:
+    """
+    Feed keys ("chamber:1", "org:7", "user:a@b.c", "wg", ...) whose content
+    depends on any of the given hearings or bills.
+    """
+    if not hearing_ids and not bill_ids:
+        return set()
+    sql = """
+        WITH bills AS (
+            SELECT openstates_bill_id
+              FROM snapshot.hearing_bills
+             WHERE hearing_id = ANY(%(hearing_ids)s)
+            UNION
+            SELECT unnest(%(bill_ids)s::text[])
+        )
+        SELECT 'chamber:' || h.chamber_id AS feed_key
+          FROM snapshot.hearings h
+         WHERE h.hearing_id = ANY(%(hearing_ids)s) AND h.chamber_id IS NOT NULL
+        UNION
+        SELECT 'committee:' || h.committee_id
+          FROM snapshot.hearings h
+         WHERE h.hearing_id = ANY(%(hearing_ids)s) AND h.committee_id IS NOT NULL
+        UNION
+        SELECT 'org:' || d.org_id
+          FROM app.org_bill_dashboard d JOIN bills USING (openstates_bill_id)
+        UNION
+        SELECT 'user:' || d.user_email
+          FROM app.user_bill_dashboard d JOIN bills USING (openstates_bill_id)
+        UNION
+        SELECT 'wg'
+          FROM app.working_group_dashboard d JOIN bills USING (openstates_bill_id)
+    """
+    with get_conn(readonly=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, {"hearing_ids": list(hearing_ids), "bill_ids": list(bill_ids)})
+            return {row[0] for row in cur.fetchall()}
@@ -3,14 +3,24 @@ Input: section string, credentials.ini
 Output: string values
 
 Given a section string (ex: postgres), return parameters
+
+Settings are read once per process and section (environment variables, else
+credentials.ini) and returned as a read-only mapping, so opening a connection
+does no environment or file I/O. Call reload() after changing either source.
 """
 
 import os
+import threading
 from configparser import ConfigParser
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+_settings: dict[tuple, Mapping[str, str]] = {}  # (section, filename) -> settings
+_lock = threading.Lock()
 
 
-def config(section, filename=None):
+def _load(section, filename):
     # First, try to get configuration from Digitial Ocean environment variables
     db_config = {
         "host": os.getenv("DB_HOST"),
@@ -44,3 +54,24 @@ def config(section, filename=None):
         )
 
     return values
+
+
+def config(section, filename=None) -> Mapping[str, str]:
+    """Connection parameters for `section`, loaded on first use (see reload())."""
+    key = (section, filename)
+    settings = _settings.get(key)
+    if settings is None:
+        with _lock:
+            settings = _settings.get(key)
+            if settings is None:
+                settings = _settings[key] = MappingProxyType(_load(section, filename))
+    return settings
+
+
+def reload():
+    """
+    Forget loaded settings; the next config() call reads them again. Pools
+    already built by db.connect keep their parameters until reset_pool().
+    """
+    with _lock:
+        _settings.clear()
@@ -1,48 +1,394 @@
+from collections import deque
 from contextlib import contextmanager
 import psycopg2
+import psycopg2.pool
+import os
+import threading
 import time
+from db import prepared
 from db.config import config
+from db.hotlog import SampledLogger
 import logging
 
 logger = logging.getLogger(__name__)
+# Per-transaction timings are per-event detail: DEBUG, or sampled (db/hotlog.py)
+events = SampledLogger(logger)
+
+# ── Connection pool ────────────────────────────────────────────────────────────
+#
+# Pooling is opt-in per process: the calendar-feed service calls
+# configure_pool() from create_app(), everything else (Streamlit, admin
+# scripts) keeps the one-connection-per-call behaviour below.
+#
+# The pool itself is built lazily on first checkout and is tagged with the pid
+# that built it, so a pool configured in the gunicorn master (preload_app) is
+# never shared with forked workers. Its lock is also created at that point,
+# after gevent has monkey-patched threading in the worker.
+#
+# With DB_REPLICA_DSN set, read-only checkouts (get_conn(readonly=True)) go to
+# a second pool of the same size on the replica; writes stay on the primary.
+
+_POOL_DEFAULTS = {
+    "minconn": int(os.getenv("DB_POOL_MIN", "1")),
+    "maxconn": int(os.getenv("DB_POOL_MAX", "10")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),  # seconds to wait for a free connection
+    "ping_after": float(os.getenv("DB_POOL_PING_AFTER", "30")),  # idle seconds before SELECT 1 on checkout
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),  # idle seconds before a spare connection is closed
+}
+_SLOW_WAIT_MS = 100  # pool waits longer than this are logged at WARNING
+
+# libpq connection string or URI of a read replica for read-only connections
+REPLICA_DSN = os.getenv("DB_REPLICA_DSN") or None
+
+_pool_settings = None  # set by configure_pool(); None means pooling disabled
+_pools = {}  # "primary" / "replica" -> ConnectionPool
+_pool_lock = threading.Lock()
+_inherited = []  # connections opened before a fork; kept referenced, never closed
+_db_errors = 0  # transactions in get_conn that failed with a psycopg2.DatabaseError
+
+
+class ConnectionPool:
+    """
+    Blocking, bounded pool of psycopg2 connections.
+
+    Unlike psycopg2.pool.ThreadedConnectionPool, getconn() waits (up to
+    `timeout` seconds) for a connection to be returned when the pool is at
+    maxconn instead of raising immediately, and records how long it waited.
+    """
+
+    def __init__(self, params, minconn, maxconn, timeout, ping_after, max_idle):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool size: min={minconn}, max={maxconn}")
+        self.params = params
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.max_idle = max_idle
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, last_used) — LIFO so hot connections stay hot
+        self._size = 0  # open connections, idle + checked out
+        self.stats = {
+            "checkouts": 0,
+            "waits": 0,  # checkouts that had to wait for a free connection
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "discarded": 0,  # connections dropped by a failed health check or error
+        }
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.params)
+        self.stats["connects"] += 1
+        prepared.track(conn)  # long-lived: worth preparing the hot queries on
+        return conn
+
+    def _healthy(self, conn, last_used) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Pooled connection failed health check: {e}")
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["timeouts"] += 1
+                    raise psycopg2.pool.PoolError(
+                        f"Timed out after {self.timeout:.1f}s waiting for a "
+                        f"database connection (max={self.maxconn})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            wait_ms = (time.monotonic() - start) * 1000
+            self.stats["checkouts"] += 1
+            self.stats["wait_ms_total"] += wait_ms
+            self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+            if waited:
+                self.stats["waits"] += 1
+
+        if wait_ms > _SLOW_WAIT_MS:
+            logger.warning(f"Waited {wait_ms:.1f}ms for a pooled connection")
+
+        # Connect / health check outside the lock so other greenlets aren't blocked
+        try:
+            if conn is not None and not self._healthy(conn, last_used):
+                self.stats["discarded"] += 1
+                self._close_quietly(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection; broken or mid-transaction connections are closed."""
+        if not discard and not conn.closed:
+            try:
+                if (
+                    conn.get_transaction_status()
+                    != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+                ):
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        if discard or conn.closed:
+            self.stats["discarded"] += 1
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        now = time.monotonic()
+        stale = []
+        with self._cond:
+            self._idle.append((conn, now))
+            # Trim connections idle past max_idle, oldest first, down to minconn
+            while (
+                self._idle
+                and self._size > self.minconn
+                and now - self._idle[0][1] > self.max_idle
+            ):
+                stale.append(self._idle.popleft()[0])
+                self._size -= 1
+            self._cond.notify()
+        for old in stale:
+            self._close_quietly(old)
+
+    def closeall(self):
+        with self._cond:
+            conns = [c for c, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(conns)
+        for conn in conns:
+            self._close_quietly(conn)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            idle = len(self._idle)
+            size = self._size
+        return {
+            **self.stats,
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "minconn": self.minconn,
+            "maxconn": self.maxconn,
+        }
+
+
+def configure_pool(**overrides):
+    """
+    Enable pooled connections for this process.
+
+    Settings default to the DB_POOL_* environment variables; keyword
+    arguments (minconn, maxconn, timeout, ping_after, max_idle) override them.
+    Safe to call before forking — no connections are opened here.
+    """
+    global _pool_settings
+    unknown = set(overrides) - set(_POOL_DEFAULTS)
+    if unknown:
+        raise TypeError(f"Unknown pool settings: {', '.join(sorted(unknown))}")
+    with _pool_lock:
+        _pool_settings = {**_POOL_DEFAULTS, **overrides}
+
+
+def reset_pool():
+    """
+    Drop this process's pools so the next checkout builds fresh ones.
+
+    Called from gunicorn's post_fork hook. Connections inherited from the
+    parent share its sockets, so they are kept referenced but never closed —
+    closing (or garbage-collecting) them would terminate the parent's sessions.
+    """
+    with _pool_lock:
+        for pool in _pools.values():
+            if pool.pid != os.getpid():
+                _inherited.extend(c for c, _ in pool._idle)
+            else:
+                pool.closeall()
+        _pools.clear()
+
+
+def _connect_params(target: str) -> dict:
+    return {"dsn": REPLICA_DSN} if target == "replica" else config("postgres")
+
+
+def _get_pool(target: str = "primary"):
+    if _pool_settings is None:
+        return None
+    pool = _pools.get(target)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        pool = _pools.get(target)
+        if pool is not None and pool.pid != os.getpid():
+            _inherited.extend(c for c, _ in pool._idle)
+            pool = None
+        if pool is None:
+            pool = _pools[target] = ConnectionPool(_connect_params(target), **_pool_settings)
+            logger.info(
+                f"Connection pool ready ({target}, pid={pool.pid}, "
+                f"min={pool.minconn}, max={pool.maxconn})"
+            )
+        return pool
+
+
+def pool_stats(target: str = "primary") -> dict | None:
+    """Checkout/wait counters and current size of this process's pool, or None."""
+    pool = _pools.get(target)
+    if pool is None or pool.pid != os.getpid():
+        return None
+    return pool.snapshot()
+
+
+def db_error_count() -> int:
+    """Database errors raised inside get_conn() in this process (for /metrics)."""
+    return _db_errors
 
 
 @contextmanager
-def get_conn():
+def get_conn(readonly: bool = False, snapshot: bool = False):
+    """
+    Connection for one transaction, committed on success and rolled back on
+    error.
+
+    readonly=True is for pure reads: the connection comes from the replica
+    when DB_REPLICA_DSN is set, and runs in autocommit, so psycopg2 sends no
+    BEGIN and nothing is committed — one round trip per statement. Each
+    statement then sees its own snapshot; with snapshot=True the statements
+    instead share one REPEATABLE READ READ ONLY transaction (needed for
+    consistent multi-statement loads and for named cursors), ended with a
+    rollback.
+    """
+    global _db_errors
     conn = None
-    start_time = time.time()
+    pool = None
+    discard = False
+    connect_ms = commit_ms = 0.0
+    outcome = "rolled back"
+    target = "replica" if readonly and REPLICA_DSN else "primary"
+    start_time = time.perf_counter()
     try:
-        params = config("postgres")
-
-        connect_start = time.time()
-        conn = psycopg2.connect(**params)
-        connect_time = (time.time() - connect_start) * 1000
+        pool = _get_pool(target)
 
-        logger.info(f"Connection established in {connect_time:.1f}ms")
+        if pool is not None:
+            conn = pool.getconn()
+        else:
+            conn = psycopg2.connect(**_connect_params(target))
+        connect_ms = (time.perf_counter() - start_time) * 1000
+        if readonly:
+            _set_read_mode(conn, snapshot)
 
         yield conn
 
-        commit_start = time.time()
-        conn.commit()
-        commit_time = (time.time() - commit_start) * 1000
-
-        total_time = (time.time() - start_time) * 1000
-        logger.info(
-            f"Transaction committed in {commit_time:.1f}ms (total: {total_time:.1f}ms)"
-        )
+        if readonly:
+            if snapshot:
+                conn.rollback()
+            outcome = "finished read-only"
+        else:
+            commit_start = time.perf_counter()
+            conn.commit()
+            commit_ms = (time.perf_counter() - commit_start) * 1000
+            outcome = "committed"
     except psycopg2.DatabaseError as e:
+        _db_errors += 1
         if conn:
-            conn.rollback()
+            discard = _rollback(conn)
             logger.error(f"Transaction rolled back: {e.pgerror}")
         raise
     except Exception as e:
         if conn:
-            conn.rollback()
+            discard = _rollback(conn)
             logger.error(f"Transaction rolled back: {str(e)}")
         raise
     finally:
         if conn:
-            close_start = time.time()
-            conn.close()
-            close_time = (time.time() - close_start) * 1000
-            logger.info(f"Database connection closed in {close_time:.1f}ms")
+            close_start = time.perf_counter()
+            if pool is not None:
+                if readonly and not conn.closed:
+                    discard = discard or _reset_read_mode(conn, snapshot)
+                pool.putconn(conn, discard=discard)
+            else:
+                conn.close()
+            end = time.perf_counter()
+            events.event(
+                "Transaction %s in %.1fms (%s %.1fms, commit %.1fms, %s %.1fms)",
+                outcome,
+                (end - start_time) * 1000,
+                "checkout" if pool else "connect",
+                connect_ms,
+                commit_ms,
+                "return" if pool else "close",
+                (end - close_start) * 1000,
+            )
+
+
+def _set_read_mode(conn, snapshot: bool):
+    # Client-side only: outside autocommit psycopg2 folds the session
+    # characteristics into the BEGIN it sends anyway
+    if snapshot:
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    else:
+        conn.autocommit = True
+
+
+def _reset_read_mode(conn, snapshot: bool) -> bool:
+    """Restore a pooled connection to transactional defaults; True if unusable."""
+    try:
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        if snapshot:
+            conn.set_session(isolation_level="DEFAULT", readonly="DEFAULT")
+        else:
+            conn.autocommit = False
+    except psycopg2.Error:
+        return True
+    return False
+
+
+def _rollback(conn) -> bool:
+    """Roll back, returning True when the connection is unusable afterwards."""
+    try:
+        conn.rollback()
+    except psycopg2.Error:
+        return True
+    return bool(conn.closed)
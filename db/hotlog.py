@@ -0,0 +1,38 @@
+"""
+Sampled logging for hot paths: per-event lines (one per hearing, footnote or
+connection checkout) that are too frequent for INFO on busy feeds.
+
+Events are logged at DEBUG when the logger has DEBUG enabled, and otherwise
+every LOG_SAMPLE_EVERY-th event is logged at INFO with a "[sampled]" prefix
+(0, the default, logs none). Messages use %-style arguments, so a skipped
+event costs one level check and a counter increment and is never formatted.
+
+Used by db/connect.get_conn and the calendar-feed builders, which log one
+INFO summary per transaction batch / feed instead.
+"""
+
+import itertools
+import logging
+import os
+
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "0"))
+
+
+class SampledLogger:
+    """Wraps a logging.Logger; event() logs at DEBUG, or 1 in `every` at INFO."""
+
+    def __init__(self, logger: logging.Logger, every: int = LOG_SAMPLE_EVERY):
+        self.logger = logger
+        self.every = every
+        self._events = itertools.count(1)  # next() is atomic under the GIL
+
+    def event(self, msg: str, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(msg, *args)
+        elif self.every and next(self._events) % self.every == 0:
+            self.logger.info("[sampled] " + msg, *args)
+
+
+def sampled_logger(name: str, every: int = LOG_SAMPLE_EVERY) -> SampledLogger:
+    """SampledLogger for logging.getLogger(name)."""
+    return SampledLogger(logging.getLogger(name), every)
@@ -0,0 +1,108 @@
+-- =============================================================================
+-- Migration: NOTIFY feed_changed when data behind calendar feeds changes
+-- Run once against legtracker_2026
+-- Listened to by calendar-feed/invalidation.py, which evicts only the feeds
+-- a change touches.
+--
+-- Payload: JSON with the table name and whichever feed-routing columns the
+-- row has (hearing_id, chamber_id, committee_id, openstates_bill_id, org_id,
+-- user_email, last_updated_org_id). UPDATEs send the old and the new row so a
+-- hearing moving between committees invalidates both. TRUNCATE sends
+-- {"table": ..., "all": true}. Identical payloads within one transaction are
+-- delivered once, and nothing is delivered until commit.
+-- =============================================================================
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION app.notify_feed_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    r jsonb;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify(
+            'feed_changed',
+            jsonb_build_object('table', TG_TABLE_NAME, 'all', true)::text
+        );
+        RETURN NULL;
+    END IF;
+
+    FOREACH r IN ARRAY ARRAY[
+        CASE WHEN TG_OP <> 'INSERT' THEN to_jsonb(OLD) END,
+        CASE WHEN TG_OP <> 'DELETE' THEN to_jsonb(NEW) END
+    ] LOOP
+        CONTINUE WHEN r IS NULL;
+        PERFORM pg_notify(
+            'feed_changed',
+            jsonb_strip_nulls(jsonb_build_object(
+                'table',               TG_TABLE_NAME,
+                'hearing_id',          r -> 'hearing_id',
+                'chamber_id',          r -> 'chamber_id',
+                'committee_id',        r -> 'committee_id',
+                'openstates_bill_id',  r -> 'openstates_bill_id',
+                'org_id',              r -> 'org_id',
+                'user_email',          r -> 'user_email',
+                'last_updated_org_id', r -> 'last_updated_org_id'
+            ))::text
+        );
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Row triggers (UPDATEs only when something actually changed, so no-op
+-- upserts from the snapshot refresh stay silent) plus a TRUNCATE trigger
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'snapshot.hearings',
+        'snapshot.hearing_bills',
+        'snapshot.hearing_deadlines',
+        'app.org_bill_dashboard',
+        'app.user_bill_dashboard',
+        'app.working_group_dashboard',
+        'app.bill_custom_details'
+    ] LOOP
+        EXECUTE format(
+            'CREATE TRIGGER trg_notify_feed_change_row
+             AFTER INSERT OR DELETE ON %s
+             FOR EACH ROW EXECUTE FUNCTION app.notify_feed_change()', t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_notify_feed_change_update
+             AFTER UPDATE ON %s
+             FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+             EXECUTE FUNCTION app.notify_feed_change()', t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_notify_feed_change_truncate
+             AFTER TRUNCATE ON %s
+             FOR EACH STATEMENT EXECUTE FUNCTION app.notify_feed_change()', t);
+    END LOOP;
+END;
+$$;
+
+COMMIT;
+
+-- =============================================================================
+-- ROLLBACK
+-- BEGIN;
+
+-- DO $$
+-- DECLARE t text;
+-- BEGIN
+--     FOREACH t IN ARRAY ARRAY[
+--         'snapshot.hearings', 'snapshot.hearing_bills', 'snapshot.hearing_deadlines',
+--         'app.org_bill_dashboard', 'app.user_bill_dashboard',
+--         'app.working_group_dashboard', 'app.bill_custom_details'
+--     ] LOOP
+--         EXECUTE format('DROP TRIGGER IF EXISTS trg_notify_feed_change_row ON %s', t);
+--         EXECUTE format('DROP TRIGGER IF EXISTS trg_notify_feed_change_update ON %s', t);
+--         EXECUTE format('DROP TRIGGER IF EXISTS trg_notify_feed_change_truncate ON %s', t);
+--     END LOOP;
+-- END;
+-- $$;
+-- DROP FUNCTION IF EXISTS app.notify_feed_change();
+
+-- COMMIT;
+-- =============================================================================
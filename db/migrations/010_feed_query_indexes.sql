@@ -0,0 +1,78 @@
+-- =============================================================================
+-- Migration: Composite and covering indexes for the calendar feed queries
+-- Run once against legtracker_2026
+-- Each index serves one access path in db/calendar_queries.py. Checked by
+-- db/admin/explain_feed_queries.py, which fails if a feed query falls back to
+-- a sequential scan on a large table.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so there is
+-- no BEGIN/COMMIT: run with psql -v ON_ERROR_STOP=1 (autocommit; stopping on
+-- error keeps idx_hearings_date until its replacement exists) and re-run after
+-- a failure; a failed build leaves an INVALID index that the rollback below
+-- drops.
+-- =============================================================================
+
+-- Chamber / committee feeds and validators: equality on the feed id, range on
+-- the feed window. The id leads so the date range is an index range rather
+-- than a filter; INCLUDE makes the validator aggregates index-only.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hearings_chamber_date
+ON snapshot.hearings (chamber_id, date) INCLUDE (updated_at, canceled_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hearings_committee_date
+ON snapshot.hearings (committee_id, date) INCLUDE (updated_at, canceled_at);
+
+-- Window-only scans: dashboard feeds, the feed snapshot and the grouped
+-- chamber/committee validators of materialize.py (index-only). Supersedes
+-- idx_hearings_date (calendar_tables.sql), which is dropped once it exists.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hearings_date_cover
+ON snapshot.hearings (date) INCLUDE (chamber_id, committee_id, updated_at, canceled_at);
+
+DROP INDEX CONCURRENTLY IF EXISTS snapshot.idx_hearings_date;
+
+-- Dashboard hearing ids (the IN (SELECT DISTINCT hb2.hearing_id ...) filter):
+-- tracked bill -> hearings on whose agenda it is, index-only.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hearing_bills_bill_hearing
+ON snapshot.hearing_bills (openstates_bill_id, hearing_id);
+
+-- Per-hearing agenda (grouped bills subquery, get_hearing_agenda): already in
+-- file_order, so json_agg(... ORDER BY hb.file_order) needs no sort.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hearing_bills_hearing_order
+ON snapshot.hearing_bills (hearing_id, file_order)
+INCLUDE (openstates_bill_id, footnote, footnote_symbol);
+
+-- Per-hearing deadlines, in the order the grouped query aggregates them
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hearing_deadlines_hearing_date
+ON snapshot.hearing_deadlines (hearing_id, deadline_date, deadline_type);
+
+-- Dashboard membership: one index serves the hearing-id filter, the
+-- on_dashboard join and the ordered string_agg of the membership validator.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_org_bill_dashboard_org_bill
+ON app.org_bill_dashboard (org_id, openstates_bill_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_bill_dashboard_user_bill
+ON app.user_bill_dashboard (user_email, openstates_bill_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_working_group_dashboard_bill
+ON app.working_group_dashboard (openstates_bill_id);
+
+-- Org validator: MAX(last_updated_at) of the org's positions. The position
+-- join itself uses idx_bill_custom_details_bill_org (003).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bill_custom_details_org_updated
+ON app.bill_custom_details (last_updated_org_id, last_updated_at);
+
+ANALYZE snapshot.hearings, snapshot.hearing_bills, snapshot.hearing_deadlines,
+        app.org_bill_dashboard, app.user_bill_dashboard, app.working_group_dashboard,
+        app.bill_custom_details;
+
+-- Rollback:
+-- DROP INDEX CONCURRENTLY IF EXISTS snapshot.idx_hearings_chamber_date;
+-- DROP INDEX CONCURRENTLY IF EXISTS snapshot.idx_hearings_committee_date;
+-- DROP INDEX CONCURRENTLY IF EXISTS snapshot.idx_hearings_date_cover;
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hearings_date ON snapshot.hearings (date);
+-- DROP INDEX CONCURRENTLY IF EXISTS snapshot.idx_hearing_bills_bill_hearing;
+-- DROP INDEX CONCURRENTLY IF EXISTS snapshot.idx_hearing_bills_hearing_order;
+-- DROP INDEX CONCURRENTLY IF EXISTS snapshot.idx_hearing_deadlines_hearing_date;
+-- DROP INDEX CONCURRENTLY IF EXISTS app.idx_org_bill_dashboard_org_bill;
+-- DROP INDEX CONCURRENTLY IF EXISTS app.idx_user_bill_dashboard_user_bill;
+-- DROP INDEX CONCURRENTLY IF EXISTS app.idx_working_group_dashboard_bill;
+-- DROP INDEX CONCURRENTLY IF EXISTS app.idx_bill_custom_details_org_updated;
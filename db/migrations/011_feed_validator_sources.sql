@@ -0,0 +1,118 @@
+-- =============================================================================
+-- Migration: Make the feed validators see every table a feed is built from
+-- Run once against legtracker_2026 (as a superuser: CREATE EVENT TRIGGER)
+--
+-- The feed validators (db/calendar_queries.py) are MAX(hearings.updated_at),
+-- MAX(canceled_at), the hearing count and dashboard membership. hearing_bills
+-- changes already touch hearings.updated_at (004); this adds the other inputs:
+--
+-- - hearing_deadlines: touches the parent hearing, like hearing_bills
+-- - committee.webpage_link: touches the committee's hearings
+-- - app.bills_mv (bill number, name, author): a materialized view, so no row
+--   triggers. An event trigger fingerprints it after every REFRESH / CREATE
+--   and, if the content changed, stamps app.feed_source_versions, which the
+--   validators read as bills_changed_at; it also NOTIFYs feed_changed with
+--   {"table": "bills_mv", "all": true} for calendar-feed/invalidation.py.
+-- =============================================================================
+
+BEGIN;
+
+-- Deadlines: same touch as trg_hearing_bills_touch_parent (004). The function
+-- only reads hearing_id, so it serves any child table of hearings.
+CREATE TRIGGER trg_hearing_deadlines_touch_parent
+AFTER INSERT OR DELETE ON snapshot.hearing_deadlines
+FOR EACH ROW EXECUTE FUNCTION snapshot.touch_hearing_on_bill_change();
+
+CREATE TRIGGER trg_hearing_deadlines_touch_parent_update
+AFTER UPDATE ON snapshot.hearing_deadlines
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+EXECUTE FUNCTION snapshot.touch_hearing_on_bill_change();
+
+-- Committee webpage (committee_webpage in every feed row)
+CREATE OR REPLACE FUNCTION snapshot.touch_hearings_on_committee_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE snapshot.hearings
+    SET updated_at = CURRENT_TIMESTAMP
+    WHERE committee_id = NEW.committee_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_committee_touch_hearings
+AFTER UPDATE OF webpage_link ON snapshot.committee
+FOR EACH ROW WHEN (OLD.webpage_link IS DISTINCT FROM NEW.webpage_link)
+EXECUTE FUNCTION snapshot.touch_hearings_on_committee_change();
+
+-- Content fingerprint and change time of sources without row timestamps
+CREATE TABLE IF NOT EXISTS app.feed_source_versions (
+    source     TEXT PRIMARY KEY,
+    digest     TEXT NOT NULL,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION app.bills_mv_digest()
+RETURNS TEXT AS $$
+    SELECT md5(COALESCE(string_agg(
+               concat_ws('|', openstates_bill_id, bill_number, bill_name, author),
+               E'\n' ORDER BY openstates_bill_id), ''))
+      FROM app.bills_mv;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION app.stamp_bills_mv_version()
+RETURNS event_trigger AS $$
+DECLARE
+    new_digest text;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_event_trigger_ddl_commands()
+         WHERE object_identity = 'app.bills_mv'
+    ) THEN
+        RETURN;
+    END IF;
+    -- CREATE ... WITH NO DATA leaves nothing to read until the first REFRESH
+    IF NOT (SELECT relispopulated FROM pg_class WHERE oid = 'app.bills_mv'::regclass) THEN
+        RETURN;
+    END IF;
+
+    new_digest := app.bills_mv_digest();
+    INSERT INTO app.feed_source_versions (source, digest)
+    VALUES ('bills_mv', new_digest)
+    ON CONFLICT (source) DO UPDATE
+        SET digest = EXCLUDED.digest, changed_at = CURRENT_TIMESTAMP
+        WHERE app.feed_source_versions.digest IS DISTINCT FROM EXCLUDED.digest;
+    IF FOUND THEN
+        PERFORM pg_notify(
+            'feed_changed',
+            jsonb_build_object('table', 'bills_mv', 'all', true)::text
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE EVENT TRIGGER trg_bills_mv_version
+ON ddl_command_end
+WHEN TAG IN ('REFRESH MATERIALIZED VIEW', 'CREATE MATERIALIZED VIEW')
+EXECUTE FUNCTION app.stamp_bills_mv_version();
+
+INSERT INTO app.feed_source_versions (source, digest)
+VALUES ('bills_mv', app.bills_mv_digest())
+ON CONFLICT (source) DO NOTHING;
+
+COMMIT;
+
+-- =============================================================================
+-- ROLLBACK (deploy the feed service without bills_changed_at first)
+-- BEGIN;
+
+-- DROP EVENT TRIGGER IF EXISTS trg_bills_mv_version;
+-- DROP FUNCTION IF EXISTS app.stamp_bills_mv_version();
+-- DROP FUNCTION IF EXISTS app.bills_mv_digest();
+-- DROP TABLE IF EXISTS app.feed_source_versions;
+-- DROP TRIGGER IF EXISTS trg_committee_touch_hearings ON snapshot.committee;
+-- DROP FUNCTION IF EXISTS snapshot.touch_hearings_on_committee_change();
+-- DROP TRIGGER IF EXISTS trg_hearing_deadlines_touch_parent_update ON snapshot.hearing_deadlines;
+-- DROP TRIGGER IF EXISTS trg_hearing_deadlines_touch_parent ON snapshot.hearing_deadlines;
+
+-- COMMIT;
+-- =============================================================================
@@ -0,0 +1,112 @@
+"""
+Server-side prepared statements for the hot feed queries.
+
+statement(name, sql) registers a query once, at import time; execute(cur,
+stmt, params) runs it. On a pooled connection (db/connect.py) the first
+execute sends PREPARE and every later one only EXECUTE name(...), so
+PostgreSQL parses and plans the SQL once per connection instead of once per
+call. Unpooled connections live for a single call, where preparing would only
+add a round trip, so they run the plain SQL.
+
+SQL uses psycopg2 %(name)s placeholders, rewritten to $1..$n for PREPARE;
+PostgreSQL infers each parameter's type from where it is used.
+
+PgBouncer in transaction mode gives each transaction whichever server
+connection is free, where the statement may be missing (or already prepared
+by another client). The first such error turns prepared statements off for
+the process, rolls back and reruns the plain SQL. That rollback is only safe
+as the first statement of a transaction, so execute() prepares only then and
+otherwise runs the plain SQL. DB_PREPARED_STATEMENTS=false turns them off
+from the start.
+"""
+
+import logging
+import os
+import re
+import weakref
+
+from psycopg2 import errors
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+logger = logging.getLogger(__name__)
+
+PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() != "false"
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+
+_statements: dict[str, "Statement"] = {}
+_prepared = weakref.WeakKeyDictionary()  # pooled connection -> names prepared on it
+_enabled = PREPARED_STATEMENTS
+stats = {"prepares": 0, "executes": 0, "fallbacks": 0}
+
+
+class Statement:
+    """A named query: its psycopg2 SQL plus the PREPARE and EXECUTE forms."""
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        params = []
+
+        def number(match):
+            if match.group(1) not in params:
+                params.append(match.group(1))
+            return f"${params.index(match.group(1)) + 1}"
+
+        # PREPARE is sent without parameters, so %% is no longer an escape
+        body = _PLACEHOLDER.sub(number, sql).replace("%%", "%")
+        self.params = tuple(params)
+        self.prepare_sql = f"PREPARE {name} AS {body}"
+        args = ", ".join(f"%({p})s" for p in params)
+        self.execute_sql = f"EXECUTE {name} ({args})" if params else f"EXECUTE {name}"
+
+
+def statement(name: str, sql: str) -> Statement:
+    """Register `sql` under `name` (a valid SQL identifier, unique per process)."""
+    existing = _statements.get(name)
+    if existing is not None:
+        if existing.sql != sql:
+            raise ValueError(f"Prepared statement {name!r} is already registered with other SQL")
+        return existing
+    stmt = _statements[name] = Statement(name, sql)
+    return stmt
+
+
+def track(conn):
+    """Prepare statements on `conn` (a pooled connection) from now on."""
+    if _enabled:
+        _prepared[conn] = set()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _disable(reason: str):
+    global _enabled
+    if _enabled:
+        logger.warning(f"Prepared statements disabled for this process: {reason}")
+    _enabled = False
+    _prepared.clear()
+
+
+def execute(cur, stmt: Statement, params: dict):
+    """cur.execute(stmt.sql, params), through the prepared statement when possible."""
+    conn = cur.connection
+    names = _prepared.get(conn) if _enabled else None
+    if names is None or conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+        cur.execute(stmt.sql, params)
+        return
+    try:
+        if stmt.name not in names:
+            cur.execute(stmt.prepare_sql)
+            names.add(stmt.name)
+            stats["prepares"] += 1
+        cur.execute(stmt.execute_sql, params)
+        stats["executes"] += 1
+    except (errors.InvalidSqlStatementName, errors.DuplicatePreparedStatement) as e:
+        # Another server connection behind a transaction-mode pooler
+        _disable(f"{type(e).__name__} on {stmt.name} (PgBouncer transaction mode?)")
+        stats["fallbacks"] += 1
+        conn.rollback()
+        cur.execute(stmt.sql, params)
@@ -11,13 +11,46 @@ Both the raw token and its sha256 hash are stored in the DB:
 
 The feed service never compares raw tokens directly — it always hashes
 the incoming token and compares against feed_token_hash.
+
+Rotating a token must evict the old hash from the feed service's token
+cache immediately. Two paths cover that:
+- in-process: callables registered with register_rotation_hook() run after
+  the new token commits
+- cross-process: a NOTIFY on TOKEN_ROTATED_CHANNEL carrying the old hash is
+  sent in the same transaction, for listeners in other processes. A payload
+  of "*" means every token was cleared.
 """
 
 import hashlib
+import logging
 import secrets
+from typing import Callable, Optional
 
 from db.connect import get_conn
 
+logger = logging.getLogger(__name__)
+
+TOKEN_ROTATED_CHANNEL = "feed_token_rotated"
+
+_rotation_hooks: list[Callable[[Optional[str], str], None]] = []
+
+
+def register_rotation_hook(hook: Callable[[Optional[str], str], None]):
+    """
+    Register hook(old_hash, new_hash) to run after a token is regenerated.
+    old_hash is None when the record had no token. Usable as a decorator.
+    """
+    _rotation_hooks.append(hook)
+    return hook
+
+
+def _notify_rotation(old_hash: Optional[str], new_hash: str):
+    for hook in _rotation_hooks:
+        try:
+            hook(old_hash, new_hash)
+        except Exception as e:
+            logger.error(f"Token rotation hook {hook.__name__} failed: {e}")
+
 
 def _generate_raw() -> str:
     """Generate a cryptographically secure URL-safe token."""
@@ -51,11 +84,13 @@ def generate_user_token(email: str) -> str:
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT email FROM auth.approved_users WHERE email = %s",
+                "SELECT email, feed_token_hash FROM auth.approved_users WHERE email = %s",
                 (email,),
             )
-            if not cur.fetchone():
+            existing = cur.fetchone()
+            if not existing:
                 raise ValueError(f"No user found with email '{email}'")
+            old_hash = existing[1]
 
             cur.execute(
                 """
@@ -67,7 +102,12 @@ def generate_user_token(email: str) -> str:
                 """,
                 (raw, hashed, email),
             )
+            if old_hash:
+                cur.execute(
+                    "SELECT pg_notify(%s, %s)", (TOKEN_ROTATED_CHANNEL, old_hash)
+                )
 
+    _notify_rotation(old_hash, hashed)
     return raw
 
 
@@ -94,11 +134,13 @@ def generate_org_token(org_id: int) -> str:
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT id FROM auth.approved_organizations WHERE id = %s",
+                "SELECT id, feed_token_hash FROM auth.approved_organizations WHERE id = %s",
                 (org_id,),
             )
-            if not cur.fetchone():
+            existing = cur.fetchone()
+            if not existing:
                 raise ValueError(f"No organization found with id={org_id}")
+            old_hash = existing[1]
 
             cur.execute(
                 """
@@ -110,7 +152,12 @@ def generate_org_token(org_id: int) -> str:
                 """,
                 (raw, hashed, org_id),
             )
+            if old_hash:
+                cur.execute(
+                    "SELECT pg_notify(%s, %s)", (TOKEN_ROTATED_CHANNEL, old_hash)
+                )
 
+    _notify_rotation(old_hash, hashed)
     return raw
 
 